@@ -0,0 +1,74 @@
+"""
+Benchmark for CompressedDiskManager.
+
+Writes PAGES text-like pages (log lines with varying ids and words) and
+reads them all back, through a plain FileDiskManager and through a
+CompressedDiskManager at several zlib levels. The report shows bytes
+stored on disk, the compression ratio, the zlib CPU time per page and the
+wall time of the write and read passes.
+
+Usage:
+    python bench_compression.py
+"""
+import os
+import random
+import tempfile
+import time
+
+from storage_manager import FileDiskManager, CompressedDiskManager, Page
+
+PAGES = 2_000
+LEVELS = [1, 6, 9]
+WORDS = ("select insert update delete from where join order group by limit "
+         "user account order item price status created updated").split()
+
+
+def make_pages(seed=5):
+    rng = random.Random(seed)
+    pages = []
+    for page_id in range(PAGES):
+        text = bytearray()
+        while len(text) < 4096:
+            words = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(4, 12)))
+            text += f"{rng.randrange(10**6):06d} {words}\n".encode()
+        pages.append(Page(page_id, text[:4096]))
+    return pages
+
+
+def run(disk, pages):
+    start = time.perf_counter()
+    for page in pages:
+        disk.writePage(page)
+    disk.sync()
+    write_s = time.perf_counter() - start
+    buf = bytearray(4096)
+    start = time.perf_counter()
+    for page in pages:
+        disk.readPageInto(page.page_id, buf)
+    read_s = time.perf_counter() - start
+    return write_s, read_s
+
+
+def main():
+    pages = make_pages()
+    print(f"{PAGES} pages of 4096 bytes")
+    print(f"{'disk':>10}{'stored MB':>11}{'ratio':>8}{'comp us':>9}{'decomp us':>11}"
+          f"{'write s':>9}{'read s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        with FileDiskManager(os.path.join(tmp, "plain.db")) as disk:
+            write_s, read_s = run(disk, pages)
+        print(f"{'plain':>10}{PAGES * 4096 / 2**20:>11.2f}{1:>8.2f}{'-':>9}{'-':>11}"
+              f"{write_s:>9.3f}{read_s:>8.3f}")
+        for level in LEVELS:
+            with CompressedDiskManager(os.path.join(tmp, f"z{level}.db"), level=level) as disk:
+                write_s, read_s = run(disk, pages)
+                stats = disk.compressionStats()
+            comp_us = stats["compress_cpu_ns"] / stats["compressions"] / 1e3
+            decomp_us = stats["decompress_cpu_ns"] / max(1, stats["decompressions"]) / 1e3
+            print(f"{f'zlib {level}':>10}{stats['stored_bytes'] / 2**20:>11.2f}"
+                  f"{stats['ratio']:>8.2f}{comp_us:>9.1f}{decomp_us:>11.1f}"
+                  f"{write_s:>9.3f}{read_s:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Micro-benchmark for the page replacers.
+
+Fills a replacer with `n` unpinned frames and then times the three
+operations the BufferManager issues on its hot path. With an O(1)
+replacer the per-operation cost stays flat as `n` grows.
+
+Usage:
+    python bench_replacer.py
+"""
+import random
+import time
+
+from storage_manager import LRUReplacer, ClockReplacer
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+OPS = 200_000
+
+
+def bench(replacer_cls, n, ops=OPS, seed=42):
+    rng = random.Random(seed)
+    replacer = replacer_cls()
+    for page_id in range(n):
+        replacer.unpin(page_id)
+    ids = [rng.randrange(n) for _ in range(ops)]
+
+    # pin + unpin of a resident frame (a buffer hit)
+    start = time.perf_counter()
+    for page_id in ids:
+        replacer.pin(page_id)
+        replacer.unpin(page_id)
+    hit_ns = (time.perf_counter() - start) * 1e9 / (2 * ops)
+
+    # victim + unpin of the replacement page (a buffer miss)
+    start = time.perf_counter()
+    for page_id in range(n, n + ops):
+        replacer.victim()
+        replacer.unpin(page_id)
+    miss_ns = (time.perf_counter() - start) * 1e9 / (2 * ops)
+
+    return hit_ns, miss_ns
+
+
+def main():
+    print(f"{'replacer':<14}{'frames':>10}{'pin/unpin ns':>15}{'victim/unpin ns':>18}")
+    for replacer_cls in (LRUReplacer, ClockReplacer):
+        for n in SIZES:
+            hit_ns, miss_ns = bench(replacer_cls, n)
+            print(f"{replacer_cls.__name__:<14}{n:>10}{hit_ns:>15.1f}{miss_ns:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Trace-driven replay benchmark for the page replacers.
+
+Replays a page-access trace against every replacer over a range of pool
+sizes and reports, per (replacer, frames): the hit ratio, accesses per
+second and the miss latency percentiles. Results are printed and can be
+written as CSV and/or JSON to compare runs across releases.
+
+Traces:
+  - recorded: subscribe a JsonLinesSink to the tracer of a BufferManager
+    at DEBUG level; its "buffer" fetch_hit / fetch_miss / unpin events are
+    the trace. Pins are replayed as recorded, so a pool smaller than the
+    pages the application held at once reports pin failures.
+
+        default_tracer.subscribe(JsonLinesSink("app.trace.jsonl"), DEBUG)
+
+  - synthetic: "zipf" (skewed point lookups), "loop" (cyclic passes over
+    all pages, the LRU worst case once they exceed the pool) or "scan"
+    (zipf lookups on a hot set interleaved with sequential scans of cold
+    pages). Every fetch is unpinned right away.
+
+Pages live in a FileDiskManager in a temporary directory, so misses pay
+for a real (OS-cached) read.
+
+Usage:
+    python bench_replay.py --synthetic zipf --frames 64,128,256
+    python bench_replay.py --trace app.trace.jsonl --csv out.csv --json out.json
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from storage_manager import (BufferManager, FileDiskManager, Page, LRUReplacer,
+                             ClockReplacer, LRUKReplacer, ARCReplacer)
+
+REPLACERS = {
+    "LRU": lambda frames: LRUReplacer(),
+    "Clock": lambda frames: ClockReplacer(),
+    "LRU-2": lambda frames: LRUKReplacer(k=2),
+    "ARC": lambda frames: ARCReplacer(frames),
+}
+FETCH, UNPIN = "F", "U"
+
+
+# -----------------------------
+# Traces
+# -----------------------------
+def load_trace(path):
+    """Read (op, page_id) accesses from a JsonLinesSink file."""
+    trace = []
+    with open(path) as f:
+        for line in f:
+            event = json.loads(line)
+            if event["source"] != "buffer":
+                continue
+            if event["op"] in ("fetch_hit", "fetch_miss"):
+                trace.append((FETCH, event["page_id"]))
+            elif event["op"] == "unpin":
+                trace.append((UNPIN, event["page_id"]))
+    if not any(op == UNPIN for op, _ in trace):
+        # recorded without unpin events: release every fetch at once
+        trace = [access for _, page_id in trace for access in ((FETCH, page_id), (UNPIN, page_id))]
+    return trace
+
+
+def zipf_ids(rng, pages, length, s=1.0):
+    ids = list(range(pages))
+    rng.shuffle(ids)
+    weights = [1 / (rank + 1) ** s for rank in range(pages)]
+    return rng.choices(ids, weights, k=length)
+
+
+def synthetic_trace(kind, pages, length, seed=7):
+    rng = random.Random(seed)
+    if kind == "zipf":
+        ids = zipf_ids(rng, pages, length)
+    elif kind == "loop":
+        ids = [i % pages for i in range(length)]
+    elif kind == "scan":
+        hot = pages // 10
+        ids = []
+        cold = hot
+        while len(ids) < length:
+            ids += zipf_ids(rng, hot, 1000)
+            ids += range(cold, min(cold + 500, pages))
+            cold = cold + 500 if cold + 500 < pages else hot
+        ids = ids[:length]
+    else:
+        raise ValueError(f"Unknown synthetic trace {kind!r}")
+    return [access for page_id in ids for access in ((FETCH, page_id), (UNPIN, page_id))]
+
+
+# -----------------------------
+# Replay
+# -----------------------------
+def percentile(sorted_ns, q):
+    if not sorted_ns:
+        return 0
+    return sorted_ns[min(len(sorted_ns) - 1, int(q / 100 * len(sorted_ns)))]
+
+
+def replay(trace, disk, replacer, frames):
+    bpm = BufferManager(frames, replacer=REPLACERS[replacer](frames), disk_manager=disk)
+    page_table = bpm.page_table
+    miss_ns = []
+    hits = failures = 0
+    failed = {}                   # page_id -> fetches that got no pin
+    clock = time.perf_counter_ns
+    start = clock()
+    for op, page_id in trace:
+        if op == UNPIN:
+            if failed.get(page_id):
+                failed[page_id] -= 1
+            else:
+                bpm.unpinPage(page_id, is_dirty=False)
+            continue
+        hit = page_id in page_table
+        t = clock()
+        try:
+            bpm.fetchPage(page_id)
+        except Exception:
+            failures += 1         # every frame pinned
+            failed[page_id] = failed.get(page_id, 0) + 1
+            continue
+        if hit:
+            hits += 1
+        else:
+            miss_ns.append(clock() - t)
+    elapsed = (clock() - start) / 1e9
+    fetches = hits + len(miss_ns)
+    miss_ns.sort()
+    return {
+        "replacer": replacer,
+        "frames": frames,
+        "fetches": fetches,
+        "hits": hits,
+        "hit_ratio": round(hits / fetches, 4) if fetches else 0.0,
+        "ops_per_sec": round(fetches / elapsed) if elapsed else 0,
+        "miss_p50_us": round(percentile(miss_ns, 50) / 1e3, 2),
+        "miss_p90_us": round(percentile(miss_ns, 90) / 1e3, 2),
+        "miss_p99_us": round(percentile(miss_ns, 99) / 1e3, 2),
+        "pin_failures": failures,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--trace", help="JsonLinesSink file to replay")
+    source.add_argument("--synthetic", choices=["zipf", "loop", "scan"], default="zipf")
+    parser.add_argument("--pages", type=int, default=2000, help="pages of a synthetic trace")
+    parser.add_argument("--length", type=int, default=50_000, help="fetches of a synthetic trace")
+    parser.add_argument("--frames", default="64,128,256,512,1024")
+    parser.add_argument("--replacers", default=",".join(REPLACERS))
+    parser.add_argument("--csv", help="write the results as CSV")
+    parser.add_argument("--json", help="write the results and the run settings as JSON")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        trace, name = load_trace(args.trace), args.trace
+    else:
+        trace, name = synthetic_trace(args.synthetic, args.pages, args.length), args.synthetic
+    frames_list = [int(n) for n in args.frames.split(",")]
+    replacers = args.replacers.split(",")
+    page_ids = sorted({page_id for _, page_id in trace})
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        with FileDiskManager(os.path.join(tmp, "replay.db")) as disk:
+            for page_id in page_ids:
+                disk.writePage(Page(page_id))
+            print(f"trace {name}: {sum(op == FETCH for op, _ in trace)} fetches "
+                  f"of {len(page_ids)} pages")
+            print(f"{'replacer':>8}{'frames':>8}{'hit ratio':>11}{'ops/s':>10}"
+                  f"{'miss p50':>10}{'p90':>8}{'p99':>8}{'pin fail':>10}")
+            for replacer in replacers:
+                for frames in frames_list:
+                    row = replay(trace, disk, replacer, frames)
+                    rows.append(dict(trace=name, **row))
+                    print(f"{replacer:>8}{frames:>8}{row['hit_ratio']:>11.2%}"
+                          f"{row['ops_per_sec']:>10}{row['miss_p50_us']:>9.1f}u"
+                          f"{row['miss_p90_us']:>7.1f}u{row['miss_p99_us']:>7.1f}u"
+                          f"{row['pin_failures']:>10}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        run = {"created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+               "python": platform.python_version(), "argv": sys.argv[1:],
+               "trace": name, "results": rows}
+        with open(args.json, "w") as f:
+            json.dump(run, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
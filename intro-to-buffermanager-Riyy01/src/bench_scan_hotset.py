@@ -0,0 +1,59 @@
+"""
+Scan-plus-hotset benchmark.
+
+A buffer pool serves random point lookups on a small hot set that fits in
+the pool. Every round ends with a full sequential scan of a large table.
+The benchmark reports the hit ratio of the point lookups for each
+replacer: plain LRU loses the hot set after every scan, LRU-K and ARC keep it.
+The last row runs the scans of plain LRU through a RingBuffer strategy,
+which keeps them out of the replacer altogether.
+
+Usage:
+    python bench_scan_hotset.py
+"""
+import random
+
+from storage_manager import BufferManager, Page, LRUReplacer, LRUKReplacer, ARCReplacer
+from storage_manager import RingBuffer
+
+FRAMES = 64
+HOT_PAGES = range(0, 48)
+TABLE_PAGES = range(1_000, 3_000)
+ROUNDS = 40
+LOOKUPS_PER_ROUND = 500
+
+
+def run(replacer, strategy=None, seed=7):
+    rng = random.Random(seed)
+    bpm = BufferManager(no_of_frames=FRAMES, replacer=replacer)
+    for page_id in list(HOT_PAGES) + list(TABLE_PAGES):
+        bpm.disk_manager.writePage(Page(page_id))
+
+    lookups = hits = 0
+    for _ in range(ROUNDS):
+        for _ in range(LOOKUPS_PER_ROUND):
+            page_id = rng.choice(HOT_PAGES)
+            hits += page_id in bpm.page_table
+            lookups += 1
+            bpm.fetchPage(page_id)
+            bpm.unpinPage(page_id, is_dirty=False)
+        for page_id in TABLE_PAGES:
+            bpm.fetchPage(page_id, strategy=strategy)
+            bpm.unpinPage(page_id, is_dirty=False)
+    return hits / lookups
+
+
+def main():
+    print(f"{FRAMES} frames, hot set {len(HOT_PAGES)} pages, "
+          f"scan of {len(TABLE_PAGES)} pages every {LOOKUPS_PER_ROUND} lookups")
+    for name, replacer, strategy in (("LRU", LRUReplacer(), None),
+                                     ("LRU-2", LRUKReplacer(k=2), None),
+                                     ("LRU-3", LRUKReplacer(k=3), None),
+                                     ("ARC", ARCReplacer(FRAMES), None),
+                                     ("LRU+ring", LRUReplacer(), RingBuffer(size=8))):
+        ratio = run(replacer, strategy)
+        print(f"{name:<8} point-lookup hit ratio: {ratio:.3f}")
+
+
+if __name__ == "__main__":
+    main()
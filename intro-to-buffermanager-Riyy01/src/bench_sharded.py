@@ -0,0 +1,92 @@
+"""
+Multi-threaded throughput benchmark for ShardedBufferManager.
+
+THREADS threads fetch and unpin random pages of a working set twice the
+size of the pool for DURATION seconds, against pools of the same total
+size split into 1, 2, 4, ... shards. The report shows fetch+unpin pairs
+per second and the share of latch acquisitions that found the latch
+held by another thread.
+
+Under CPython the GIL runs one thread at a time, so throughput stays
+roughly flat and sharding only shows up as less latch contention. On a
+free-threaded interpreter the shards also run in parallel.
+
+Usage:
+    python bench_sharded.py
+"""
+import random
+import threading
+import time
+
+from storage_manager import ShardedBufferManager, ClockReplacer, DiskManager, Page
+
+FRAMES = 1024
+PAGES = 2 * FRAMES
+THREADS = 8
+SHARDS = [1, 2, 4, 8, 16]
+DURATION = 1.0
+
+
+class CountingLock:
+    """A threading.Lock that counts acquisitions and contended acquisitions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            self._lock.acquire()
+            self.contended += 1
+        self.acquired += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+def run(shards, seed=11):
+    disk = DiskManager()
+    for page_id in range(PAGES):
+        disk.writePage(Page(page_id))
+    bpm = ShardedBufferManager(FRAMES, shards=shards, replacer_factory=ClockReplacer,
+                               disk_manager=disk)
+    for shard in bpm.shards:
+        shard.latch = CountingLock()
+    stop = threading.Event()
+    counts = [0] * THREADS
+
+    def worker(i):
+        rng = random.Random(seed + i)
+        ops = 0
+        while not stop.is_set():
+            for _ in range(100):
+                page_id = rng.randrange(PAGES)
+                bpm.fetchPage(page_id)
+                bpm.unpinPage(page_id, is_dirty=False)
+            ops += 100
+        counts[i] = ops
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    time.sleep(DURATION)
+    stop.set()
+    for t in threads:
+        t.join()
+    acquired = sum(shard.latch.acquired for shard in bpm.shards)
+    contended = sum(shard.latch.contended for shard in bpm.shards)
+    return sum(counts) / DURATION, contended / max(1, acquired)
+
+
+def main():
+    print(f"{FRAMES} frames, {PAGES} pages, {THREADS} threads, {DURATION:.0f}s per run")
+    print(f"{'shards':>6}{'ops/s':>12}{'contended':>12}")
+    for shards in SHARDS:
+        ops, contended = run(shards)
+        print(f"{shards:>6}{ops:>12.0f}{contended:>12.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
-from storage_manager import BufferManager, Page
+from storage_manager import BufferManager, Page, PrintSink, default_tracer
 
 def main():
+    # Print disk and buffer events as they happen
+    default_tracer.subscribe(PrintSink())
+
     # Initialize buffer manager with only 2 frames (forces eviction quickly)
     bpm = BufferManager(no_of_frames=2)
 
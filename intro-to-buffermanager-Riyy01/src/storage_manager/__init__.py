@@ -1,4 +1,15 @@
 from .buffer_manager import BufferManager
-from .page_replacer import LRUReplacer
-from .disk_manager import DiskManager
-from .page import Page 
+from .sharded_buffer_manager import ShardedBufferManager
+from .shared_buffer_manager import SharedBufferManager, SharedPage
+from .async_buffer_manager import AsyncBufferManager
+from .page_replacer import PageReplacer, LRUReplacer, ClockReplacer, LRUKReplacer, ARCReplacer
+from .disk_manager import DiskManager, FileDiskManager, MmapDiskManager, CompressedDiskManager
+from .page import Page, PAGE_SIZE
+from .page_allocator import PageAllocator
+from .background_writer import BackgroundWriter
+from .pin_tracking import PinTracker, PinRecord
+from .tracing import (Tracer, TraceEvent, default_tracer, DEBUG, INFO,
+                      RingBufferSink, FileSink, JsonLinesSink, PrintSink)
+from .wal import WriteAheadLog
+from .checkpoint import Checkpointer
+from .access_strategy import RingBuffer
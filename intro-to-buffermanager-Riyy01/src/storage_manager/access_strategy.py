@@ -0,0 +1,67 @@
+# ============================================
+# BUFFER ACCESS STRATEGIES
+# ============================================
+
+
+class _Ring:
+    """The frames a RingBuffer owns in one BufferManager."""
+
+    def __init__(self, size):
+        self.size = size
+        self.frames = []               # frame indexes, reused round robin
+        self.next = 0
+        self.lost = 0                  # slots whose frame left the ring
+
+
+class RingBuffer:
+    """
+    Access strategy for large scans and bulk loads.
+
+    Pages that miss during fetchPage(page_id, strategy=ring) are loaded into
+    a small private ring of at most `size` frames. Once the ring is full,
+    each further miss reuses the next ring frame that is no longer pinned,
+    so a scan of any length occupies no more than `size` frames. Ring frames
+    never enter the pool's replacer, and the scan cannot evict the pages
+    that point lookups keep hot.
+
+    A page in the ring that is fetched without the strategy (or with
+    another one) leaves the ring and becomes a normal page. If every ring
+    frame is still pinned, the ring hands one frame over to the pool and
+    takes a fresh one.
+
+    The frames stay reserved for the ring until release(); use it as a
+    context manager to release them when the scan is done. When the pool
+    runs out of victims it also takes unpinned frames from rings.
+
+    Usage:
+        with RingBuffer(size=32) as ring:
+            for page_id in table_pages:
+                page = bpm.fetchPage(page_id, strategy=ring)
+                ...
+                bpm.unpinPage(page_id, is_dirty=False)
+    """
+
+    def __init__(self, size: int = 32):
+        if size < 1:
+            raise ValueError("RingBuffer size must be at least 1")
+        self.size = size
+        self._rings = {}               # BufferManager -> _Ring
+
+    def _ring(self, bpm):
+        # Caller holds bpm.latch.
+        ring = self._rings.get(bpm)
+        if ring is None:
+            ring = self._rings[bpm] = _Ring(self.size)
+        return ring
+
+    def release(self):
+        """Return the ring frames to their pools' replacers."""
+        rings, self._rings = self._rings, {}
+        for bpm, ring in rings.items():
+            bpm._release_ring(ring)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
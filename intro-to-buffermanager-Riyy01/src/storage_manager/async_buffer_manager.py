@@ -0,0 +1,93 @@
+# ============================================
+# ASYNC BUFFER MANAGER
+# ============================================
+
+import asyncio
+import contextlib
+import functools
+
+
+class AsyncBufferManager:
+    """
+    asyncio front end for a BufferManager (or ShardedBufferManager).
+
+    Hits are served on the event loop with bpm.tryFetchPage(), which only
+    takes the pool latch. Misses, flushes and new pages run the blocking
+    BufferManager call in `executor` (the loop's default executor if None),
+    so the loop keeps running while the disk works.
+
+    Concurrent fetches of the same missing page share one in-flight read:
+    the first one starts it, the others await it and then pin the loaded
+    page as a hit. A fetch cancelled while its read is in flight unpins the
+    page once the read completes.
+
+    Usage:
+        abpm = AsyncBufferManager(bpm)
+        async with abpm.pinned(page_id, write=True) as page:
+            page.data[0] = 1
+
+        page = await abpm.fetchPage(page_id)
+        ...
+        abpm.unpinPage(page_id, is_dirty=False)
+    """
+
+    def __init__(self, bpm, executor=None):
+        self.bpm = bpm
+        self.executor = executor
+        self.reads = {}                # page_id -> future of the in-flight fetchPage
+        self.shared_reads = 0          # fetches that joined an in-flight read
+
+    def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def fetchPage(self, page_id):
+        """Pin page_id and return its Page, reading it in the executor on a miss."""
+        while True:
+            page = self.bpm.tryFetchPage(page_id)
+            if page is not None:
+                return page
+            read = self.reads.get(page_id)
+            if read is None:
+                return await self._read(page_id)
+            self.shared_reads += 1
+            await asyncio.shield(read)   # then pin it like any other hit
+
+    async def _read(self, page_id):
+        # The executor's fetchPage pins the page for this caller.
+        read = self._run(self.bpm.fetchPage, page_id)
+        self.reads[page_id] = read
+        read.add_done_callback(lambda _: self.reads.pop(page_id, None))
+        try:
+            return await asyncio.shield(read)
+        except asyncio.CancelledError:
+            read.add_done_callback(functools.partial(self._unpin_abandoned, page_id))
+            raise
+
+    def _unpin_abandoned(self, page_id, read):
+        if not read.cancelled() and read.exception() is None:
+            self.bpm.unpinPage(page_id, is_dirty=False)
+
+    def unpinPage(self, page_id, is_dirty):
+        return self.bpm.unpinPage(page_id, is_dirty)
+
+    async def newPage(self, page_id=None):
+        return await self._run(self.bpm.newPage, page_id)
+
+    async def flushPage(self, page_id):
+        return await self._run(self.bpm.flushPage, page_id)
+
+    async def flushAllPages(self):
+        return await self._run(self.bpm.flushAllPages)
+
+    @contextlib.asynccontextmanager
+    async def pinned(self, page_id, write: bool = False):
+        """
+        Pin page_id for the body of an `async with`; it is unpinned on exit,
+        dirty if write is True.
+        """
+        page = await self.fetchPage(page_id)
+        try:
+            yield page
+        finally:
+            self.bpm.unpinPage(page_id, is_dirty=write)
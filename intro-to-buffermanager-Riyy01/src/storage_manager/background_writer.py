@@ -0,0 +1,81 @@
+# ============================================
+# BACKGROUND WRITER
+# ============================================
+
+import threading
+
+
+class BackgroundWriter:
+    """
+    Writes unpinned dirty frames of a BufferManager back to disk ahead of
+    eviction, so fetchPage usually finds clean victims and a read miss does
+    not have to pay for a write.
+
+    The writer thread wakes every `interval` seconds, or as soon as the
+    fraction of dirty frames reaches `dirty_ratio`, and writes up to
+    `max_pages` unpinned dirty frames with DiskManager.writePage. Pages it
+    writes are counted in bpm.background_writes; dirty victims written by
+    fetchPage itself are counted in bpm.foreground_writes.
+
+    Usage:
+        writer = BackgroundWriter(bpm, interval=0.1, dirty_ratio=0.5)
+        writer.start()
+        ...
+        writer.stop()
+    """
+
+    def __init__(self, bpm, interval: float = 0.1, dirty_ratio: float = 0.5,
+                 max_pages: int = 64):
+        self.bpm = bpm
+        self.interval = interval
+        self.dirty_ratio = dirty_ratio
+        self.dirty_threshold_pages = max(1, int(dirty_ratio * bpm.buffer_total_no_of_frames))
+        self.max_pages = max_pages
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        bpm.background_writer = self
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="bpm-background-writer",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the writer thread and wait for it to finish its round."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wake(self):
+        """Ask for a round now (the dirty ratio passed the threshold)."""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if not self._stopped.is_set():
+                self.runOnce()
+
+    def runOnce(self):
+        """Write up to max_pages unpinned dirty frames; return how many."""
+        bpm = self.bpm
+        with bpm.latch:
+            candidates = []
+            for page_id, frame_id in bpm.page_table.items():
+                page = bpm.buffer_pool[frame_id]
+                if page.dirty and page.pin_count == 0:
+                    candidates.append((page_id, frame_id))
+                    if len(candidates) == self.max_pages:
+                        break
+        written = 0
+        for page_id, frame_id in candidates:
+            if bpm._flush_frame(page_id, frame_id, only_dirty=True):
+                written += 1
+        with bpm.latch:
+            bpm.background_writes += written
+        return written
@@ -2,8 +2,33 @@
 # STORAGE + BUFFER MANAGER 
 # ============================================
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from time import perf_counter_ns
+
 from .disk_manager import DiskManager
-from .page_replacer import LRUReplacer
+from .latch import ReaderWriterLatch
+from .metrics import BufferMetrics
+from .page import Page
+from .page_replacer import LRUReplacer, PageReplacer
+from .pin_tracking import PinTracker
+from .tracing import DEBUG, INFO, default_tracer
+
+# payload of an empty frame when frames map the disk manager's pages
+_NO_FRAME = memoryview(bytearray())
+
+
+class _PendingIO:
+    """A disk transfer of one page that other threads may have to wait for."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.ok = False
+
+    def wait(self):
+        self.event.wait()
+
 
 class BufferManager:
     """
@@ -18,29 +43,154 @@ class BufferManager:
     Rules:
       - Pinned pages cannot be evicted
       - Dirty pages must be written to disk before eviction
-      - Use LRU policy for replacement
+      - Use the replacer's policy for replacement (LRU by default)
+
+    Frames:
+      - All no_of_frames frames are allocated up front as one contiguous
+        bytearray; buffer_pool[i] is the Page object describing frame i and
+        its data is a memoryview of that frame's slice
+      - page_table maps page_id -> frame index, free_frames lists the
+        frame indexes that hold no page
+      - Pages are read from disk straight into their frame, so memory use is
+        fixed at startup and fetches allocate no page buffers. A Page object
+        describes a frame, not a page: once unpinned it may be reused for
+        another page_id
+
+    Concurrency:
+      - `latch` is a short global latch over page_table, free_frames, the
+        replacer and pin counts; it is never held during disk I/O
+      - Each frame has a ReaderWriterLatch (page.rLatch()/page.wLatch())
+        for its contents. Callers latch the contents they read or modify;
+        loads and write-backs hold the frame exclusively
+      - pending_io tracks pages being loaded or written back so concurrent
+        fetches of the same page wait for that transfer instead of racing it
+      - tryFetchPage(page_id) pins a page only if it is already loaded and
+        returns None otherwise; it never waits for I/O (AsyncBufferManager
+        uses it to serve hits on the event loop)
+
+    Read-ahead:
+      - setReadAhead(window) turns on sequential detection: after `trigger`
+        fetches of consecutive page ids the next `window` pages are loaded
+        into unpinned frames by a small worker pool, overlapping the disk
+        reads with the processing of the current page
+      - prefetch(page_ids) loads pages the caller is about to need
+      - Prefetched pages that have not been fetched yet may take at most
+        max_fraction of the pool, so read-ahead cannot push out the hot set
+
+    Access strategies:
+      - fetchPage/fetchPages(..., strategy=RingBuffer(size)) load missing
+        pages into a small private ring of frames that bypasses the
+        replacer, so scans and bulk loads cannot evict the hot set
+
+    Resizing:
+      - resize(new_frames) grows the pool at once with a new arena of
+        frames, or shrinks it by retiring free frames and evicting
+        unpinned replacer victims (dirty ones are written back). Pinned
+        pages are never waited for; the pool may stay above the target
+
+    Pin guards:
+      - `with bpm.pinned(page_id, write=...) as page:` unpins on exit and
+        marks the page dirty when write is True, so no pin can leak
+      - enablePinTracking() records where every pin still held was taken;
+        getHeldPins(min_age) lists long-held ones, and "No victim aval"
+        errors name the oldest
+
+    Metrics:
+      - enableMetrics() turns on counters and latency histograms (see
+        BufferMetrics); stats() returns a snapshot, resetStats() clears it.
+        While disabled, `metrics` is None and costs one check per call
+
+    Write-ahead logging:
+      - With a WriteAheadLog (wal=...), unpinning a page dirty logs an
+        image of it and sets page.lsn; unpin after releasing the page's
+        content latch. commit() makes the logged changes durable with a
+        group commit, so dirty pages can stay in the pool
+      - A page is written to disk only once the log is durable up to
+        page.lsn; deletePage() logs the delete and flushes the log before
+        the page leaves the disk, so recovery does not bring it back
+      - A zero-copy disk manager (MmapDiskManager) cannot be combined with
+        a wal: frames are views of the file mapping, so the OS may write a
+        page back before its log records are durable. BufferManager raises
+        ValueError for that combination
+      - dirty_page_table maps each logged dirty page to its recLSN, a log
+        position at or before its first record since it was last written.
+        Checkpointer uses it for fuzzy checkpoints
+
+    Tracing:
+      - fetches and unpins are reported to `tracer` as DEBUG events,
+        evictions and flushes as INFO events. With no subscriber the
+        tracer is inactive and each call site costs one attribute check
+      - a JsonLinesSink of the DEBUG "buffer" events is a page-access
+        trace that bench_replay.py can replay
     """
 
-    def __init__(self, no_of_frames: int):
+    def __init__(self, no_of_frames: int, replacer: PageReplacer = None,
+                 disk_manager=None, tracer=None, wal=None):
         ## TODO: initialize buffer_pool, page_table, disk_manager, replacer, and buffer_total_no_of_frames
         self.buffer_total_no_of_frames = no_of_frames
-        self.buffer_pool = {}          # page_id -> Page object
+        self.disk_manager = disk_manager if disk_manager is not None else DiskManager()
+        self.zero_copy = getattr(self.disk_manager, "zero_copy", False)
+        if wal is not None and self.zero_copy:
+            raise ValueError("a wal needs private frames; zero_copy disk managers "
+                             "let the OS write pages back before their log records")
+        self.replacer = replacer if replacer is not None else LRUReplacer()
+        self.page_size = self.disk_manager.page_size
+        if self.zero_copy:
+            # frames are views of the disk manager's mapping; no arena needed
+            self.frame_data = None
+            self.frame_views = [_NO_FRAME] * no_of_frames
+            self.frame_arenas = []
+        else:
+            self.frame_data = bytearray(no_of_frames * self.page_size)
+            frames = memoryview(self.frame_data)
+            self.frame_views = [frames[i * self.page_size:(i + 1) * self.page_size]
+                                for i in range(no_of_frames)]
+            self.frame_arenas = [self.frame_data]   # bytearrays backing frame_views
+        self.buffer_pool = [Page(None, view) for view in self.frame_views]   # frame index -> Page
+        for page in self.buffer_pool:
+            page.latch = ReaderWriterLatch()
+        self.retired_frames = []       # frame indexes given up by resize()
         self.page_table = {}           # page_id -> frame index
-        self.disk_manager = DiskManager()
-        self.replacer = LRUReplacer()
-        pass
+        self.free_frames = list(range(no_of_frames - 1, -1, -1))
+        self.latch = threading.Lock()
+        self.pending_io = {}           # page_id -> _PendingIO
+        self.dirty_pages = 0           # resident frames with dirty set
+        self.foreground_writes = 0     # dirty victims written back by fetchPage
+        self.background_writes = 0     # pages written by the BackgroundWriter
+        self.background_writer = None
+        self.pinned_frames = 0         # frames with pin_count > 0
+        self.metrics = None            # BufferMetrics while enabled
+        self.pin_tracker = None        # PinTracker while enabled
+        self.tracer = tracer if tracer is not None else default_tracer
+        self.wal = wal                 # WriteAheadLog, or None
+        self.dirty_page_table = {}     # page_id -> recLSN (with a wal)
+        self.ring_frames = {}          # frame index -> _Ring of a RingBuffer
+        self.ring_leavers = set()      # pinned frames that left a ring
+        self.readahead_window = 0      # 0: sequential read-ahead is off
+        self.readahead_trigger = 2
+        self.readahead_cap = max(1, no_of_frames // 4)
+        self._readahead_fraction = 0.25
+        self.prefetched = set()        # prefetched page_ids not fetched yet
+        self.prefetch_hits = 0
+        self._prefetch_workers = 2
+        self._prefetch_executor = None
+        self._last_fetched = None
+        self._sequential_run = 0
+        self._readahead_until = -1
 
     # -----------------------------
     # Getters
     # -----------------------------
     def getBufferPool(self):
         ## TODO: return the list of pages in the buffer pool
-        return list(self.buffer_pool.values())
+        with self.latch:
+            return [self.buffer_pool[frame_id] for frame_id in self.page_table.values()]
 
 
     def getPageTable(self):
         ## TODO: return the list of page_ids currently in the buffer pool
-        return list(self.page_table.keys())
+        with self.latch:
+            return list(self.page_table.keys())
     
 
     def getReplacer(self):
@@ -48,15 +198,76 @@ class BufferManager:
         return self.replacer
     
 
+    def getDirtyPageTable(self):
+        """Return a copy of the dirty page table (page_id -> recLSN)."""
+        with self.latch:
+            return dict(self.dirty_page_table)
+
+
     def getDiskManager(self):
         ## TODO: return the disk manager object
         return self.disk_manager
+
+
+    def enableMetrics(self):
+        with self.latch:
+            if self.metrics is None:
+                self.metrics = BufferMetrics()
+                self.metrics.peak_pinned_frames = self.pinned_frames
+
+
+    def disableMetrics(self):
+        with self.latch:
+            self.metrics = None
+
+
+    def enablePinTracking(self, stack_depth: int = 8):
+        """
+        Debug mode: record the thread, time and caller stack of every pin
+        handed out until it is unpinned (see PinTracker). Pins taken
+        before this call are not tracked.
+        """
+        with self.latch:
+            if self.pin_tracker is None:
+                self.pin_tracker = PinTracker(stack_depth)
+
+
+    def disablePinTracking(self):
+        with self.latch:
+            self.pin_tracker = None
+
+
+    def getHeldPins(self, min_age: float = 0.0):
+        """Return the tracked pins held for at least min_age seconds, oldest first."""
+        tracker = self.pin_tracker
+        return tracker.heldPins(min_age) if tracker is not None else []
+
+
+    def stats(self):
+        """Return a snapshot of the metrics (empty while they are disabled)."""
+        with self.latch:
+            metrics = self.metrics
+            return metrics.snapshot() if metrics is not None else {}
+
+
+    def resetStats(self):
+        with self.latch:
+            if self.metrics is not None:
+                self.metrics.reset()
+                self.metrics.peak_pinned_frames = self.pinned_frames
+
+
+    def getWriteCounters(self):
+        """Return how many dirty pages each write path has written."""
+        with self.latch:
+            return {"foreground": self.foreground_writes,
+                    "background": self.background_writes}
         
 
     # -----------------------------
     # Core operations
     # -----------------------------
-    def fetchPage(self, page_id):
+    def fetchPage(self, page_id, strategy=None):
         """
         Fetch a page into the buffer pool.
         
@@ -73,38 +284,404 @@ class BufferManager:
                   - If no victim available → return error / None
                   - If victim is dirty → write back to disk
                   - Replace victim with new page
+
+        With a strategy (RingBuffer), a miss is loaded into the strategy's
+        ring of frames instead of a replacer victim.
         """
         ## TODO: implement fetchPage logic
-        
-        if page_id in self.buffer_pool:
-            page = self.buffer_pool[page_id]
-            page.incrementPinCount()
-            self.replacer.pin(page_id)
-            return page
- 
-        if len(self.buffer_pool) >= self.buffer_total_no_of_frames:
-            victim_id = self.replacer.victim()
-            if victim_id is None:
-                raise Exception("No victim aval")
-
-            victim_page = self.buffer_pool[victim_id]
-            if victim_page.isDirty():
-                self.disk_manager.writePage(victim_page)
-            del self.buffer_pool[victim_id]
-            del self.page_table[victim_id]
-      
-        new_page = self.disk_manager.readPage(page_id)
-        if new_page is None:
-            raise Exception(f"Page {page_id} not found on disk")
-
-        new_page.incrementPinCount()
-        self.buffer_pool[page_id] = new_page
-        self.page_table[page_id] = page_id
-    
-        return new_page
+        metrics = self.metrics
+        traced = self.tracer.active
+        if metrics is not None or traced:
+            start = perf_counter_ns()
+        load = None
+        while True:
+            with self.latch:
+                if self.readahead_window and strategy is None:
+                    self._detect_sequential(page_id)
+                frame_id = self.page_table.get(page_id)
+                pending = self.pending_io.get(page_id)
+                if frame_id is not None:
+                    # Case 1: hit (the page may still be loading)
+                    page = self._pin_hit(page_id, frame_id, strategy)
+                    break
+                if pending is None:
+                    # Case 2: miss, claim a frame and load it below
+                    try:
+                        load = self._claim_frame(page_id, strategy)
+                    except Exception:
+                        if metrics is not None:
+                            metrics.pin_failures += 1
+                        raise
+                    frame_id, _, pending = load
+                    page = self.buffer_pool[frame_id]
+                    if strategy is None:
+                        self.replacer.pin(page_id)
+                    if metrics is not None:
+                        metrics.misses += 1
+                    break
+            # the page is being written back from an evicted frame
+            pending.wait()
+
+        if load is not None:
+            self._load_frame(page_id, *load)
+        if pending is not None:
+            pending.wait()
+            if not pending.ok:
+                raise Exception(f"Page {page_id} not found on disk")
+        if metrics is not None or traced:
+            elapsed = perf_counter_ns() - start
+            if metrics is not None:
+                histogram = metrics.fetch_miss if load is not None else metrics.fetch_hit
+                histogram.record(elapsed)
+            if traced:
+                self.tracer.emit(DEBUG, "buffer", "fetch_miss" if load is not None else "fetch_hit",
+                                 page_id, self.page_size if load is not None else 0, elapsed)
+        if self.pin_tracker is not None:
+            self.pin_tracker.pinned((page_id,))
+        return page
+
+
+    def tryFetchPage(self, page_id, strategy=None):
+        """
+        Pin and return page_id only if it is buffered and loaded; return
+        None instead of reading it or waiting for its I/O. Never blocks on
+        disk, so it is safe to call from an event loop.
+        """
+        metrics = self.metrics
+        traced = self.tracer.active
+        if metrics is not None or traced:
+            start = perf_counter_ns()
+        with self.latch:
+            frame_id = self.page_table.get(page_id)
+            if frame_id is None or page_id in self.pending_io:
+                return None
+            if self.readahead_window and strategy is None:
+                self._detect_sequential(page_id)
+            page = self._pin_hit(page_id, frame_id, strategy)
+        if metrics is not None or traced:
+            elapsed = perf_counter_ns() - start
+            if metrics is not None:
+                metrics.fetch_hit.record(elapsed)
+            if traced:
+                self.tracer.emit(DEBUG, "buffer", "fetch_hit", page_id, 0, elapsed)
+        if self.pin_tracker is not None:
+            self.pin_tracker.pinned((page_id,))
+        return page
+
+
+    def _pin_hit(self, page_id, frame_id, strategy):
+        # Caller holds self.latch; page_id is in frame_id.
+        page = self.buffer_pool[frame_id]
+        self._pin(page)
+        self._access_frame(page_id, frame_id, strategy)
+        if page_id in self.prefetched:
+            self.prefetched.discard(page_id)
+            self.prefetch_hits += 1
+        if self.metrics is not None:
+            self.metrics.hits += 1
+        return page
+
+
+    def _pin(self, page):
+        # Caller holds self.latch.
+        page.incrementPinCount()
+        if page.pin_count == 1:
+            self.pinned_frames += 1
+            metrics = self.metrics
+            if metrics is not None and self.pinned_frames > metrics.peak_pinned_frames:
+                metrics.peak_pinned_frames = self.pinned_frames
+
+
+    def _unpin(self, page):
+        # Caller holds self.latch. Returns the new pin count.
+        page.decrementPinCount()
+        if page.pin_count == 0:
+            self.pinned_frames -= 1
+        return page.pin_count
+
+
+    def _acquire_frame(self):
+        """
+        Return (frame index, victim is dirty) for a frame to load into: a
+        free frame if there is any, otherwise the frame of a replacer victim.
+        The victim is removed from page_table; its Page keeps the victim's
+        page_id so a dirty victim can still be written back.
+        Caller holds self.latch.
+        """
+        if self.free_frames:
+            return self.free_frames.pop(), False
+
+        victim_id = self.replacer.victim()
+        if victim_id is not None:
+            frame_id = self.page_table[victim_id]
+            return frame_id, self._evict_frame(frame_id)
+        frame_id = self._steal_ring_frame()
+        if frame_id is None:
+            raise Exception(self._no_victim_message())
+        return frame_id, self._evict_frame(frame_id, reason="ring")
+
+
+    def _no_victim_message(self):
+        # With pin tracking on, name the oldest pins that fill the pool.
+        tracker = self.pin_tracker
+        if tracker is None:
+            return "No victim aval"
+        return f"No victim aval; oldest pins held:\n{tracker.report(limit=3)}"
+
+
+    def _evict_frame(self, frame_id, reason="replacer"):
+        """
+        Remove the page held by frame_id from page_table and return whether
+        it is dirty (the caller writes it back). reason says who chose the
+        victim for the metrics: "replacer", "ring" (a RingBuffer reusing
+        its frame) or "resize". Caller holds self.latch.
+        """
+        metrics = self.metrics
+        victim_id = self.buffer_pool[frame_id].page_id
+        del self.page_table[victim_id]
+        self.prefetched.discard(victim_id)
+        victim_dirty = self.buffer_pool[frame_id].isDirty()
+        if victim_dirty:
+            self.dirty_pages -= 1
+            self.foreground_writes += 1
+        if metrics is not None:
+            if reason == "replacer":
+                metrics.evictions += 1
+            elif reason == "ring":
+                metrics.ring_evictions += 1
+            else:
+                metrics.resize_evictions += 1
+            metrics.dirty_writebacks += victim_dirty
+        if self.tracer.active:
+            self.tracer.emit(INFO, "buffer", "evict", victim_id,
+                             self.page_size if victim_dirty else 0)
+        return victim_dirty
+
+
+    def _claim_frame(self, page_id, strategy=None):
+        """
+        Claim a frame for page_id and register the pending load; the frame
+        is pinned once. Return (frame index, victim is dirty, pending) for
+        _load_frame. Caller holds self.latch.
+        """
+        if strategy is None:
+            frame_id, victim_dirty = self._acquire_frame()
+        else:
+            frame_id, victim_dirty = self._acquire_ring_frame(strategy._ring(self))
+        page = self.buffer_pool[frame_id]
+        pending = self.pending_io[page_id] = _PendingIO()
+        if victim_dirty:
+            self.pending_io[page.page_id] = pending
+        self.page_table[page_id] = frame_id
+        self._pin(page)
+        return frame_id, victim_dirty, pending
+
+
+    def _load_frame(self, page_id, frame_id, victim_dirty, pending):
+        """
+        Write back the frame's dirty victim and read page_id into the frame
+        claimed by _claim_frame. Called without self.latch; the disk I/O
+        only holds the frame's content latch.
+        """
+        self._load_frames([(page_id, frame_id, victim_dirty, pending)])
+
+
+    def _load_frames(self, loads, fresh=False):
+        """
+        _load_frame for a run of consecutive page_ids: loads is a list of
+        (page_id, frame_id, victim_is_dirty, pending) sorted by page_id.
+        Runs of more than one page are read with one vectored read. With
+        fresh, the pages were just allocated: their frames are zeroed and
+        marked dirty instead of read.
+        """
+        pages = [self.buffer_pool[frame_id] for _, frame_id, _, _ in loads]
+        victim_ids = [page.page_id for page in pages]
+        oks = [False] * len(loads)
+        # frames that are latched together are always latched in frame order
+        latched = [self.buffer_pool[frame_id] for frame_id in sorted(l[1] for l in loads)]
+        try:
+            for page in latched:
+                page.wLatch()
+            try:
+                for page, (page_id, frame_id, victim_dirty, _) in zip(pages, loads):
+                    if victim_dirty:
+                        self._force_log([page])
+                        self.disk_manager.writePage(page)
+                    page.page_id = page_id
+                    page.dirty = False
+                    page.lsn = 0
+                    page.data = self.frame_views[frame_id]
+                if fresh:
+                    for page, (page_id, _, _, _) in zip(pages, loads):
+                        if self.zero_copy:
+                            page.data = self.disk_manager.pageView(page_id)
+                        page.data[:] = bytes(self.page_size)
+                    oks = [True] * len(loads)
+                elif (len(loads) > 1 and not self.zero_copy and
+                        self.disk_manager.readPagesInto(loads[0][0], [p.data for p in pages])):
+                    oks = [True] * len(loads)
+                else:
+                    oks = [self._read_into_frame(page_id, frame_id)
+                           for page_id, frame_id, _, _ in loads]
+            finally:
+                for page in latched:
+                    page.wUnlatch()
+        finally:
+            with self.latch:
+                for ok, victim_id, (page_id, frame_id, victim_dirty, pending) in zip(
+                        oks, victim_ids, loads):
+                    del self.pending_io[page_id]
+                    if victim_dirty:
+                        del self.pending_io[victim_id]
+                        self.dirty_page_table.pop(victim_id, None)
+                    if ok and fresh:
+                        self.buffer_pool[frame_id].dirty = True
+                        self.dirty_pages += 1
+                    if not ok:
+                        del self.page_table[page_id]
+                        self.replacer.remove(page_id)
+                        self.prefetched.discard(page_id)
+                        self._reset_frame(frame_id)
+                        self.free_frames.append(frame_id)
+                    pending.ok = ok
+                    pending.event.set()
+
+
+    def _reset_frame(self, frame_id):
+        self._drop_ring_frame(frame_id)
+        self.ring_leavers.discard(frame_id)
+        page = self.buffer_pool[frame_id]
+        if page.dirty:
+            self.dirty_pages -= 1
+            self.dirty_page_table.pop(page.page_id, None)
+        if page.pin_count > 0:
+            self.pinned_frames -= 1
+        page.page_id = None
+        page.pin_count = 0
+        page.dirty = False
+        page.lsn = 0
+        page.data = self.frame_views[frame_id]
+
+
+    def _read_into_frame(self, page_id, frame_id):
+        page = self.buffer_pool[frame_id]
+        if self.zero_copy:
+            view = self.disk_manager.pageView(page_id)
+            if view is None:
+                return False
+            page.data = view
+        elif not self.disk_manager.readPageInto(page_id, page.data):
+            return False
+        return True
         
 
-    def newPage(self, page_id):
+    # -----------------------------
+    # Read-ahead
+    # -----------------------------
+    def setReadAhead(self, window: int, trigger: int = 2, max_fraction: float = 0.25,
+                     workers: int = 2):
+        """
+        Configure read-ahead.
+
+        Args:
+            window: pages loaded ahead of a sequential scan (0 turns
+                    sequential detection off; prefetch() still works)
+            trigger: consecutive page ids fetched before read-ahead starts
+            max_fraction: share of the frames that prefetched pages not yet
+                    fetched may occupy; also caps the window
+            workers: threads loading prefetched pages
+        """
+        with self.latch:
+            self._readahead_fraction = max_fraction
+            self.readahead_cap = max(1, int(max_fraction * self.buffer_total_no_of_frames))
+            self.readahead_window = min(window, self.readahead_cap)
+            self.readahead_trigger = trigger
+            self._prefetch_workers = workers
+            self._sequential_run = 0
+            self._readahead_until = -1
+
+
+    def prefetch(self, page_ids):
+        """
+        Load page_ids into unpinned frames in the background.
+        Returns the futures of the loads that were scheduled; pages that
+        are resident, already on their way or over the cap are skipped.
+        """
+        with self.latch:
+            return self._schedule_prefetch(page_ids)
+
+
+    def _schedule_prefetch(self, page_ids):
+        # Caller holds self.latch.
+        futures = []
+        for page_id in page_ids:
+            if len(self.prefetched) >= self.readahead_cap:
+                break
+            if (page_id in self.page_table or page_id in self.pending_io
+                    or page_id in self.prefetched):
+                continue
+            if self._prefetch_executor is None:
+                self._prefetch_executor = ThreadPoolExecutor(
+                    max_workers=self._prefetch_workers, thread_name_prefix="bpm-prefetch")
+            self.prefetched.add(page_id)
+            futures.append(self._prefetch_executor.submit(self._prefetch_page, page_id))
+        return futures
+
+
+    def _detect_sequential(self, page_id):
+        # Caller holds self.latch.
+        if page_id == self._last_fetched:
+            return
+        if self._last_fetched is not None and page_id == self._last_fetched + 1:
+            self._sequential_run += 1
+        else:
+            self._sequential_run = 1
+            self._readahead_until = -1
+        self._last_fetched = page_id
+        if self._sequential_run < self.readahead_trigger:
+            return
+        # top the window up once the scan has consumed half of it
+        if page_id + self.readahead_window // 2 >= self._readahead_until:
+            start = max(page_id + 1, self._readahead_until + 1)
+            end = page_id + 1 + self.readahead_window
+            self._readahead_until = end - 1
+            self._schedule_prefetch(range(start, end))
+
+
+    def _prefetch_page(self, page_id):
+        """Load page_id into an unpinned frame; return True if it was loaded."""
+        if not self.disk_manager.hasPage(page_id):
+            with self.latch:
+                self.prefetched.discard(page_id)
+            return False
+        with self.latch:
+            if page_id in self.page_table or page_id in self.pending_io:
+                self.prefetched.discard(page_id)
+                return False
+            try:
+                frame_id, victim_dirty, pending = self._claim_frame(page_id)
+            except Exception:
+                # every frame is pinned: give up on this page
+                self.prefetched.discard(page_id)
+                return False
+        self._load_frame(page_id, frame_id, victim_dirty, pending)
+        if not pending.ok:
+            return False
+        with self.latch:
+            page = self.buffer_pool[frame_id]
+            if self._unpin(page) == 0:
+                self.replacer.unpin(page_id)
+        return True
+
+
+    def close(self):
+        """Stop the read-ahead workers."""
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=True)
+            self._prefetch_executor = None
+
+
+    def newPage(self, page_id=None):
         """
         Load a page from disk.
         
@@ -115,17 +692,35 @@ class BufferManager:
               * Update replacer
               * Return page
           - Else return None
+
+        Without a page_id, a fresh page is allocated on disk (freed page ids
+        are reused) and returned pinned, zeroed and dirty, without reading
+        it from disk. Its id is page.page_id.
         """
         ## TODO: implement newPage
-        new_page = self.disk_manager.readPage(page_id)
-        if new_page is None:
-            raise Exception(f"Page {page_id} not found on disk")
+        if page_id is not None:
+            return self.fetchPage(page_id)
+        return self._install_new_page(self.disk_manager.allocatePage())
 
-        new_page.incrementPinCount()
-        self.buffer_pool[page_id] = new_page
-        self.page_table[page_id] = page_id
-    
-        return new_page
+
+    def _install_new_page(self, page_id):
+        """
+        Give the freshly allocated page_id a zeroed, dirty, pinned frame.
+        The page id is deallocated again if no frame can be claimed.
+        """
+        try:
+            with self.latch:
+                frame_id, victim_dirty, pending = self._claim_frame(page_id)
+                self.replacer.pin(page_id)
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.pin_failures += 1
+            self.disk_manager.deallocatePage(page_id)
+            raise
+        self._load_frames([(page_id, frame_id, victim_dirty, pending)], fresh=True)
+        if self.pin_tracker is not None:
+            self.pin_tracker.pinned((page_id,))
+        return self.buffer_pool[frame_id]
         
 
     def deletePage(self, page_id):
@@ -138,17 +733,33 @@ class BufferManager:
           - Remove page from buffer_pool, page_table, and disk
         """
         ## TODO: implement deletePage
-        if page_id not in self.buffer_pool:
-            self.disk_manager.deletePage(page_id)
-            return True
-
-        page = self.buffer_pool[page_id]
-        if page.getPinCount() > 0:
-            raise Exception("Cant delete pined page")
+        while True:
+            with self.latch:
+                frame_id = self.page_table.get(page_id)
+                pending = self.pending_io.get(page_id)
+                if frame_id is not None:
+                    page = self.buffer_pool[frame_id]
+                    if page.getPinCount() > 0:
+                        raise Exception("Cant delete pined page")
 
-        del self.buffer_pool[page_id]
-        del self.page_table[page_id]
-        self.disk_manager.deletePage(page_id)
+                    del self.page_table[page_id]
+                    self.replacer.remove(page_id)
+                    self._reset_frame(frame_id)
+                    self.free_frames.append(frame_id)
+                if frame_id is not None or pending is None:
+                    # fetches of the page wait until it is gone from disk
+                    deleting = self.pending_io[page_id] = _PendingIO()
+                    break
+            # the page is being written back from an evicted frame
+            pending.wait()
+        try:
+            if self.wal is not None:
+                self.wal.flush(self.wal.appendDealloc(page_id))
+            self.disk_manager.deletePage(page_id)
+        finally:
+            with self.latch:
+                del self.pending_io[page_id]
+            deleting.event.set()
         return True
         
 
@@ -162,17 +773,40 @@ class BufferManager:
           - If pin_count == 0 → add page back to replacer
         """
         ## TODO: implement unpinPage
-        if page_id not in self.buffer_pool:
-            raise Exception("Page not found in buffer")
+        rec_lsns = None
+        if is_dirty and self.wal is not None:
+            rec_lsns = self._log_pages([page_id])
+        with self.latch:
+            frame_id = self.page_table.get(page_id)
+            if frame_id is None:
+                raise Exception("Page not found in buffer")
 
-        page = self.buffer_pool[page_id]
-        page.decrementPinCount()
-        if is_dirty:
-            page.dirty = True
-        if page.getPinCount() == 0:
-            # Now eligible for eviction; add to replacer
-            self.replacer.unpin(page_id)
+            self._unpin_frames({page_id: frame_id}, is_dirty, rec_lsns)
+        if self.pin_tracker is not None:
+            self.pin_tracker.unpinned((page_id,))
+        if self.tracer.active:
+            self.tracer.emit(DEBUG, "buffer", "unpin", page_id, self.page_size if is_dirty else 0)
         return True
+
+
+    @contextmanager
+    def pinned(self, page_id, write: bool = False, strategy=None):
+        """
+        Pin page_id for the body of a `with` block and unpin it on exit,
+        dirty if write is True (also when the body raises, since it may
+        have changed the page).
+
+        Usage:
+            with bpm.pinned(page_id, write=True) as page:
+                page.wLatch()
+                ...
+                page.wUnlatch()
+        """
+        page = self.fetchPage(page_id, strategy)
+        try:
+            yield page
+        finally:
+            self.unpinPage(page_id, is_dirty=write)
         
 
     def flushPage(self, page_id):
@@ -184,28 +818,574 @@ class BufferManager:
           - Mark page as clean
         """
         ## TODO: implement flushPage
-        if page_id not in self.buffer_pool or page_id not in self.disk_manager.pages:
+        metrics = self.metrics
+        traced = self.tracer.active
+        if metrics is not None or traced:
+            start = perf_counter_ns()
+        with self.latch:
+            frame_id = self.page_table.get(page_id)
+        if frame_id is None or not self.disk_manager.hasPage(page_id):
             raise Exception("Invalid")
+        if self._flush_frame(page_id, frame_id) and self.zero_copy:
+            self.disk_manager.sync(page_id)     # the write only touched the mapping
+        if metrics is not None or traced:
+            elapsed = perf_counter_ns() - start
+            if metrics is not None:
+                metrics.flush.record(elapsed)
+            if traced:
+                self.tracer.emit(INFO, "buffer", "flush", page_id, self.page_size, elapsed)
+        return True
 
-        page = self.buffer_pool[page_id]
-        self.disk_manager.writePage(page)
-        page.dirty = False
+
+    def _flush_frame(self, page_id, frame_id, only_dirty=False):
+        """
+        Write frame_id to disk if it still holds page_id (and, with
+        only_dirty, if it is dirty). The shared content latch keeps writers
+        and evictions out while the page is written.
+        """
+        page = self.buffer_pool[frame_id]
+        page.rLatch()
+        try:
+            if page.page_id != page_id:
+                return False      # evicted meanwhile, written back if dirty
+            if only_dirty and not page.dirty:
+                return False
+            self._force_log([page])
+            self.disk_manager.writePage(page)
+            with self.latch:
+                if page.dirty and self.page_table.get(page_id) == frame_id:
+                    page.dirty = False
+                    self.dirty_pages -= 1
+                    self.dirty_page_table.pop(page_id, None)
+        finally:
+            page.rUnlatch()
         return True
         
 
     def flushAllPages(self):
         """
-        Force write all pages in buffer to disk.
+        Force write all dirty pages in buffer to disk.
         
         Instructions:
-          - Iterate over all pages in buffer pool
-          - Write each to disk
+          - Iterate over the dirty pages in buffer pool in page_id order
+          - Write each run of consecutive page_ids with one vectored write
+          - Force the writes out with a single sync
           - Mark all as clean
+
+        Returns {"pages": ..., "bytes": ..., "writes": ...}: pages and bytes
+        written and the number of write calls issued.
         """
         ## TODO: implement flushAllPages
-        for page in self.buffer_pool.values():
-            self.disk_manager.writePage(page)
-            page.dirty = False
-        
+        metrics = self.metrics
+        traced = self.tracer.active
+        if metrics is not None or traced:
+            start = perf_counter_ns()
+        with self.latch:
+            dirty = sorted((page_id, frame_id) for page_id, frame_id in self.page_table.items()
+                           if self.buffer_pool[frame_id].dirty)
+        stats = {"pages": 0, "bytes": 0, "writes": 0}
+        run = []
+        for page_id, frame_id in dirty:
+            if run and page_id != run[-1][0] + 1:
+                self._flush_run(run, stats)
+                run = []
+            run.append((page_id, frame_id))
+        if run:
+            self._flush_run(run, stats)
+        if stats["pages"]:
+            self.disk_manager.sync()
+        if metrics is not None or traced:
+            elapsed = perf_counter_ns() - start
+            if metrics is not None:
+                metrics.flush.record(elapsed)
+            if traced:
+                self.tracer.emit(INFO, "buffer", "flush_all", None, stats["bytes"], elapsed)
+        return stats
+
+
+    def _flush_run(self, run, stats):
+        """
+        Write a run of (page_id, frame_id) with consecutive page_ids. Frames
+        that were evicted or cleaned since the run was collected are skipped
+        and the rest is split into runs that are still consecutive.
+
+        Frame latches are only tried, never waited for while others are
+        held: a thread holding one frame exclusively may be waiting to
+        evict another frame of the run. A busy frame cuts the run and is
+        flushed on its own afterwards, with no other latch held.
+        """
+        latched, busy = [], []
+        pieces, piece = [], []
+        try:
+            for page_id, frame_id in run:
+                page = self.buffer_pool[frame_id]
+                if not page.tryRLatch():
+                    busy.append((page_id, frame_id))
+                    page_id = None        # cut the run here
+                else:
+                    latched.append(page)
+                    if page.page_id != page_id or not page.dirty:
+                        page_id = None
+                if page_id is None:
+                    if piece:
+                        pieces.append(piece)
+                        piece = []
+                    continue
+                piece.append((page_id, frame_id))
+            if piece:
+                pieces.append(piece)
+
+            for piece in pieces:
+                pages = [self.buffer_pool[frame_id] for _, frame_id in piece]
+                self._force_log(pages)
+                if len(pages) == 1:
+                    self.disk_manager.writePage(pages[0])
+                else:
+                    self.disk_manager.writePages(pages)
+                stats["pages"] += len(pages)
+                stats["bytes"] += len(pages) * self.page_size
+                stats["writes"] += 1
+                with self.latch:
+                    for page_id, frame_id in piece:
+                        page = self.buffer_pool[frame_id]
+                        if page.dirty and self.page_table.get(page_id) == frame_id:
+                            page.dirty = False
+                            self.dirty_pages -= 1
+                            self.dirty_page_table.pop(page_id, None)
+        finally:
+            for page in latched:
+                page.rUnlatch()
+
+        for page_id, frame_id in busy:
+            if self._flush_frame(page_id, frame_id, only_dirty=True):
+                stats["pages"] += 1
+                stats["bytes"] += self.page_size
+                stats["writes"] += 1
+
+
+    # -----------------------------
+    # Write-ahead logging
+    # -----------------------------
+    def commit(self):
+        """Make every logged page change durable; returns the durable LSN."""
+        if self.wal is None:
+            raise Exception("No write-ahead log")
+        return self.wal.commit()
+
+
+    def _log_pages(self, page_ids):
+        """
+        Log an image of each page (pinned by the caller) and raise page.lsn.
+        Returns page_id -> recLSN for the dirty page table. The pages enter
+        the table before their records are appended, so a checkpoint never
+        misses a record that is already in the log.
+        """
+        rec_lsns = {}
+        with self.latch:
+            frames = [(page_id, self.page_table.get(page_id)) for page_id in page_ids]
+            rec_lsn = self.wal.end_lsn
+            for page_id, frame_id in frames:
+                if frame_id is not None:
+                    rec_lsns[page_id] = self.dirty_page_table.setdefault(page_id, rec_lsn)
+        for page_id, frame_id in frames:
+            if frame_id is None:
+                continue              # unpinning it raises
+            page = self.buffer_pool[frame_id]
+            page.rLatch()
+            try:
+                lsn = self.wal.appendPage(page_id, page.data)
+                if lsn > page.lsn:
+                    page.lsn = lsn
+            finally:
+                page.rUnlatch()
+        return rec_lsns
+
+
+    def _force_log(self, pages):
+        # WAL rule: pages reach the disk only after their log records do.
+        if self.wal is not None:
+            self.wal.flush(max(page.lsn for page in pages))
+
+
+    # -----------------------------
+    # Batch operations
+    # -----------------------------
+    def fetchPages(self, page_ids, strategy=None):
+        """
+        Fetch several pages at once; returns their Page objects in the order
+        of the distinct page_ids, each pinned once. strategy is as for
+        fetchPage.
+
+        All misses are found and all victims chosen in one pass under the
+        latch. Missing pages are then sorted and every run of adjacent
+        page_ids is read with one vectored read into its frames, which
+        saves a syscall per page on range scans and batch lookups.
+        If any page does not exist the pages already pinned are unpinned
+        and an exception is raised.
+        """
+        page_ids = list(dict.fromkeys(page_ids))
+        frames = {}                   # page_id -> frame index
+        waits = []                    # pending loads started by others
+        misses = []
+        retry = []                    # pages being written back: fetch one by one
+        with self.latch:
+            for page_id in page_ids:
+                frame_id = self.page_table.get(page_id)
+                pending = self.pending_io.get(page_id)
+                if frame_id is not None:
+                    page = self.buffer_pool[frame_id]
+                    self._pin(page)
+                    self._access_frame(page_id, frame_id, strategy)
+                    if page_id in self.prefetched:
+                        self.prefetched.discard(page_id)
+                        self.prefetch_hits += 1
+                    frames[page_id] = frame_id
+                    if pending is not None:
+                        waits.append((page_id, pending))
+                elif pending is not None:
+                    retry.append(page_id)
+                else:
+                    misses.append(page_id)
+
+            metrics = self.metrics
+            if metrics is not None:
+                metrics.hits += len(frames)
+                metrics.misses += len(misses)
+            available = len(self.free_frames) + self.replacer.replacerSize()
+            if strategy is not None:
+                available += self._reusable_ring_frames(strategy._ring(self))
+            if len(misses) > available:
+                self._unpin_frames(frames, is_dirty=False)
+                if metrics is not None:
+                    metrics.pin_failures += 1
+                raise Exception(self._no_victim_message())
+            loads = []
+            for page_id in sorted(misses):
+                frame_id, victim_dirty, pending = self._claim_frame(page_id, strategy)
+                if strategy is None:
+                    self.replacer.pin(page_id)
+                frames[page_id] = frame_id
+                loads.append((page_id, frame_id, victim_dirty, pending))
+
+        run = []
+        for load in loads:
+            if run and load[0] != run[-1][0] + 1:
+                self._load_frames(run)
+                run = []
+            run.append(load)
+        if run:
+            self._load_frames(run)
+
+        missing = [page_id for page_id, _, _, pending in loads if not pending.ok]
+        for page_id, pending in waits:
+            pending.wait()
+            if not pending.ok:
+                missing.append(page_id)
+        if missing:
+            with self.latch:
+                self._unpin_frames({page_id: frame_id for page_id, frame_id in frames.items()
+                                    if page_id not in missing}, is_dirty=False)
+            raise Exception(f"Pages {sorted(missing)} not found on disk")
+
+        try:
+            for page_id in retry:
+                self.fetchPage(page_id, strategy)
+                frames[page_id] = self.page_table[page_id]
+        except Exception:
+            with self.latch:
+                self._unpin_frames(frames, is_dirty=False)
+            raise
+        if self.pin_tracker is not None:
+            # fetchPage() recorded the retried pages
+            self.pin_tracker.pinned([page_id for page_id in page_ids if page_id not in retry])
+        if self.tracer.active:
+            loaded = {load[0] for load in loads}
+            for page_id in page_ids:
+                if page_id not in retry:
+                    self.tracer.emit(DEBUG, "buffer",
+                                     "fetch_miss" if page_id in loaded else "fetch_hit",
+                                     page_id, self.page_size if page_id in loaded else 0)
+        with self.latch:
+            return [self.buffer_pool[self.page_table[page_id]] for page_id in page_ids]
+
+
+    def unpinPages(self, page_ids, is_dirty=False):
+        """
+        Unpin several pages under one latch acquisition. is_dirty applies to
+        all of them. Raises (unpinning nothing) if any page is not in the
+        buffer.
+        """
+        page_ids = list(page_ids)
+        rec_lsns = None
+        if is_dirty and self.wal is not None:
+            rec_lsns = self._log_pages(page_ids)
+        with self.latch:
+            frames = {}
+            for page_id in page_ids:
+                frame_id = self.page_table.get(page_id)
+                if frame_id is None:
+                    raise Exception("Page not found in buffer")
+                frames[page_id] = frame_id
+            self._unpin_frames(frames, is_dirty, rec_lsns)
+        if self.pin_tracker is not None:
+            self.pin_tracker.unpinned(page_ids)
+        if self.tracer.active:
+            for page_id in page_ids:
+                self.tracer.emit(DEBUG, "buffer", "unpin", page_id,
+                                 self.page_size if is_dirty else 0)
+        return True
+
+
+    def _unpin_frames(self, frames, is_dirty, rec_lsns=None):
+        # Caller holds self.latch. frames: page_id -> frame index;
+        # rec_lsns: page_id -> recLSN of the pages _log_pages logged
+        for page_id, frame_id in frames.items():
+            page = self.buffer_pool[frame_id]
+            pin_count = self._unpin(page)
+            if is_dirty and not page.dirty:
+                page.dirty = True
+                self.dirty_pages += 1
+            if rec_lsns and page_id in rec_lsns:
+                self.dirty_page_table.setdefault(page_id, rec_lsns[page_id])
+            if pin_count == 0 and frame_id not in self.ring_frames:
+                if frame_id in self.ring_leavers:
+                    self.ring_leavers.discard(frame_id)
+                    self.replacer.pin(page_id)
+                # Now eligible for eviction; add to replacer
+                self.replacer.unpin(page_id)
+        writer = self.background_writer
+        if writer is not None and self.dirty_pages >= writer.dirty_threshold_pages:
+            writer.wake()
+
+
+    # -----------------------------
+    # Access strategies
+    # -----------------------------
+    def _access_frame(self, page_id, frame_id, strategy):
+        """
+        Record an access to a resident page for the replacer. A ring page
+        accessed outside its ring leaves the ring. Caller holds self.latch.
+        """
+        ring = self.ring_frames.get(frame_id)
+        if ring is None:
+            self.replacer.pin(page_id)
+        elif strategy is None or strategy._rings.get(self) is not ring:
+            self._drop_ring_frame(frame_id)
+            self.replacer.pin(page_id)
+
+
+    def _acquire_ring_frame(self, ring):
+        """
+        _acquire_frame for a ring: fill the ring up to its size from the
+        pool, then reuse its unpinned frames round robin. Slots whose frame
+        left the ring are refilled from the pool. If all frames are pinned,
+        one slot is handed over to the pool and refilled.
+        Caller holds self.latch.
+        """
+        if ((len(ring.frames) < ring.size or ring.lost) and
+                (self.free_frames or self.replacer.replacerSize())):
+            frame_id, victim_dirty = self._acquire_frame()
+            self._add_ring_frame(ring, frame_id)
+            return frame_id, victim_dirty
+        for _ in range(len(ring.frames)):
+            slot = ring.next
+            ring.next = (slot + 1) % len(ring.frames)
+            frame_id = ring.frames[slot]
+            if (self.ring_frames.get(frame_id) is ring and
+                    self.buffer_pool[frame_id].pin_count == 0):
+                return frame_id, self._evict_frame(frame_id, reason="ring")
+        frame_id, victim_dirty = self._acquire_frame()
+        if ring.frames and not ring.lost:
+            self._leave_ring(ring.frames[ring.next], ring)
+        self._add_ring_frame(ring, frame_id)
+        return frame_id, victim_dirty
+
+
+    def _add_ring_frame(self, ring, frame_id):
+        """
+        Give frame_id to the ring: it takes a slot whose frame left the
+        ring (its own old slot if it had one) or a new slot. Caller holds
+        self.latch.
+        """
+        if ring.lost:
+            lost = [i for i, f in enumerate(ring.frames) if self.ring_frames.get(f) is not ring]
+            slot = next((i for i in lost if ring.frames[i] == frame_id), lost[0])
+            ring.frames[slot] = frame_id
+            ring.lost -= 1
+        else:
+            ring.frames.append(frame_id)
+        self.ring_frames[frame_id] = ring
+
+
+    def _drop_ring_frame(self, frame_id):
+        # Caller holds self.latch.
+        ring = self.ring_frames.pop(frame_id, None)
+        if ring is not None:
+            ring.lost += 1
+
+
+    def _reusable_ring_frames(self, ring):
+        # Caller holds self.latch.
+        return sum(1 for frame_id in ring.frames
+                   if self.ring_frames.get(frame_id) is ring and
+                   self.buffer_pool[frame_id].pin_count == 0)
+
+
+    def _leave_ring(self, frame_id, ring):
+        """
+        Hand a ring frame over to the replacer. A pinned frame (possibly
+        still loading its page) is handed over by its last unpin.
+        Caller holds self.latch.
+        """
+        if self.ring_frames.get(frame_id) is not ring:
+            return
+        self._drop_ring_frame(frame_id)
+        page = self.buffer_pool[frame_id]
+        if page.pin_count > 0:
+            self.ring_leavers.add(frame_id)
+        else:
+            self.replacer.pin(page.page_id)
+            self.replacer.unpin(page.page_id)
+
+
+    def _release_ring(self, ring):
+        with self.latch:
+            for frame_id in ring.frames:
+                self._leave_ring(frame_id, ring)
+            ring.frames = []
+            ring.next = 0
+            ring.lost = 0
+
+
+    def _steal_ring_frame(self):
+        """
+        Take an unpinned frame from some ring when the replacer has no
+        victim left (e.g. a ring that was never released). Caller holds
+        self.latch.
+        """
+        for frame_id in self.ring_frames:
+            if self.buffer_pool[frame_id].pin_count == 0:
+                self._drop_ring_frame(frame_id)
+                return frame_id
+        return None
+
+
+    # -----------------------------
+    # Resizing
+    # -----------------------------
+    def resize(self, new_frames: int):
+        """
+        Change the number of frames while the pool is in use; returns the
+        number of frames afterwards.
+
+        Growing adds a new arena of free frames at once (reusing the frame
+        indexes of retired frames). Shrinking retires free frames first,
+        then evicts unpinned victims chosen by the replacer, writing dirty
+        ones back. It stops when the replacer has no victim left instead of
+        waiting for pinned pages, so the result may be above new_frames;
+        call resize() again later to finish. An arena whose frames are all
+        retired is released.
+        """
+        if new_frames < 1:
+            raise ValueError("A buffer pool needs at least one frame")
+        retire = []                   # (frame index, victim page_id, pending)
+        with self.latch:
+            excess = self.buffer_total_no_of_frames - new_frames
+            if excess < 0:
+                self._grow(-excess)
+            self.free_frames.sort()
+            while len(retire) < excess:
+                if self.free_frames:
+                    retire.append((self.free_frames.pop(), None, None))
+                    continue
+                victim_id = self.replacer.victim()
+                if victim_id is None:
+                    break
+                frame_id = self.page_table[victim_id]
+                pending = None
+                if self._evict_frame(frame_id, reason="resize"):
+                    pending = self.pending_io[victim_id] = _PendingIO()
+                retire.append((frame_id, victim_id, pending))
+            self.free_frames.sort(reverse=True)
+            self.buffer_total_no_of_frames -= len(retire)
+
+        latched = sorted(frame_id for frame_id, _, _ in retire)
+        for frame_id in latched:
+            self.buffer_pool[frame_id].wLatch()
+        try:
+            for frame_id, victim_id, pending in retire:
+                if pending is not None:
+                    page = self.buffer_pool[frame_id]
+                    self._force_log([page])
+                    self.disk_manager.writePage(page)
+                    pending.ok = True
+        finally:
+            with self.latch:
+                for frame_id, victim_id, pending in retire:
+                    if pending is not None:
+                        del self.pending_io[victim_id]
+                        self.dirty_page_table.pop(victim_id, None)
+                        pending.event.set()
+                    self._retire_frame(frame_id)
+                if retire:
+                    self._release_arenas()
+                self._resized()
+            for frame_id in latched:
+                self.buffer_pool[frame_id].wUnlatch()
+        return self.buffer_total_no_of_frames
+
+
+    def _grow(self, count):
+        # Caller holds self.latch.
+        if self.zero_copy:
+            views = [_NO_FRAME] * count
+        else:
+            arena = bytearray(count * self.page_size)
+            self.frame_arenas.append(arena)
+            frames = memoryview(arena)
+            views = [frames[i * self.page_size:(i + 1) * self.page_size]
+                     for i in range(count)]
+        for view in views:
+            if self.retired_frames:
+                frame_id = self.retired_frames.pop()
+                self.frame_views[frame_id] = view
+                self.buffer_pool[frame_id].data = view
+            else:
+                frame_id = len(self.buffer_pool)
+                page = Page(None, view)
+                page.latch = ReaderWriterLatch()
+                self.frame_views.append(view)
+                self.buffer_pool.append(page)
+            self.free_frames.append(frame_id)
+        self.buffer_total_no_of_frames += count
+
+
+    def _retire_frame(self, frame_id):
+        # Caller holds self.latch; the frame is neither free nor in page_table.
+        page = self.buffer_pool[frame_id]
+        page.page_id = None
+        page.dirty = False
+        page.lsn = 0
+        page.data = bytearray()
+        self.frame_views[frame_id] = None
+        self.retired_frames.append(frame_id)
+
+
+    def _release_arenas(self):
+        # Caller holds self.latch. Drop arenas no frame uses any more.
+        live = {id(view.obj) for view in self.frame_views if view is not None}
+        self.frame_arenas = [arena for arena in self.frame_arenas if id(arena) in live]
+        self.frame_data = self.frame_arenas[0] if self.frame_arenas else None
 
 
+    def _resized(self):
+        # Caller holds self.latch. Rescale what depends on the pool size.
+        frames = self.buffer_total_no_of_frames
+        self.readahead_cap = max(1, int(self._readahead_fraction * frames))
+        self.readahead_window = min(self.readahead_window, self.readahead_cap)
+        set_capacity = getattr(self.replacer, "setCapacity", None)
+        if set_capacity is not None:
+            set_capacity(frames)
+        writer = self.background_writer
+        if writer is not None:
+            writer.dirty_threshold_pages = max(1, int(writer.dirty_ratio * frames))
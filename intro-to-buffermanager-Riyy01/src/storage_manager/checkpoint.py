@@ -0,0 +1,98 @@
+# ============================================
+# CHECKPOINTER
+# ============================================
+
+import threading
+
+
+class Checkpointer:
+    """
+    Takes fuzzy checkpoints of a BufferManager with a WriteAheadLog, so
+    recovery only has to redo the log from the oldest recLSN of the pages
+    that were dirty at the last checkpoint instead of from its start.
+
+    A checkpoint never stops the pool:
+      1. snapshot the dirty page table (page_id -> recLSN) under the pool
+         latch, sync the disk and log a CHECKPOINT record with the table;
+         recovery now starts at its smallest recLSN
+      2. write the pages of the snapshot that are still dirty, `batch_pages`
+         at a time with `batch_delay` seconds between batches, while
+         fetches go on
+      3. log a second checkpoint, whose table no longer has those pages
+      4. truncate the log behind the new redo LSN once at least
+         `truncate_bytes` of it are no longer needed (None: never)
+
+    Usage:
+        checkpointer = Checkpointer(bpm, interval=30.0)
+        checkpointer.start()          # a checkpoint every interval seconds
+        ...
+        checkpointer.stop()
+
+        Checkpointer(bpm).checkpoint()   # one checkpoint, in this thread
+    """
+
+    def __init__(self, bpm, interval: float = 30.0, batch_pages: int = 16,
+                 batch_delay: float = 0.01, truncate_bytes: int = 1 << 20):
+        if bpm.wal is None:
+            raise ValueError("Checkpointer needs a BufferManager with a wal")
+        self.bpm = bpm
+        self.interval = interval
+        self.batch_pages = batch_pages
+        self.batch_delay = batch_delay
+        self.truncate_bytes = truncate_bytes
+        self.checkpoints = 0
+        self.pages_written = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="bpm-checkpointer",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the checkpointer; a checkpoint in progress finishes without delays."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Take a fuzzy checkpoint; returns the redo LSN it ends with."""
+        dirty = self.logCheckpoint()
+        bpm = self.bpm
+        page_ids = sorted(dirty)
+        for i in range(0, len(page_ids), self.batch_pages):
+            if i and self.batch_delay:
+                self._stopped.wait(self.batch_delay)
+            for page_id in page_ids[i:i + self.batch_pages]:
+                with bpm.latch:
+                    frame_id = bpm.page_table.get(page_id)
+                if frame_id is not None and bpm._flush_frame(page_id, frame_id, only_dirty=True):
+                    self.pages_written += 1
+        self.logCheckpoint()
+        self.checkpoints += 1
+        wal = bpm.wal
+        if (self.truncate_bytes is not None and
+                wal.redo_lsn - wal.base_lsn >= self.truncate_bytes):
+            wal.truncate()
+        return wal.redo_lsn
+
+    def logCheckpoint(self):
+        """
+        Log a checkpoint record of the current dirty page table and return
+        the table. Pages written before the snapshot left the table, so the
+        disk is synced before the record makes their log records obsolete.
+        """
+        bpm = self.bpm
+        with bpm.latch:
+            begin_lsn = bpm.wal.end_lsn
+            dirty = dict(bpm.dirty_page_table)
+        bpm.disk_manager.sync()
+        bpm.wal.logCheckpoint(dirty, begin_lsn)
+        return dirty
@@ -1,37 +1,745 @@
+import bisect
+import mmap
+import os
+import struct
+import threading
+import zlib
+from time import perf_counter_ns, thread_time_ns
+
+from .page import Page, PAGE_SIZE
+from .page_allocator import PageAllocator
+from .tracing import DEBUG, default_tracer
+
+
 class DiskManager:
     """
     A DiskManager that simulates persistent storage using a dictionary.
 
     In a real DBMS this would handle raw file I/O (read/write blocks from disk).
     For teaching purposes, we store Page objects in memory.
+
+    Every read, write and delete is reported to `tracer` (the shared
+    default_tracer unless another Tracer is given) as a DEBUG event.
+
+    Page ids in use are tracked by a PageAllocator: allocatePage() hands out
+    fresh ids (reusing deleted ones) and hasPage() is a bitmap lookup.
     """
 
-    def __init__(self):
+    def __init__(self, tracer=None):
         # Simulated disk storage: maps page_id -> Page
         self.pages = {}
-        # Track explicitly invalidated (deleted) pages
-        self.invalid = []
+        # Page ids in use; deleted pages are freed for reuse
+        self.allocator = PageAllocator()
+        self.page_size = PAGE_SIZE
+        self.tracer = tracer if tracer is not None else default_tracer
+
+    def writePage(self, page):
+        """Write a copy of a page object to 'disk' (dictionary)."""
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        self.pages[page.page_id] = Page(page.page_id, bytearray(page.data))
+        self.allocator.markAllocated(page.page_id)
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "write", page.page_id, len(page.data),
+                             perf_counter_ns() - start)
+
+    def writePages(self, pages):
+        """Write pages with consecutive page_ids."""
+        for page in pages:
+            self.writePage(page)
+
+    def sync(self):
+        """Nothing to force out: the 'disk' is a dictionary."""
+
+    def readPage(self, page_id: int):
+        """Read a page from disk if it is allocated."""
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        page = self.pages.get(page_id, None) if self.allocator.isAllocated(page_id) else None
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "read", page_id,
+                             len(page.data) if page is not None else 0,
+                             perf_counter_ns() - start)
+        return page
+
+    def readPageInto(self, page_id: int, buf) -> bool:
+        """Copy a page's payload into `buf`; return False if it does not exist."""
+        page = self.readPage(page_id)
+        if page is None:
+            return False
+        buf[:] = page.data
+        return True
+
+    def readPagesInto(self, page_id: int, bufs) -> bool:
+        """Read the consecutive pages page_id, page_id + 1, ... into bufs."""
+        return all([self.readPageInto(page_id + i, buf) for i, buf in enumerate(bufs)])
+
+    def allocatePage(self) -> int:
+        """Allocate a zeroed page and return its id."""
+        page_id = self.allocator.allocatePage()
+        self.pages[page_id] = Page(page_id, bytearray(self.page_size))
+        if self.tracer.active:
+            self.tracer.emit(DEBUG, "disk", "allocate", page_id)
+        return page_id
+
+    def deletePage(self, page_id: int):
+        """Delete a page from disk by page_id; its id can be allocated again."""
+        if self.tracer.active:
+            self.tracer.emit(DEBUG, "disk", "delete", page_id)
+        self.pages.pop(page_id, None)
+        self.allocator.deallocatePage(page_id)
+
+    deallocatePage = deletePage
+
+    def hasPage(self, page_id: int) -> bool:
+        """Check if a page is allocated on disk."""
+        return self.allocator.isAllocated(page_id)
+
+
+SUPPORTED_PAGE_SIZES = (4096, 8192, 16384)
+
+
+class FileDiskManager:
+    """
+    A DiskManager backed by a single database file.
+
+    Page `page_id` lives at byte offset `page_id * page_size`. Pages are
+    read and written with positional I/O (os.pread / os.pwrite), so no call
+    moves a shared file offset. It exposes the same interface as
+    DiskManager and can be handed to BufferManager(disk_manager=...).
+
+    Attributes:
+      - path      : path of the database file
+      - page_size : bytes per page, one of SUPPORTED_PAGE_SIZES
+      - num_pages : number of page slots currently in the file
+      - allocator : PageAllocator of the slots in use, saved to
+                    `<path>.fsm` by sync() and close()
+
+    Deleted slots are recycled by allocatePage() instead of growing the
+    file. A recycled slot keeps its old bytes until it is written;
+    BufferManager.newPage() hands out a zeroed frame for it.
+
+    Positional I/O makes concurrent readPage/writePage calls safe; updates
+    of num_pages and the allocator are guarded by a small metadata latch.
+    I/O is reported to `tracer` like DiskManager does.
+    """
+
+    def __init__(self, path, page_size: int = PAGE_SIZE, tracer=None):
+        if page_size not in SUPPORTED_PAGE_SIZES:
+            raise ValueError(f"page_size must be one of {SUPPORTED_PAGE_SIZES}")
+        self.path = path
+        self.page_size = page_size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.num_pages = os.fstat(self.fd).st_size // page_size
+        self.bitmap_path = f"{os.fspath(path)}.fsm"
+        self.allocator = self._load_allocator()
+        self.meta_latch = threading.Lock()
+        self.tracer = tracer if tracer is not None else default_tracer
+
+    def _load_allocator(self):
+        return PageAllocator.load(self.bitmap_path, self.num_pages)
 
     def writePage(self, page):
-        """Write a page object to 'disk' (dictionary)."""
-        print(f"[DiskManager] Writing page {page.page_id} to disk.")
-        self.pages[page.page_id] = page
+        """Write the page payload to its slot in the file."""
+        data = page.data
+        if len(data) != self.page_size:
+            raise ValueError(
+                f"Page {page.page_id} has {len(data)} bytes, expected {self.page_size}")
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        os.pwrite(self.fd, data, page.page_id * self.page_size)
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "write", page.page_id, self.page_size,
+                             perf_counter_ns() - start)
+        with self.meta_latch:
+            if page.page_id >= self.num_pages:
+                self.num_pages = page.page_id + 1
+            self.allocator.markAllocated(page.page_id)
+
+    def writePages(self, pages):
+        """
+        Write pages with consecutive page_ids (pages[0].page_id first) with
+        a single vectored write.
+        """
+        for page in pages:
+            if len(page.data) != self.page_size:
+                raise ValueError(
+                    f"Page {page.page_id} has {len(page.data)} bytes, expected {self.page_size}")
+        first = pages[0].page_id
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        os.pwritev(self.fd, [page.data for page in pages], first * self.page_size)
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "write_vectored", first,
+                             len(pages) * self.page_size, perf_counter_ns() - start)
+        with self.meta_latch:
+            if first + len(pages) > self.num_pages:
+                self.num_pages = first + len(pages)
+            for page in pages:
+                self.allocator.markAllocated(page.page_id)
 
     def readPage(self, page_id: int):
-        """Read a page from disk if it exists and is not invalidated."""
-        print(f"[DiskManager] Reading page {page_id} from disk.")
-        if page_id in self.invalid:
-            print(f"[DiskManager] Page {page_id} is invalid.")
+        """Read a page from the file if it is allocated."""
+        if not self.hasPage(page_id):
             return None
-        return self.pages.get(page_id, None)
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        data = os.pread(self.fd, self.page_size, page_id * self.page_size)
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "read", page_id, self.page_size,
+                             perf_counter_ns() - start)
+        return Page(page_id, bytearray(data))
+
+    def readPageInto(self, page_id: int, buf) -> bool:
+        """Read a page straight into `buf`; return False if it does not exist."""
+        if not self.hasPage(page_id):
+            return False
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        os.preadv(self.fd, [buf], page_id * self.page_size)
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "read", page_id, self.page_size,
+                             perf_counter_ns() - start)
+        return True
+
+    def readPagesInto(self, page_id: int, bufs) -> bool:
+        """
+        Read the consecutive pages page_id, page_id + 1, ... into bufs with
+        a single vectored read. Returns False (reading nothing) if any of
+        them does not exist.
+        """
+        if not all(self.hasPage(page_id + i) for i in range(len(bufs))):
+            return False
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        os.preadv(self.fd, bufs, page_id * self.page_size)
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "read_vectored", page_id,
+                             len(bufs) * self.page_size, perf_counter_ns() - start)
+        return True
+
+    def allocatePage(self) -> int:
+        """Allocate a page slot, reusing a freed one if there is any."""
+        with self.meta_latch:
+            page_id = self.allocator.allocatePage()
+            if page_id >= self.num_pages:
+                self._extend(page_id + 1)
+        if self.tracer.active:
+            self.tracer.emit(DEBUG, "disk", "allocate", page_id)
+        return page_id
+
+    def _extend(self, num_pages):
+        # Caller holds meta_latch. Grow the file so the new slot reads as zeros.
+        os.ftruncate(self.fd, num_pages * self.page_size)
+        self.num_pages = num_pages
 
     def deletePage(self, page_id: int):
-        """Delete a page from disk by page_id."""
-        print(f"[DiskManager] Deleting page {page_id} from disk.")
-        if page_id in self.pages:
-            del self.pages[page_id]
-            self.invalid.append(page_id)
+        """Free a page; its slot stays in the file and is reused by allocatePage()."""
+        if self.tracer.active:
+            self.tracer.emit(DEBUG, "disk", "delete", page_id)
+        with self.meta_latch:
+            self.allocator.deallocatePage(page_id)
+
+    deallocatePage = deletePage
 
     def hasPage(self, page_id: int) -> bool:
-        """Check if a page exists on disk (and is not invalid)."""
-        return page_id in self.pages and page_id not in self.invalid
+        """Check if a page slot is allocated."""
+        return self.allocator.isAllocated(page_id)
+
+    def sync(self):
+        """Force written pages to stable storage."""
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        os.fsync(self.fd)
+        self._save_bitmap()
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "sync", None, 0, perf_counter_ns() - start)
+
+    def _save_bitmap(self):
+        if self.allocator.dirty:
+            with self.meta_latch:
+                self.allocator.save(self.bitmap_path)
+
+    def close(self):
+        if self.fd is not None:
+            self._save_bitmap()
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MmapDiskManager(FileDiskManager):
+    """
+    A FileDiskManager that maps the database file into memory.
+
+    readPage hands out a memoryview slice of the mapping instead of a copied
+    buffer, so a page fault costs no extra copy and the OS page cache does
+    read-ahead. Dirty pages reach the file when their range of the mapping
+    is flushed with mmap.flush (sync()).
+
+    The file grows automatically (doubling its mapped capacity) when a page
+    past its end is written, and is trimmed back to num_pages on close().
+    Views handed out before a growth stay valid: the old mapping is kept
+    alive and shares the same file pages as the new one. Since the file
+    size may include that padding after a crash, num_pages is taken from
+    the bitmap saved by sync() when the file is opened.
+
+    BufferManager recognises `zero_copy` and points its frames at
+    pageView() slices instead of copying pages into its own memory.
+
+    Attributes:
+      - capacity : number of page slots currently mapped
+    """
+
+    zero_copy = True
+
+    def __init__(self, path, page_size: int = PAGE_SIZE, tracer=None):
+        super().__init__(path, page_size, tracer)
+        self.capacity = 0
+        self.map = None
+        self._retired_maps = []
+        self._ensure_capacity(self.num_pages)
+
+    def _load_allocator(self):
+        # The file may still be padded to the mapped capacity; the saved
+        # bitmap ends at the last page allocated before the last sync().
+        if os.path.exists(self.bitmap_path):
+            allocator = PageAllocator.load(self.bitmap_path, 0)
+            self.num_pages = allocator.end
+            return allocator
+        allocator = PageAllocator(self.num_pages)
+        if self.num_pages == 0:
+            allocator.save(self.bitmap_path)   # a new file: never trust its size
+        return allocator
+
+    def _ensure_capacity(self, n_pages):
+        if n_pages <= self.capacity:
+            return
+        new_capacity = max(n_pages, 2 * self.capacity)
+        os.ftruncate(self.fd, new_capacity * self.page_size)
+        if self.map is not None:
+            self._retired_maps.append(self.map)
+        self.map = mmap.mmap(self.fd, new_capacity * self.page_size)
+        self.capacity = new_capacity
+
+    def writePage(self, page):
+        """Copy the page payload into its slot of the mapping."""
+        data = page.data
+        if len(data) != self.page_size:
+            raise ValueError(
+                f"Page {page.page_id} has {len(data)} bytes, expected {self.page_size}")
+        with self.meta_latch:
+            self._ensure_capacity(page.page_id + 1)
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        offset = page.page_id * self.page_size
+        if getattr(data, "obj", None) is not self.map:
+            self.map[offset:offset + self.page_size] = data
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "write", page.page_id, self.page_size,
+                             perf_counter_ns() - start)
+        with self.meta_latch:
+            if page.page_id >= self.num_pages:
+                self.num_pages = page.page_id + 1
+            self.allocator.markAllocated(page.page_id)
+
+    def writePages(self, pages):
+        for page in pages:
+            self.writePage(page)
+
+    def _extend(self, num_pages):
+        self._ensure_capacity(num_pages)
+        self.num_pages = num_pages
+
+    def readPage(self, page_id: int):
+        """Return the page with a zero-copy view of its slot as payload."""
+        if not self.hasPage(page_id):
+            return None
+        return Page(page_id, self.pageView(page_id))
+
+    def pageView(self, page_id: int):
+        """Return a memoryview of the page's slot, or None if it does not exist."""
+        if not self.hasPage(page_id):
+            return None
+        if self.tracer.active:
+            self.tracer.emit(DEBUG, "disk", "map", page_id, 0)
+        offset = page_id * self.page_size
+        return memoryview(self.map)[offset:offset + self.page_size]
+
+    def readPageInto(self, page_id: int, buf) -> bool:
+        return self.readPagesInto(page_id, [buf])
+
+    def readPagesInto(self, page_id: int, bufs) -> bool:
+        if not all(self.hasPage(page_id + i) for i in range(len(bufs))):
+            return False
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        offset = page_id * self.page_size
+        for buf in bufs:
+            buf[:] = self.map[offset:offset + self.page_size]
+            offset += self.page_size
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "read", page_id, len(bufs) * self.page_size,
+                             perf_counter_ns() - start)
+        return True
+
+    def sync(self, page_id=None, count: int = 1):
+        """
+        Flush the mapping to the file: `count` pages starting at `page_id`,
+        or the whole mapping when no page_id is given. The range is widened
+        to the allocation granularity that mmap.flush requires.
+        """
+        if self.map is None:
+            return
+        traced = self.tracer.active
+        if traced:
+            started = perf_counter_ns()
+        if page_id is None:
+            self.map.flush()
+            self._save_bitmap()
+        else:
+            start = page_id * self.page_size
+            end = start + count * self.page_size
+            aligned = start - start % mmap.ALLOCATIONGRANULARITY
+            self.map.flush(aligned, end - aligned)
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "sync", page_id, 0, perf_counter_ns() - started)
+
+    def close(self):
+        if self.fd is None:
+            return
+        for m in self._retired_maps + [self.map]:
+            if m is None:
+                continue
+            m.flush()
+            try:
+                m.close()
+            except BufferError:
+                pass                  # a Page still holds a view into it
+        self._retired_maps = []
+        self.map = None
+        os.ftruncate(self.fd, self.num_pages * self.page_size)
+        super().close()
+
+
+# page_id, offset, capacity and stored length of one extent
+_EXTENT = struct.Struct("<qQII")
+EXTENT_ALIGN = 512
+
+
+class CompressedDiskManager:
+    """
+    A file-backed DiskManager that stores every page zlib-compressed.
+
+    A compressed page takes a variable-length extent of the data file,
+    rounded up to EXTENT_ALIGN bytes. The indirection map `extents`
+    (page_id -> offset, capacity, stored length) says where each page
+    lives. Pages that do not shrink are stored as they are (stored length
+    == page_size). The BufferManager still sees whole uncompressed pages.
+
+    Writes are copy-on-write: a page always goes to a free extent and its
+    old extent is only reused after sync() has made the data durable and
+    saved the map to `<path>.map`. The saved map therefore always points
+    at intact extents. Free extents are the gaps between mapped extents,
+    recomputed when the file is opened. Once `recycle_extents` extents or
+    `recycle_bytes` bytes are waiting to be freed, the write or delete
+    that crossed the limit syncs, so the file stays bounded under a steady
+    stream of rewrites even if nobody calls sync().
+
+    compressionStats() reports the compression ratio and the CPU time
+    spent compressing and decompressing.
+
+    Attributes:
+      - path      : path of the data file
+      - level     : zlib compression level (0-9)
+      - extents   : page_id -> (offset, capacity, stored length)
+      - file_size : end of the last extent in the data file
+      - recycle_extents, recycle_bytes : pending frees that trigger a sync
+
+    Usage:
+        disk = CompressedDiskManager("db", level=6)
+        bpm = BufferManager(256, disk_manager=disk)
+    """
+
+    def __init__(self, path, page_size: int = PAGE_SIZE, level: int = 6, tracer=None,
+                 recycle_extents: int = 64, recycle_bytes: int = 1 << 20):
+        if page_size not in SUPPORTED_PAGE_SIZES:
+            raise ValueError(f"page_size must be one of {SUPPORTED_PAGE_SIZES}")
+        if not 0 <= level <= 9:
+            raise ValueError("zlib level must be between 0 and 9")
+        if recycle_extents < 1 or recycle_bytes < 1:
+            raise ValueError("recycle_extents and recycle_bytes must be positive")
+        self.path = path
+        self.page_size = page_size
+        self.level = level
+        self.map_path = f"{os.fspath(path)}.map"
+        self.tracer = tracer if tracer is not None else default_tracer
+        self.recycle_extents = recycle_extents
+        self.recycle_bytes = recycle_bytes
+        self.meta_latch = threading.Lock()
+        self.sync_latch = threading.Lock()   # one map save at a time, in order
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.extents = self._load_map()
+        self.allocator = PageAllocator()
+        for page_id in self.extents:
+            self.allocator.markAllocated(page_id)
+        self.free_extents = []         # sorted (offset, size), reusable
+        self.pending_free = []         # freed since the map was last saved
+        self.pending_bytes = 0
+        self.file_size = 0
+        for offset, capacity, _ in sorted(self.extents.values()):
+            if offset > self.file_size:
+                self.free_extents.append((self.file_size, offset - self.file_size))
+            self.file_size = max(self.file_size, offset + capacity)
+        self.map_dirty = False
+        self.stored_bytes = sum(length for _, _, length in self.extents.values())
+        self.compressions = 0
+        self.decompressions = 0
+        self.compress_ns = 0
+        self.decompress_ns = 0
+
+    def _load_map(self):
+        try:
+            with open(self.map_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}
+        return {page_id: (offset, capacity, length)
+                for page_id, offset, capacity, length in _EXTENT.iter_unpack(data)}
+
+    def _save_map(self, data):
+        tmp = f"{self.map_path}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, self.map_path)
+
+    # -----------------------------
+    # Extents
+    # -----------------------------
+    def _allocate_extent(self, size):
+        # Caller holds meta_latch. First fit, else at the end of the file.
+        for i, (offset, free) in enumerate(self.free_extents):
+            if free >= size:
+                if free == size:
+                    del self.free_extents[i]
+                else:
+                    self.free_extents[i] = (offset + size, free - size)
+                return offset
+        offset = self.file_size
+        self.file_size += size
+        return offset
+
+    def _free(self, offset, size):
+        # Caller holds meta_latch. Insert and merge with adjacent free extents.
+        free = self.free_extents
+        i = bisect.bisect_left(free, (offset, size))
+        if i < len(free) and offset + size == free[i][0]:
+            size += free.pop(i)[1]
+        if i > 0 and free[i - 1][0] + free[i - 1][1] == offset:
+            offset, size = free[i - 1][0], free[i - 1][1] + size
+            i -= 1
+            del free[i]
+        free.insert(i, (offset, size))
+
+    # -----------------------------
+    # Pages
+    # -----------------------------
+    def writePage(self, page):
+        """Compress the page payload and write it to a new extent."""
+        data = page.data
+        if len(data) != self.page_size:
+            raise ValueError(
+                f"Page {page.page_id} has {len(data)} bytes, expected {self.page_size}")
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        cpu = thread_time_ns()
+        stored = zlib.compress(data, self.level)
+        cpu = thread_time_ns() - cpu
+        if len(stored) >= self.page_size:
+            stored = bytes(data)
+        capacity = -(-len(stored) // EXTENT_ALIGN) * EXTENT_ALIGN
+        with self.meta_latch:
+            offset = self._allocate_extent(capacity)
+        os.pwrite(self.fd, stored, offset)
+        with self.meta_latch:
+            old = self.extents.get(page.page_id)
+            if old is not None:
+                self._defer_free(old)
+                self.stored_bytes -= old[2]
+            self.extents[page.page_id] = (offset, capacity, len(stored))
+            self.stored_bytes += len(stored)
+            self.map_dirty = True
+            self.allocator.markAllocated(page.page_id)
+            self.compressions += 1
+            self.compress_ns += cpu
+            recycle = self._must_recycle()
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "write", page.page_id, len(stored),
+                             perf_counter_ns() - start)
+        if recycle:
+            self.sync()
+
+    def writePages(self, pages):
+        """Write pages with consecutive page_ids."""
+        for page in pages:
+            self.writePage(page)
+
+    def readPage(self, page_id: int):
+        """Read and decompress a page if it is allocated."""
+        page = Page(page_id, bytearray(self.page_size))
+        return page if self.readPageInto(page_id, page.data) else None
+
+    def readPageInto(self, page_id: int, buf) -> bool:
+        """Decompress a page into `buf`; return False if it does not exist."""
+        with self.meta_latch:
+            extent = self.extents.get(page_id)
+        if extent is None:
+            return False
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        offset, _, length = extent
+        stored = os.pread(self.fd, length, offset)
+        if length == self.page_size:
+            buf[:] = stored
+        else:
+            cpu = thread_time_ns()
+            buf[:] = zlib.decompress(stored, bufsize=self.page_size)
+            cpu = thread_time_ns() - cpu
+            with self.meta_latch:
+                self.decompressions += 1
+                self.decompress_ns += cpu
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "read", page_id, length,
+                             perf_counter_ns() - start)
+        return True
+
+    def readPagesInto(self, page_id: int, bufs) -> bool:
+        """
+        Read the consecutive pages page_id, page_id + 1, ... into bufs.
+        Returns False (reading nothing) if any of them does not exist.
+        """
+        if not all(self.hasPage(page_id + i) for i in range(len(bufs))):
+            return False
+        return all([self.readPageInto(page_id + i, buf) for i, buf in enumerate(bufs)])
+
+    def allocatePage(self) -> int:
+        """Allocate a page id, reusing a freed one if there is any, and store it zeroed."""
+        with self.meta_latch:
+            page_id = self.allocator.allocatePage()
+        self.writePage(Page(page_id, bytearray(self.page_size)))
+        if self.tracer.active:
+            self.tracer.emit(DEBUG, "disk", "allocate", page_id)
+        return page_id
+
+    def deletePage(self, page_id: int):
+        """Free a page; its extent is reused once the map is saved."""
+        if self.tracer.active:
+            self.tracer.emit(DEBUG, "disk", "delete", page_id)
+        with self.meta_latch:
+            extent = self.extents.pop(page_id, None)
+            if extent is not None:
+                self._defer_free(extent)
+                self.stored_bytes -= extent[2]
+                self.map_dirty = True
+            self.allocator.deallocatePage(page_id)
+            recycle = self._must_recycle()
+        if recycle:
+            self.sync()
+
+    deallocatePage = deletePage
+
+    def _defer_free(self, extent):
+        # Caller holds meta_latch. The extent is freed by the next map save.
+        self.pending_free.append(extent[:2])
+        self.pending_bytes += extent[1]
+
+    def _must_recycle(self):
+        return (len(self.pending_free) >= self.recycle_extents
+                or self.pending_bytes >= self.recycle_bytes)
+
+    def hasPage(self, page_id: int) -> bool:
+        return self.allocator.isAllocated(page_id)
+
+    def sync(self):
+        """
+        Force written pages to stable storage, then save the map. The map
+        is snapshotted before the fsync, so every extent it points at is
+        durable; extents freed before the snapshot become reusable.
+        """
+        traced = self.tracer.active
+        if traced:
+            start = perf_counter_ns()
+        with self.sync_latch:
+            data = None
+            with self.meta_latch:
+                if self.map_dirty:
+                    data = b"".join(_EXTENT.pack(page_id, *extent)
+                                    for page_id, extent in sorted(self.extents.items()))
+                    pending, self.pending_free = self.pending_free, []
+                    self.pending_bytes = 0
+                    self.map_dirty = False
+            os.fsync(self.fd)
+            if data is not None:
+                try:
+                    self._save_map(data)
+                except BaseException:
+                    with self.meta_latch:
+                        self.pending_free.extend(pending)
+                        self.pending_bytes += sum(size for _, size in pending)
+                        self.map_dirty = True
+                    raise
+                with self.meta_latch:
+                    for offset, size in pending:
+                        self._free(offset, size)
+        if traced:
+            self.tracer.emit(DEBUG, "disk", "sync", None, 0, perf_counter_ns() - start)
+
+    def compressionStats(self):
+        """
+        Return the pages stored, their logical and stored bytes, the
+        compression ratio (logical / stored) and the thread CPU time spent
+        in zlib.
+        """
+        with self.meta_latch:
+            pages = len(self.extents)
+            logical = pages * self.page_size
+            return {"pages": pages, "logical_bytes": logical,
+                    "stored_bytes": self.stored_bytes,
+                    "ratio": logical / self.stored_bytes if self.stored_bytes else 0.0,
+                    "file_bytes": self.file_size,
+                    "compressions": self.compressions, "compress_cpu_ns": self.compress_ns,
+                    "decompressions": self.decompressions,
+                    "decompress_cpu_ns": self.decompress_ns}
+
+    def close(self):
+        if self.fd is not None:
+            self.sync()
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
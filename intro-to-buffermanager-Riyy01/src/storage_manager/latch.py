@@ -0,0 +1,76 @@
+# ============================================
+# LATCHES
+# ============================================
+
+import threading
+from contextlib import contextmanager
+
+
+class ReaderWriterLatch:
+    """
+    A shared/exclusive latch protecting the contents of one frame.
+
+    Any number of readers may hold the latch in shared mode, a writer holds
+    it alone. Waiting writers block new readers so a stream of readers
+    cannot starve them.
+
+    Methods:
+      - acquireShared() / releaseShared()
+      - tryAcquireShared(): acquireShared() without waiting; False if busy
+      - acquireExclusive() / releaseExclusive()
+      - shared() / exclusive(): the same as context managers
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquireShared(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def tryAcquireShared(self) -> bool:
+        with self._cond:
+            if self._writer or self._waiting_writers:
+                return False
+            self._readers += 1
+            return True
+
+    def releaseShared(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquireExclusive(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def releaseExclusive(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def shared(self):
+        self.acquireShared()
+        try:
+            yield
+        finally:
+            self.releaseShared()
+
+    @contextmanager
+    def exclusive(self):
+        self.acquireExclusive()
+        try:
+            yield
+        finally:
+            self.releaseExclusive()
@@ -0,0 +1,114 @@
+# ============================================
+# BUFFER POOL METRICS
+# ============================================
+
+
+class LatencyHistogram:
+    """
+    A histogram of latencies in nanoseconds with power-of-two buckets.
+
+    Bucket i counts samples with ns.bit_length() == i, i.e. latencies in
+    [2^(i-1), 2^i). Recording is one bit_length() and three additions.
+    """
+
+    BUCKETS = 64
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.buckets = [0] * self.BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int):
+        self.buckets[min(ns.bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q: float) -> int:
+        """Upper bound (in ns) of the bucket holding the q-th percentile."""
+        if not self.count:
+            return 0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(1 << i, self.max_ns)
+        return self.max_ns
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_ns": self.total_ns / self.count if self.count else 0,
+            "p50_ns": self.percentile(50),
+            "p99_ns": self.percentile(99),
+            "max_ns": self.max_ns,
+            "buckets": {1 << i: n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class BufferMetrics:
+    """
+    Counters and latency histograms of one BufferManager.
+
+    The BufferManager keeps `metrics = None` while metrics are disabled, so
+    the hot path pays a single `is not None` check. Updates made outside
+    the BufferManager latch (latencies) are not synchronised and may
+    rarely lose a sample under heavy concurrency.
+
+    Counters:
+      - hits, misses         : fetches served from the pool / from disk
+      - evictions            : victims chosen by the replacer
+      - ring_evictions       : pages evicted by a RingBuffer reusing its frames
+      - resize_evictions     : pages evicted by resize() to retire frames
+      - dirty_writebacks     : dirty victims written back before reuse (all of the above)
+      - pin_failures         : fetches refused because every frame is pinned
+                               (fetchPage, fetchPages, newPage; a read-ahead
+                               that finds no frame is skipped, not counted)
+      - peak_pinned_frames   : highest number of frames pinned at once
+    Histograms:
+      - fetch_hit, fetch_miss, flush
+    """
+
+    def __init__(self):
+        self.fetch_hit = LatencyHistogram()
+        self.fetch_miss = LatencyHistogram()
+        self.flush = LatencyHistogram()
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.ring_evictions = 0
+        self.resize_evictions = 0
+        self.dirty_writebacks = 0
+        self.pin_failures = 0
+        self.peak_pinned_frames = 0
+        self.fetch_hit.reset()
+        self.fetch_miss.reset()
+        self.flush.reset()
+
+    def snapshot(self):
+        fetches = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / fetches if fetches else 0.0,
+            "evictions": self.evictions,
+            "ring_evictions": self.ring_evictions,
+            "resize_evictions": self.resize_evictions,
+            "dirty_writebacks": self.dirty_writebacks,
+            "pin_failures": self.pin_failures,
+            "peak_pinned_frames": self.peak_pinned_frames,
+            "latency": {
+                "fetch_hit": self.fetch_hit.snapshot(),
+                "fetch_miss": self.fetch_miss.snapshot(),
+                "flush": self.flush.snapshot(),
+            },
+        }
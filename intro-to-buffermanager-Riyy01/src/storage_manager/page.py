@@ -2,6 +2,8 @@
 # PAGE AND LRU REPLACER
 # ============================================
 
+PAGE_SIZE = 4096   # default page size in bytes
+
 class Page:
     """
     A class to represent an in-memory page.
@@ -9,24 +11,34 @@ class Page:
     Responsibilities:
       - Track pin count (how many threads/pages are using it)
       - Track if the page is dirty (modified)
+      - Hold the page contents as a fixed-size byte payload
 
     Attributes:
       - page_id : int
       - pin_count : int
       - dirty : bool
+      - data : bytearray of page size bytes
+      - latch : ReaderWriterLatch guarding data (set for buffer frames)
+      - lsn : LSN of the last WAL record for this page (0: none)
 
     Methods:
       - incrementPinCount(): increase pin_count by 1
       - decrementPinCount(): decrease pin_count by 1
       - isDirty(): returns True if page is dirty
       - getPinCount(): returns current pin_count
+      - rLatch() / rUnlatch(): hold the page contents in shared mode
+      - tryRLatch(): rLatch() without waiting; returns False if it is busy
+      - wLatch() / wUnlatch(): hold the page contents in exclusive mode
     """
 
-    def __init__(self, id):
+    def __init__(self, id, data=None, page_size=PAGE_SIZE):
         ## TODO: initialize page_id, pin_count, and dirty flag
         self.page_id = id
         self.pin_count = 0
         self.dirty = False
+        self.data = bytearray(page_size) if data is None else data
+        self.latch = None
+        self.lsn = 0
         
 
     def incrementPinCount(self):
@@ -49,5 +61,25 @@ class Page:
         return self.pin_count
         
 
+    def rLatch(self):
+        self.latch.acquireShared()
+
+
+    def tryRLatch(self):
+        return self.latch.tryAcquireShared()
+
+
+    def rUnlatch(self):
+        self.latch.releaseShared()
+
+
+    def wLatch(self):
+        self.latch.acquireExclusive()
+
+
+    def wUnlatch(self):
+        self.latch.releaseExclusive()
+
+
     def __repr__(self):
         return f"Page(id={self.page_id}, pin={self.pin_count}, dirty={self.dirty})"
@@ -0,0 +1,171 @@
+# ============================================
+# PAGE ALLOCATOR
+# ============================================
+
+import heapq
+import os
+import struct
+import threading
+
+_HEADER = struct.Struct("<Q")      # number of page ids covered by the bitmap
+
+
+class PageAllocator:
+    """
+    Tracks which page ids are in use with a free-space bitmap.
+
+    Bit `page_id` is set while the page is allocated, so checking whether a
+    page exists is a single bit test. allocatePage() hands out the lowest
+    free id, reusing deallocated slots before it grows past `end`. Free ids
+    are kept as ranges, so allocating an id far past `end` records the gap
+    below it as one entry.
+
+    Attributes:
+      - bitmap    : one bit per page id below `end`
+      - end       : high-water mark; ids >= end have never been allocated
+      - allocated : number of allocated page ids
+      - dirty     : bitmap changed since it was last saved
+
+    Methods:
+      - allocatePage()        -> lowest free page id, now allocated
+      - markAllocated(id)     -> allocate a specific id (a page written directly)
+      - deallocatePage(id)    -> free an id; False if it was not allocated
+      - isAllocated(id)       -> bool
+      - save(path) / load(path, num_pages): persist the bitmap next to a
+        database file
+    """
+
+    def __init__(self, end: int = 0):
+        # ids [0, end) start out allocated (e.g. the pages of an existing file)
+        self.bitmap = bytearray(b"\xff" * (end // 8))
+        if end % 8:
+            self.bitmap.append((1 << (end % 8)) - 1)
+        self.end = end
+        self.allocated = end
+        self.dirty = False
+        self._free = []                # min-heap of [start, stop) ranges that may be free
+        self._lock = threading.Lock()
+
+    def isAllocated(self, page_id) -> bool:
+        if page_id is None or not 0 <= page_id < self.end:
+            return False
+        return bool(self.bitmap[page_id >> 3] & (1 << (page_id & 7)))
+
+    def allocatePage(self) -> int:
+        with self._lock:
+            while self._free:
+                start, stop = heapq.heappop(self._free)
+                page_id = self._first_free(start, stop)   # ranges may be stale
+                if page_id is not None:
+                    if page_id + 1 < stop:
+                        heapq.heappush(self._free, (page_id + 1, stop))
+                    self._set(page_id)
+                    return page_id
+            page_id = self.end
+            self._set(page_id)
+            return page_id
+
+    def markAllocated(self, page_id: int) -> bool:
+        """Allocate page_id; return False if it was already allocated."""
+        if page_id < 0:
+            raise ValueError(f"Invalid page id {page_id}")
+        if self.isAllocated(page_id):
+            return False
+        with self._lock:
+            if self.isAllocated(page_id):
+                return False
+            if page_id > self.end:
+                heapq.heappush(self._free, (self.end, page_id))
+            self._set(page_id)
+            return True
+
+    def deallocatePage(self, page_id: int) -> bool:
+        with self._lock:
+            if not self.isAllocated(page_id):
+                return False
+            self.bitmap[page_id >> 3] &= ~(1 << (page_id & 7)) & 0xFF
+            self.allocated -= 1
+            self.dirty = True
+            heapq.heappush(self._free, (page_id, page_id + 1))
+            return True
+
+    def _first_free(self, start, stop):
+        # Caller holds self._lock. Lowest free id in [start, stop), or None.
+        bitmap = self.bitmap
+        page_id = start
+        while page_id < stop:
+            if page_id & 7 == 0 and bitmap[page_id >> 3] == 0xFF:
+                page_id += 8                            # a fully allocated byte
+            elif not bitmap[page_id >> 3] & (1 << (page_id & 7)):
+                return page_id
+            else:
+                page_id += 1
+        return None
+
+    def _set(self, page_id):
+        # Caller holds self._lock.
+        if page_id >= self.end:
+            needed = (page_id >> 3) + 1
+            if needed > len(self.bitmap):
+                self.bitmap.extend(bytes(max(needed, 2 * len(self.bitmap)) - len(self.bitmap)))
+            self.end = page_id + 1
+        self.bitmap[page_id >> 3] |= 1 << (page_id & 7)
+        self.allocated += 1
+        self.dirty = True
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def toBytes(self) -> bytes:
+        with self._lock:
+            return _HEADER.pack(self.end) + bytes(self.bitmap[:(self.end + 7) // 8])
+
+    @classmethod
+    def fromBytes(cls, data: bytes):
+        (end,) = _HEADER.unpack_from(data)
+        bitmap = data[_HEADER.size:]
+        if len(bitmap) != (end + 7) // 8:
+            raise ValueError("Corrupt free-space bitmap")
+        allocator = cls()
+        allocator.bitmap = bytearray(bitmap)
+        allocator.end = end
+        allocator.allocated = sum(bin(byte).count("1") for byte in bitmap)
+        free = allocator._free          # runs of free ids, sorted: already a heap
+        for page_id in range(end):
+            if allocator.isAllocated(page_id):
+                continue
+            if free and free[-1][1] == page_id:
+                free[-1] = (free[-1][0], page_id + 1)
+            else:
+                free.append((page_id, page_id + 1))
+        return allocator
+
+    def save(self, path):
+        """Atomically replace the bitmap file at `path`."""
+        data = self.toBytes()
+        self.dirty = False
+        tmp = f"{os.fspath(path)}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, num_pages: int):
+        """
+        Load the bitmap saved at `path` for a file of num_pages slots. Without
+        a bitmap file every existing slot counts as allocated; slots past the
+        saved bitmap (written after the last save) are marked allocated too.
+        """
+        try:
+            with open(path, "rb") as f:
+                allocator = cls.fromBytes(f.read())
+        except FileNotFoundError:
+            return cls(num_pages)
+        for page_id in range(allocator.end, num_pages):
+            allocator.markAllocated(page_id)
+        allocator.dirty = False
+        return allocator
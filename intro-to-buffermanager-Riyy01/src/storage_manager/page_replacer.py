@@ -1,3 +1,7 @@
+import heapq
+from collections import OrderedDict, deque
+
+
 class PageReplacer:
     """
     A class to represent the page replacer
@@ -10,12 +14,18 @@ class PageReplacer:
     victim():
         return which frame should be evicted from the BufferPool. 
     pin(page_id):
-        pin a page in the BufferPool
+        pin a page in the BufferPool. The BufferManager calls this on every
+        access, hits and freshly loaded pages alike.
     unpin():
         unpin a page in the buffer pool
+    remove(page_id):
+        forget a page that left the BufferPool without being a victim
+        (e.g. it was deleted).
     replacerSize():
         returns the number of frames that are currently in the Replacer.
 
+    Every replacer accepts capacity= (the number of frames of its pool),
+    so pools can build any of them from a factory; only ARC needs it.
     """
     def __init__(self):
         pass
@@ -29,11 +39,14 @@ class PageReplacer:
     def unpin(self, page_id):
         pass
 
+    def remove(self, page_id):
+        self.pin(page_id)
+
     def replacerSize(self):
         pass
 
     
-class LRUReplacer:
+class LRUReplacer(PageReplacer):
     """
     LRU Replacer keeps track of unpinned pages and selects the least recently used page to evict.
 
@@ -44,22 +57,27 @@ class LRUReplacer:
       - Victim() → select LRU page for eviction
 
     Attributes:
-      - free_frames : list of page_ids eligible for eviction
+      - free_frames : ordered map of page_ids eligible for eviction,
+                      least recently unpinned first
+
+    The ordered map (a hash table threaded by a doubly-linked list) makes
+    pin, unpin and victim O(1) regardless of the number of frames.
     """
 
-    def __init__(self):
-        ## TODO: initialize free_frames list
-        self.free_frames = []
+    def __init__(self, capacity: int = None):
+        self.free_frames = OrderedDict()
         
 
     def replacerSize(self):
-        ## TODO: return number of pages currently in free_frames
         return len(self.free_frames)
         
 
     def getFreeFrames(self):
-        ## TODO: return the free_frames list
-        return self.free_frames
+        """
+        Return the free page_ids as a list, most recently unpinned first
+        (the last element is the next victim).
+        """
+        return list(reversed(self.free_frames))
         
 
     def pin(self, page_id):
@@ -67,31 +85,339 @@ class LRUReplacer:
         Pin a page:
           - Remove page_id from free_frames (it cannot be evicted while pinned)
         """
-        ## TODO: implement pin logic
-        if page_id in self.free_frames:
-            self.free_frames.remove(page_id)
+        self.free_frames.pop(page_id, None)
     
 
     def unpin(self, page_id):
         """
         Unpin a page:
           - Add page_id to free_frames if not already present
-          - Usually add to the front (most recently unpinned)
+          - A page that is already free keeps its position
         """
-        ## TODO: implement unpin logic
         if page_id not in self.free_frames:
-            self.free_frames.insert(0, page_id)
+            self.free_frames[page_id] = None
         
 
     def victim(self):
         """
         Select a victim page for eviction:
-          - Return the least recently used page_id from free_frames
-          - Remove it from free_frames
-          - If free_frames is empty → return False / None
+          - Return the least recently unpinned page_id and remove it
+          - If free_frames is empty → return None
         """
-        ## TODO: implement victim selection
         if not self.free_frames:
             return None
-        return self.free_frames.pop()
-        
\ No newline at end of file
+        page_id, _ = self.free_frames.popitem(last=False)
+        return page_id
+
+
+class ClockReplacer(PageReplacer):
+    """
+    CLOCK (second-chance) replacer.
+
+    Every frame known to the replacer carries a reference bit that is set on
+    access. The clock hand sweeps the ring: a frame with its bit set gets a
+    second chance (the bit is cleared and the hand moves on), an unpinned
+    frame with a clear bit is the victim. A hit only sets a bit, nothing is
+    reordered.
+
+    Attributes:
+      - ring      : ordered map page_id -> reference bit, the hand sits at
+                    the front and advancing it moves the front to the back
+      - pinned    : set of page_ids that cannot be evicted
+    """
+
+    def __init__(self, capacity: int = None):
+        self.ring = OrderedDict()
+        self.pinned = set()
+
+
+    def replacerSize(self):
+        return len(self.ring) - len(self.pinned)
+
+
+    def getFreeFrames(self):
+        """Return the evictable page_ids in hand order."""
+        return [page_id for page_id in self.ring if page_id not in self.pinned]
+
+
+    def pin(self, page_id):
+        """
+        Pin a page:
+          - Add it to the ring behind the hand if it is new
+          - Set its reference bit and mark it pinned
+        """
+        self.ring[page_id] = True
+        self.pinned.add(page_id)
+
+
+    def unpin(self, page_id):
+        """
+        Unpin a page:
+          - Make it evictable; a page that was never pinned enters the ring
+            with a clear reference bit
+        """
+        if page_id not in self.ring:
+            self.ring[page_id] = False
+        self.pinned.discard(page_id)
+
+
+    def remove(self, page_id):
+        self.ring.pop(page_id, None)
+        self.pinned.discard(page_id)
+
+
+    def victim(self):
+        """
+        Advance the hand until an unpinned frame with a clear reference bit
+        is found, clearing bits on the way.
+          - If every frame is pinned → return None
+        """
+        if self.replacerSize() == 0:
+            return None
+        ring = self.ring
+        while True:
+            page_id, referenced = next(iter(ring.items()))
+            if referenced or page_id in self.pinned:
+                ring[page_id] = False
+                ring.move_to_end(page_id)
+                continue
+            del ring[page_id]
+            return page_id
+
+
+class LRUKReplacer(PageReplacer):
+    """
+    LRU-K replacer.
+
+    Remembers the timestamps of the last K accesses of every page and evicts
+    the page whose K-th most recent access lies furthest in the past (the
+    largest backward K-distance). Pages with fewer than K recorded accesses
+    have an infinite K-distance and are evicted first, oldest first access
+    first. A sequential scan touches each page once, so scanned pages evict
+    each other instead of the hot set.
+
+    Attributes:
+      - k          : number of accesses tracked per page
+      - history    : page_id -> deque of the last k access timestamps
+      - evictable  : set of unpinned page_ids
+    """
+
+    def __init__(self, k: int = 2, capacity: int = None):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.current_timestamp = 0
+        self.history = {}
+        self.evictable = set()
+        # (has_k_accesses, k-th most recent timestamp, page_id) of every
+        # evictable page; stale entries are skipped lazily in victim()
+        self._heap = []
+
+
+    def replacerSize(self):
+        return len(self.evictable)
+
+
+    def _record_access(self, page_id):
+        self.current_timestamp += 1
+        history = self.history.get(page_id)
+        if history is None:
+            history = self.history[page_id] = deque(maxlen=self.k)
+        history.append(self.current_timestamp)
+
+
+    def _key(self, page_id):
+        history = self.history[page_id]
+        return (len(history) == self.k, history[0], page_id)
+
+
+    def pin(self, page_id):
+        """
+        Pin a page:
+          - Record an access and make the page non-evictable
+        """
+        self._record_access(page_id)
+        self.evictable.discard(page_id)
+
+
+    def unpin(self, page_id):
+        """
+        Unpin a page:
+          - Make the page evictable; a page without history counts as
+            accessed now
+        """
+        if page_id in self.evictable:
+            return
+        if page_id not in self.history:
+            self._record_access(page_id)
+        self.evictable.add(page_id)
+        heapq.heappush(self._heap, self._key(page_id))
+        if len(self._heap) > 2 * len(self.evictable) + 64:
+            # too many stale entries from pin/unpin cycles: rebuild
+            self._heap = [self._key(p) for p in self.evictable]
+            heapq.heapify(self._heap)
+
+
+    def remove(self, page_id):
+        self.evictable.discard(page_id)
+        self.history.pop(page_id, None)
+
+
+    def victim(self):
+        """
+        Select the evictable page with the largest backward K-distance,
+        pages with fewer than K accesses first.
+          - If no page is evictable → return None
+        """
+        heap = self._heap
+        while heap:
+            entry = heapq.heappop(heap)
+            page_id = entry[2]
+            if page_id in self.evictable and self._key(page_id) == entry:
+                self.evictable.discard(page_id)
+                del self.history[page_id]
+                return page_id
+        return None
+
+
+class ARCReplacer(PageReplacer):
+    """
+    Adaptive Replacement Cache (ARC) replacer.
+
+    Resident pages live in two LRU lists: T1 holds pages seen once
+    recently, T2 pages seen at least twice. The ghost lists B1 and B2 keep
+    the ids (not the contents) of pages recently evicted from T1 and T2.
+    A miss that hits a ghost list moves the target size `p` of T1: a B1 hit
+    means T1 was too small (recency matters), a B2 hit means T2 was too
+    small (frequency matters).
+
+    victim() takes the least recently used unpinned page of T1 while T1 is
+    above its target p, otherwise of T2, falling back to the other list when
+    every page of the preferred one is pinned. Pinned pages are never
+    returned. Because the BufferManager asks for a victim before it loads
+    the missing page, p adapts on that load and steers the next eviction.
+
+    Attributes:
+      - capacity        : number of frames in the buffer pool (c)
+      - p               : adaptive target size of T1, 0 <= p <= capacity
+      - t1, t2, b1, b2  : ordered maps page_id -> None, LRU first
+      - pinned          : set of resident page_ids that cannot be evicted
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.p = 0
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.pinned = set()
+
+
+    def replacerSize(self):
+        return len(self.t1) + len(self.t2) - len(self.pinned)
+
+
+    def getTargetSize(self):
+        """Return the adaptive target size p of T1."""
+        return self.p
+
+
+    def getListSizes(self):
+        return {"T1": len(self.t1), "T2": len(self.t2),
+                "B1": len(self.b1), "B2": len(self.b2), "p": self.p}
+
+
+    def setCapacity(self, capacity: int):
+        """Follow a resized buffer pool (BufferManager.resize)."""
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.p = min(self.p, capacity)
+        self._trim_ghosts()
+
+
+    def pin(self, page_id):
+        """
+        Pin a page (an access):
+          - Resident hit → move to the MRU end of T2
+          - Ghost hit in B1 / B2 → adapt p, insert at the MRU end of T2
+          - Otherwise → insert at the MRU end of T1
+        """
+        self.pinned.add(page_id)
+        if page_id in self.t1:
+            del self.t1[page_id]
+            self.t2[page_id] = None
+        elif page_id in self.t2:
+            self.t2.move_to_end(page_id)
+        elif page_id in self.b1:
+            delta = max(len(self.b2) // len(self.b1), 1)
+            self.p = min(self.p + delta, self.capacity)
+            del self.b1[page_id]
+            self.t2[page_id] = None
+        elif page_id in self.b2:
+            delta = max(len(self.b1) // len(self.b2), 1)
+            self.p = max(self.p - delta, 0)
+            del self.b2[page_id]
+            self.t2[page_id] = None
+        else:
+            self.t1[page_id] = None
+            self._trim_ghosts()
+
+
+    def unpin(self, page_id):
+        """
+        Unpin a page:
+          - Make it evictable; a page that was never pinned enters T1
+        """
+        if page_id not in self.t1 and page_id not in self.t2:
+            self.t1[page_id] = None
+            self._trim_ghosts()
+        self.pinned.discard(page_id)
+
+
+    def remove(self, page_id):
+        self.t1.pop(page_id, None)
+        self.t2.pop(page_id, None)
+        self.pinned.discard(page_id)
+
+
+    def victim(self):
+        """
+        Evict the LRU unpinned page of T1 (if |T1| > p) or of T2 and
+        remember it in the matching ghost list.
+          - If every resident page is pinned → return None
+        """
+        if len(self.t1) > self.p:
+            order = ((self.t1, self.b1), (self.t2, self.b2))
+        else:
+            order = ((self.t2, self.b2), (self.t1, self.b1))
+        for resident, ghost in order:
+            page_id = self._lru_unpinned(resident)
+            if page_id is not None:
+                del resident[page_id]
+                ghost[page_id] = None
+                self._trim_ghosts()
+                return page_id
+        return None
+
+
+    def _lru_unpinned(self, resident):
+        for page_id in resident:
+            if page_id not in self.pinned:
+                return page_id
+        return None
+
+
+    def _trim_ghosts(self):
+        # ARC invariants: |T1| + |B1| <= c and |T1| + |T2| + |B1| + |B2| <= 2c
+        c = self.capacity
+        while self.b1 and len(self.t1) + len(self.b1) > c:
+            self.b1.popitem(last=False)
+        while len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) > 2 * c:
+            ghost = self.b2 if self.b2 else self.b1
+            if not ghost:
+                break
+            ghost.popitem(last=False)
@@ -0,0 +1,81 @@
+# ============================================
+# PIN TRACKING
+# ============================================
+
+import threading
+import time
+import traceback
+from collections import namedtuple
+
+PinRecord = namedtuple("PinRecord", "page_id thread since stack")
+
+
+class PinTracker:
+    """
+    Debug record of the pins a BufferManager has handed out and not yet
+    taken back.
+
+    Every successful fetch records the page, the thread, the time and the
+    caller's stack; every unpin drops one record of the page (the newest
+    one taken by the same thread, else the oldest). What is left are the
+    pins still held, so leaked pins show up with the code that took them.
+
+    Attributes:
+      - held        : page_id -> list of PinRecord
+      - stack_depth : caller frames kept per record
+
+    Usage:
+        bpm.enablePinTracking()
+        ...
+        print(bpm.pin_tracker.report(min_age=5.0))
+    """
+
+    def __init__(self, stack_depth: int = 8):
+        self.stack_depth = stack_depth
+        self.held = {}
+        self.lock = threading.Lock()
+
+    def pinned(self, page_ids):
+        # Skip pinned() and the BufferManager method that called it.
+        stack = traceback.format_list(traceback.extract_stack(limit=self.stack_depth + 2)[:-2])
+        thread = threading.current_thread().name
+        since = time.monotonic()
+        with self.lock:
+            for page_id in page_ids:
+                self.held.setdefault(page_id, []).append(PinRecord(page_id, thread, since, stack))
+
+    def unpinned(self, page_ids):
+        thread = threading.current_thread().name
+        with self.lock:
+            for page_id in page_ids:
+                records = self.held.get(page_id)
+                if not records:
+                    continue
+                for i in range(len(records) - 1, -1, -1):
+                    if records[i].thread == thread:
+                        del records[i]
+                        break
+                else:
+                    del records[0]
+                if not records:
+                    del self.held[page_id]
+
+    def heldPins(self, min_age: float = 0.0):
+        """Return the pins held for at least min_age seconds, oldest first."""
+        cutoff = time.monotonic() - min_age
+        with self.lock:
+            records = [r for records in self.held.values() for r in records if r.since <= cutoff]
+        return sorted(records, key=lambda r: r.since)
+
+    def report(self, min_age: float = 0.0, limit: int = None) -> str:
+        """
+        Describe the pins held for at least min_age seconds (the `limit`
+        oldest ones if given) and where they were taken.
+        """
+        now = time.monotonic()
+        lines = []
+        for record in self.heldPins(min_age)[:limit]:
+            lines.append(f"page {record.page_id} pinned by {record.thread} "
+                         f"{now - record.since:.3f}s ago at:")
+            lines.extend(line.rstrip("\n") for line in record.stack)
+        return "\n".join(lines)
@@ -0,0 +1,175 @@
+# ============================================
+# SHARDED BUFFER MANAGER
+# ============================================
+
+from collections import defaultdict
+
+from .buffer_manager import BufferManager
+from .disk_manager import DiskManager
+from .page_replacer import LRUReplacer
+
+
+class ShardedBufferManager:
+    """
+    A buffer pool split into independent BufferManager shards.
+
+    Page `page_id` always lives in shard `hash(page_id) % shards`, and every
+    shard has its own page table, replacer, latch and share of the frames.
+    Threads working on pages of different shards never contend on the same
+    latch. All shards share one disk manager.
+
+    It offers the BufferManager page API (fetchPage, tryFetchPage, newPage,
+    unpinPage, pinned, flushPage, deletePage, fetchPages, unpinPages,
+    flushAllPages), so it can replace a BufferManager. Each shard evicts
+    only its own pages, so replacement is per shard rather than global.
+    replacer_factory(capacity=frames) builds the replacer of each shard
+    from the shard's frame count (any replacer class, e.g. ARCReplacer).
+
+    Attributes:
+      - shards : list of BufferManager
+      - buffer_total_no_of_frames : frames over all shards
+
+    Usage:
+        bpm = ShardedBufferManager(1024, shards=8,
+                                   replacer_factory=ClockReplacer,
+                                   disk_manager=FileDiskManager("db"))
+    """
+
+    def __init__(self, no_of_frames: int, shards: int = 4, replacer_factory=LRUReplacer,
+                 disk_manager=None, tracer=None):
+        if shards < 1 or no_of_frames < shards:
+            raise ValueError("Need at least one shard and one frame per shard")
+        self.buffer_total_no_of_frames = no_of_frames
+        self.disk_manager = disk_manager if disk_manager is not None else DiskManager()
+        base, extra = divmod(no_of_frames, shards)
+        sizes = [base + (i < extra) for i in range(shards)]
+        self.shards = [BufferManager(frames, replacer=replacer_factory(capacity=frames),
+                                     disk_manager=self.disk_manager, tracer=tracer)
+                       for frames in sizes]
+
+    def getShard(self, page_id):
+        """Return the BufferManager responsible for page_id."""
+        return self.shards[hash(page_id) % len(self.shards)]
+
+    # -----------------------------
+    # Getters
+    # -----------------------------
+    def getBufferPool(self):
+        return [page for shard in self.shards for page in shard.getBufferPool()]
+
+    def getPageTable(self):
+        return [page_id for shard in self.shards for page_id in shard.getPageTable()]
+
+    def getDiskManager(self):
+        return self.disk_manager
+
+    # -----------------------------
+    # Core operations
+    # -----------------------------
+    def fetchPage(self, page_id, strategy=None):
+        return self.getShard(page_id).fetchPage(page_id, strategy)
+
+    def tryFetchPage(self, page_id, strategy=None):
+        return self.getShard(page_id).tryFetchPage(page_id, strategy)
+
+    def newPage(self, page_id=None):
+        """Like BufferManager.newPage; a fresh id is allocated before its shard is picked."""
+        if page_id is not None:
+            return self.fetchPage(page_id)
+        page_id = self.disk_manager.allocatePage()
+        return self.getShard(page_id)._install_new_page(page_id)
+
+    def unpinPage(self, page_id, is_dirty):
+        return self.getShard(page_id).unpinPage(page_id, is_dirty)
+
+    def pinned(self, page_id, write: bool = False, strategy=None):
+        return self.getShard(page_id).pinned(page_id, write, strategy)
+
+    def flushPage(self, page_id):
+        return self.getShard(page_id).flushPage(page_id)
+
+    def deletePage(self, page_id):
+        return self.getShard(page_id).deletePage(page_id)
+
+    def flushAllPages(self):
+        """Flush every shard; returns the summed {"pages", "bytes", "writes"}."""
+        total = {"pages": 0, "bytes": 0, "writes": 0}
+        for shard in self.shards:
+            for key, value in shard.flushAllPages().items():
+                total[key] += value
+        return total
+
+    # -----------------------------
+    # Batch operations
+    # -----------------------------
+    def fetchPages(self, page_ids, strategy=None):
+        """
+        Fetch page_ids (returned in the same order) with one
+        BufferManager.fetchPages call per shard. If a shard fails, the
+        pages already pinned in other shards are unpinned before raising.
+        A RingBuffer strategy keeps a ring of its size in every shard.
+        """
+        page_ids = list(page_ids)
+        pages = {}
+        try:
+            for shard, ids in self._by_shard(page_ids).items():
+                pages.update(zip(ids, shard.fetchPages(ids, strategy)))
+        except Exception:
+            if pages:
+                self.unpinPages(pages)
+            raise
+        return [pages[page_id] for page_id in page_ids]
+
+    def unpinPages(self, page_ids, is_dirty=False):
+        for shard, ids in self._by_shard(page_ids).items():
+            shard.unpinPages(ids, is_dirty)
+        return True
+
+    def _by_shard(self, page_ids):
+        groups = defaultdict(list)
+        for page_id in page_ids:
+            groups[self.getShard(page_id)].append(page_id)
+        return groups
+
+    def resize(self, new_frames: int):
+        """
+        Resize every shard to its share of new_frames (see
+        BufferManager.resize); returns the frames over all shards.
+        """
+        if new_frames < len(self.shards):
+            raise ValueError("Need at least one frame per shard")
+        base, extra = divmod(new_frames, len(self.shards))
+        self.buffer_total_no_of_frames = sum(shard.resize(base + (i < extra))
+                                             for i, shard in enumerate(self.shards))
+        return self.buffer_total_no_of_frames
+
+    # -----------------------------
+    # Metrics
+    # -----------------------------
+    def enableMetrics(self):
+        for shard in self.shards:
+            shard.enableMetrics()
+
+    def disableMetrics(self):
+        for shard in self.shards:
+            shard.disableMetrics()
+
+    def enablePinTracking(self, stack_depth: int = 8):
+        for shard in self.shards:
+            shard.enablePinTracking(stack_depth)
+
+    def disablePinTracking(self):
+        for shard in self.shards:
+            shard.disablePinTracking()
+
+    def getHeldPins(self, min_age: float = 0.0):
+        return sorted((record for shard in self.shards for record in shard.getHeldPins(min_age)),
+                      key=lambda record: record.since)
+
+    def stats(self):
+        """Return the stats() snapshot of every shard."""
+        return [shard.stats() for shard in self.shards]
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
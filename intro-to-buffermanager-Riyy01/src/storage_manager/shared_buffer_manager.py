@@ -0,0 +1,392 @@
+# ============================================
+# SHARED-MEMORY BUFFER MANAGER
+# ============================================
+
+import multiprocessing
+import os
+from array import array
+from multiprocessing import shared_memory
+
+from .disk_manager import FileDiskManager
+from .page import Page, PAGE_SIZE
+
+# Frame flags
+DIRTY = 1
+BUSY = 2           # disk I/O in progress; the frame cannot be used or evicted
+REFERENCED = 4     # clock reference bit
+
+# Per-shard counters
+_HAND, _HITS, _MISSES, _EVICTIONS, _WRITES = range(5)
+_COUNTERS = 5
+
+_EMPTY = -1        # page_id of an empty frame / key of an empty table slot
+
+
+class SharedPage(Page):
+    """
+    The Page of one frame of a SharedBufferManager in this process.
+
+    page_id, pin_count and dirty are read from the shared frame table, so
+    they show what every process sees. The pool changes them; there is no
+    content latch (latch is None), processes writing to the same page have
+    to coordinate among themselves.
+    """
+
+    def __init__(self, pool, frame_id):
+        self._pool = pool
+        self._frame_id = frame_id
+        self.data = pool.frame_views[frame_id]
+        self.latch = None
+        self.lsn = 0
+
+    @property
+    def page_id(self):
+        page_id = self._pool.page_ids[self._frame_id]
+        return None if page_id == _EMPTY else page_id
+
+    @property
+    def pin_count(self):
+        return self._pool.pins[self._frame_id]
+
+    @property
+    def dirty(self):
+        return bool(self._pool.flags[self._frame_id] & DIRTY)
+
+
+class SharedBufferManager:
+    """
+    A buffer pool whose frames, page table, pins and dirty flags live in
+    multiprocessing.shared_memory, so worker processes share one cache of
+    hot pages instead of each caching its own copy.
+
+    The pool is split into shards like ShardedBufferManager: page `page_id`
+    lives in shard `page_id % shards`, which owns its share of the frames,
+    an open-addressing page table, a clock hand and a process-safe
+    Condition (lock). A miss claims a frame and marks it BUSY under the
+    shard lock, then writes back the dirty victim and reads the page with
+    the lock released; processes fetching a BUSY page wait on the
+    Condition until the I/O is done.
+
+    Every process opens its own FileDiskManager on `disk_path`. Pages are
+    only fetched, written back and flushed here; allocate and delete pages
+    through a single process before the workers need them.
+
+    Create the pool in the parent process and hand it to the workers as a
+    Process argument (the locks can only be inherited that way); a forked
+    worker inherits the mapping and a spawned one attaches to the same
+    shared memory. The creating process owns the memory: only its close()
+    unlinks it, so close the workers first. Drop the pages you fetched
+    before close().
+
+    Attributes:
+      - buffer_total_no_of_frames : frames over all shards
+      - name     : name of the shared memory block
+      - page_ids, pins, flags : shared per-frame state
+      - frame_views : memoryview of every frame in this process
+
+    Usage:
+        bpm = SharedBufferManager(1024, "db", shards=8)
+        workers = [Process(target=work, args=(bpm,)) for _ in range(4)]
+        ...
+        bpm.close()
+    """
+
+    def __init__(self, no_of_frames: int, disk_path, shards: int = 4,
+                 page_size: int = PAGE_SIZE, mp_context=None):
+        if shards < 1 or no_of_frames < shards:
+            raise ValueError("Need at least one shard and one frame per shard")
+        ctx = mp_context if mp_context is not None else multiprocessing.get_context()
+        self.buffer_total_no_of_frames = no_of_frames
+        self.disk_path = disk_path
+        self.num_shards = shards
+        self.page_size = page_size
+        # Room for twice the frames: a dirty victim keeps its entry while
+        # the page replacing it is loaded. Half full keeps probes short.
+        self.table_size = 1 << (4 * -(-no_of_frames // shards) - 1).bit_length()
+        self.locks = [ctx.Condition(ctx.Lock()) for _ in range(shards)]
+        self.shm = shared_memory.SharedMemory(create=True, size=self._layout_size())
+        self.name = self.shm.name
+        self._owner_pid = os.getpid()   # forked workers keep it, but are not the owner
+        self._attach()
+        self.page_ids[:] = array("q", [_EMPTY]) * no_of_frames
+        self.table_keys[:] = array("q", [_EMPTY]) * len(self.table_keys)
+
+    def _layout_size(self):
+        words = (self.num_shards * _COUNTERS + 3 * self.buffer_total_no_of_frames +
+                 2 * self.num_shards * self.table_size)
+        self._data_offset = -(-words * 8 // self.page_size) * self.page_size
+        return self._data_offset + self.buffer_total_no_of_frames * self.page_size
+
+    def _attach(self):
+        # Map the views of the shared block and open the disk in this process.
+        frames = self.buffer_total_no_of_frames
+        table = self.num_shards * self.table_size
+        self._layout_size()
+        self._words = self.shm.buf[:self._data_offset].cast("q")
+        offsets = [0]
+        for length in (self.num_shards * _COUNTERS, frames, frames, frames, table, table):
+            offsets.append(offsets[-1] + length)
+        (self.counters, self.page_ids, self.pins, self.flags,
+         self.table_keys, self.table_values) = [self._words[start:end]
+                                                for start, end in zip(offsets, offsets[1:])]
+        data = self._data_offset
+        self.frame_views = [self.shm.buf[data + i * self.page_size:data + (i + 1) * self.page_size]
+                            for i in range(frames)]
+        self.pages = [SharedPage(self, frame_id) for frame_id in range(frames)]
+        self.frames_per_shard = [range(shard, frames, self.num_shards)
+                                 for shard in range(self.num_shards)]
+        self.disk_manager = FileDiskManager(self.disk_path, self.page_size)
+
+    def __getstate__(self):
+        return {"buffer_total_no_of_frames": self.buffer_total_no_of_frames,
+                "disk_path": self.disk_path, "num_shards": self.num_shards,
+                "page_size": self.page_size, "table_size": self.table_size,
+                "locks": self.locks, "name": self.name}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = shared_memory.SharedMemory(name=self.name)
+        self._owner_pid = None
+        self._attach()
+
+    # -----------------------------
+    # Getters
+    # -----------------------------
+    def getShard(self, page_id):
+        return page_id % self.num_shards
+
+    def getBufferPool(self):
+        return [page for page in self.pages if page.page_id is not None]
+
+    def getPageTable(self):
+        return [page_id for page_id in self.page_ids if page_id != _EMPTY]
+
+    def getDiskManager(self):
+        return self.disk_manager
+
+    # -----------------------------
+    # Core operations
+    # -----------------------------
+    def fetchPage(self, page_id):
+        """
+        Pin page_id and return its SharedPage, loading it on a miss into a
+        free frame or a clock victim of its shard.
+        """
+        shard = self.getShard(page_id)
+        lock = self.locks[shard]
+        counters = self.counters
+        with lock:
+            while True:
+                frame_id = self._lookup(shard, page_id)
+                if frame_id is None:
+                    break
+                if not self.flags[frame_id] & BUSY:
+                    self.pins[frame_id] += 1
+                    self.flags[frame_id] |= REFERENCED
+                    counters[shard * _COUNTERS + _HITS] += 1
+                    return self.pages[frame_id]
+                lock.wait()        # loading, or its frame is being reused
+            frame_id = self._victim(shard)
+            if frame_id is None:
+                raise Exception("No victim aval")
+            victim_id = self.page_ids[frame_id]
+            victim_dirty = bool(self.flags[frame_id] & DIRTY)
+            if victim_id != _EMPTY:
+                counters[shard * _COUNTERS + _EVICTIONS] += 1
+                if not victim_dirty:
+                    self._remove(shard, victim_id)
+            # A dirty victim stays in the table, BUSY, until it is written.
+            self.flags[frame_id] = BUSY
+            self.pins[frame_id] = 1
+            self._insert(shard, page_id, frame_id)
+            counters[shard * _COUNTERS + _MISSES] += 1
+
+        view = self.frame_views[frame_id]
+        written = ok = False
+        try:
+            if victim_dirty:
+                self.disk_manager.writePage(Page(victim_id, view))
+            written = True
+            ok = self.disk_manager.readPageInto(page_id, view)
+        finally:
+            with lock:
+                if written and victim_dirty:
+                    self._remove(shard, victim_id)
+                    counters[shard * _COUNTERS + _WRITES] += 1
+                if ok:
+                    self.page_ids[frame_id] = page_id
+                    self.flags[frame_id] = REFERENCED
+                else:
+                    self._remove(shard, page_id)
+                    self.pins[frame_id] = 0
+                    if written:
+                        self.page_ids[frame_id] = _EMPTY
+                        self.flags[frame_id] = 0
+                    else:
+                        self.page_ids[frame_id] = victim_id
+                        self.flags[frame_id] = DIRTY
+                lock.notify_all()
+        if not ok:
+            raise Exception(f"Page {page_id} not found on disk")
+        return self.pages[frame_id]
+
+    def unpinPage(self, page_id, is_dirty):
+        shard = self.getShard(page_id)
+        with self.locks[shard]:
+            frame_id = self._lookup(shard, page_id)
+            if frame_id is None:
+                raise Exception("Page not found in buffer")
+            if self.pins[frame_id] == 0:
+                return False
+            self.pins[frame_id] -= 1
+            if is_dirty:
+                self.flags[frame_id] |= DIRTY
+            return True
+
+    def flushPage(self, page_id):
+        """Write page_id to disk if it is dirty; raises if it is not buffered."""
+        if self._flush(page_id) is None:
+            raise Exception("Invalid")
+        return True
+
+    def _flush(self, page_id):
+        # Returns whether the page was written, None if it is not buffered.
+        shard = self.getShard(page_id)
+        lock = self.locks[shard]
+        with lock:
+            while True:
+                frame_id = self._lookup(shard, page_id)
+                if frame_id is None:
+                    return None
+                if not self.flags[frame_id] & BUSY:
+                    break
+                lock.wait()
+            if not self.flags[frame_id] & DIRTY:
+                return False
+            # Clean before writing, so a process dirtying it meanwhile keeps it dirty.
+            self.flags[frame_id] = (self.flags[frame_id] & ~DIRTY) | BUSY
+        ok = False
+        try:
+            self.disk_manager.writePage(Page(page_id, self.frame_views[frame_id]))
+            ok = True
+        finally:
+            with lock:
+                self.flags[frame_id] &= ~BUSY
+                if ok:
+                    self.counters[shard * _COUNTERS + _WRITES] += 1
+                else:
+                    self.flags[frame_id] |= DIRTY
+                lock.notify_all()
+        return True
+
+    def flushAllPages(self):
+        """Write every dirty page and sync; returns {"pages", "bytes", "writes"}."""
+        written = 0
+        for shard in range(self.num_shards):
+            with self.locks[shard]:
+                dirty = [self.page_ids[frame_id] for frame_id in self.frames_per_shard[shard]
+                         if self.flags[frame_id] & DIRTY and self.page_ids[frame_id] != _EMPTY]
+            written += sum(bool(self._flush(page_id)) for page_id in dirty)
+        self.disk_manager.sync()
+        return {"pages": written, "bytes": written * self.page_size, "writes": written}
+
+    def stats(self):
+        """Return the hits, misses, evictions and writes of every process, summed."""
+        totals = dict.fromkeys(("hits", "misses", "evictions", "writes"), 0)
+        for shard in range(self.num_shards):
+            with self.locks[shard]:
+                base = shard * _COUNTERS
+                totals["hits"] += self.counters[base + _HITS]
+                totals["misses"] += self.counters[base + _MISSES]
+                totals["evictions"] += self.counters[base + _EVICTIONS]
+                totals["writes"] += self.counters[base + _WRITES]
+        return totals
+
+    def close(self):
+        """Detach this process; the owner also frees the shared memory."""
+        if self.shm is None:
+            return
+        self.disk_manager.close()
+        views = [self.counters, self.page_ids, self.pins, self.flags,
+                 self.table_keys, self.table_values, self._words, *self.frame_views]
+        self.pages = []
+        for view in views:
+            view.release()
+        self.shm.close()
+        if os.getpid() == self._owner_pid:
+            self.shm.unlink()
+        self.shm = None
+
+    # -----------------------------
+    # Clock replacement
+    # -----------------------------
+    def _victim(self, shard):
+        """
+        Return a frame of the shard for a new page: an empty frame, else
+        the next unpinned frame the clock hand finds without its reference
+        bit. Caller holds the shard lock.
+        """
+        frames = self.frames_per_shard[shard]
+        hand = shard * _COUNTERS + _HAND
+        for _ in range(2 * len(frames)):
+            frame_id = frames[self.counters[hand]]
+            self.counters[hand] = (self.counters[hand] + 1) % len(frames)
+            flags = self.flags[frame_id]
+            if self.pins[frame_id] or flags & BUSY:
+                continue
+            if self.page_ids[frame_id] == _EMPTY or not flags & REFERENCED:
+                return frame_id
+            self.flags[frame_id] = flags & ~REFERENCED
+        return None
+
+    # -----------------------------
+    # Page table (linear probing)
+    # -----------------------------
+    def _slot(self, shard, page_id):
+        return (page_id // self.num_shards) & (self.table_size - 1)
+
+    def _lookup(self, shard, page_id):
+        keys = self.table_keys
+        base = shard * self.table_size
+        mask = self.table_size - 1
+        i = self._slot(shard, page_id)
+        while keys[base + i] != _EMPTY:
+            if keys[base + i] == page_id:
+                return self.table_values[base + i]
+            i = (i + 1) & mask
+        return None
+
+    def _insert(self, shard, page_id, frame_id):
+        keys = self.table_keys
+        base = shard * self.table_size
+        mask = self.table_size - 1
+        i = self._slot(shard, page_id)
+        while keys[base + i] not in (_EMPTY, page_id):
+            i = (i + 1) & mask
+        keys[base + i] = page_id
+        self.table_values[base + i] = frame_id
+
+    def _remove(self, shard, page_id):
+        # Backward-shift deletion keeps every probe chain without gaps.
+        keys, values = self.table_keys, self.table_values
+        base = shard * self.table_size
+        mask = self.table_size - 1
+        i = self._slot(shard, page_id)
+        while keys[base + i] != page_id:
+            if keys[base + i] == _EMPTY:
+                return
+            i = (i + 1) & mask
+        j = i
+        while True:
+            j = (j + 1) & mask
+            key = keys[base + j]
+            if key == _EMPTY:
+                break
+            home = self._slot(shard, key)
+            # Leave key where it is if its home lies cyclically in (i, j].
+            if (i < home <= j) if i <= j else (home > i or home <= j):
+                continue
+            keys[base + i] = key
+            values[base + i] = values[base + j]
+            i = j
+        keys[base + i] = _EMPTY
@@ -0,0 +1,122 @@
+# ============================================
+# TRACING
+# ============================================
+
+import json
+import threading
+import time
+from collections import deque, namedtuple
+
+DEBUG = 10      # per-page events: disk reads/writes, buffer fetches
+INFO = 20       # evictions, flushes
+
+TraceEvent = namedtuple("TraceEvent", "timestamp_ns level source op page_id bytes duration_ns")
+TraceEvent.__doc__ = """
+A structured trace event.
+
+  - timestamp_ns : wall clock time of the event (time.time_ns())
+  - level        : DEBUG or INFO
+  - source       : "disk" or "buffer"
+  - op           : e.g. "read", "write", "fetch_hit", "evict", "flush"
+  - page_id      : first page the event is about (None for pool-wide ops)
+  - bytes        : payload bytes moved
+  - duration_ns  : time the operation took
+"""
+
+
+class Tracer:
+    """
+    Dispatches trace events to subscribers.
+
+    Instrumented code checks `tracer.active` before it times anything or
+    builds an event, so with no subscriber tracing costs one attribute
+    check. A subscriber is any callable taking a TraceEvent (the sinks
+    below, or a plain function) and only receives events at or above the
+    level it subscribed with.
+
+    Usage:
+        ring = default_tracer.subscribe(RingBufferSink(10_000))
+        ...
+        default_tracer.unsubscribe(ring)
+    """
+
+    def __init__(self):
+        self.active = False
+        self._subscribers = ()         # tuple of (level, callable)
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber, level: int = DEBUG):
+        """Register subscriber for events at `level` and above; returns it."""
+        with self._lock:
+            self._subscribers = self._subscribers + ((level, subscriber),)
+            self.active = True
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers = tuple((level, s) for level, s in self._subscribers
+                                      if s is not subscriber)
+            self.active = bool(self._subscribers)
+
+    def emit(self, level, source, op, page_id, nbytes=0, duration_ns=0):
+        event = TraceEvent(time.time_ns(), level, source, op, page_id, nbytes, duration_ns)
+        for subscriber_level, subscriber in self._subscribers:
+            if level >= subscriber_level:
+                subscriber(event)
+
+
+default_tracer = Tracer()
+
+
+# -----------------------------
+# Sinks
+# -----------------------------
+class RingBufferSink:
+    """Keeps the last `capacity` events in memory."""
+
+    def __init__(self, capacity: int = 10_000):
+        self.buffer = deque(maxlen=capacity)
+
+    def __call__(self, event):
+        self.buffer.append(event)
+
+    def events(self):
+        return list(self.buffer)
+
+
+class FileSink:
+    """Writes one human-readable line per event to a path or file object."""
+
+    def __init__(self, target):
+        self._owned = isinstance(target, (str, bytes)) or hasattr(target, "__fspath__")
+        self.file = open(target, "a") if self._owned else target
+        self._lock = threading.Lock()
+
+    def format(self, event):
+        return (f"{event.timestamp_ns} [{event.source}] {event.op} page={event.page_id} "
+                f"bytes={event.bytes} duration_ns={event.duration_ns}\n")
+
+    def __call__(self, event):
+        line = self.format(event)
+        with self._lock:
+            self.file.write(line)
+
+    def close(self):
+        if self._owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class JsonLinesSink(FileSink):
+    """Writes one JSON object per event, for offline analysis."""
+
+    def format(self, event):
+        return json.dumps(event._asdict()) + "\n"
+
+
+class PrintSink:
+    """Prints events to stdout, like the DiskManager used to."""
+
+    def __call__(self, event):
+        print(f"[{event.source}] {event.op} page {event.page_id}")
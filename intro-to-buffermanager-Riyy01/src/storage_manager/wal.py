@@ -0,0 +1,323 @@
+# ============================================
+# WRITE-AHEAD LOG
+# ============================================
+
+import os
+import struct
+import threading
+import zlib
+
+from .page import Page
+
+# crc32, record kind, page_id (-1 for none), payload length
+_HEADER = struct.Struct("<IBqI")
+_DPT_ENTRY = struct.Struct("<qQ")    # page_id, recLSN
+_MASTER = struct.Struct("<QQ")       # last checkpoint LSN, its redo LSN
+_BASE = struct.Struct("<Q")          # LSN of the first record in the log file
+
+PAGE_IMAGE = 1     # payload: the full contents of page_id after a change
+CHECKPOINT = 2     # payload: the dirty page table as (page_id, recLSN) entries
+DEALLOC = 3        # no payload: page_id was deleted
+
+
+class WriteAheadLog:
+    """
+    An append-only log of page changes with group commit.
+
+    Every record gets a log sequence number (LSN): the byte offset in the
+    log where the record ends, so LSNs grow with every append and "the log
+    is durable up to lsn" is a single comparison with durable_lsn.
+
+    Records are appended to an in-memory buffer; flush(lsn) makes the log
+    durable up to lsn. The first thread that needs a flush becomes the
+    leader: it writes everything buffered so far and fsyncs once, while
+    threads arriving meanwhile wait for it and then find their records
+    already durable (or lead the next flush with everything buffered in
+    the meantime). commit_delay makes a leader wait a little before it
+    writes, so that more commits share its fsync.
+
+    BufferManager(wal=...) logs an image of every page unpinned dirty and
+    flushes the log up to page.lsn before writing a page to disk (the WAL
+    rule), so pages may stay dirty in the pool as long as the log is
+    committed. Deleting a page logs a DEALLOC record, made durable before
+    the page leaves the disk. recover() redoes the logged images and
+    deletes after a crash, starting at the redo LSN of the last checkpoint
+    (see Checkpointer).
+
+    Records: [crc32 | kind | page_id | length | payload], the checksum
+    covering the rest of the record. Opening a log truncates a torn tail
+    left by a crash mid-write; the scan for the tail starts at the last
+    checkpoint record. `<path>.master` holds the position of the last
+    checkpoint record and the LSN recovery starts from.
+
+    The log file starts with base_lsn, the LSN of its first record.
+    truncate() drops the records before the redo LSN by copying the rest
+    to a new file, so the log does not grow forever; LSNs are unchanged.
+
+    Attributes:
+      - base_lsn    : LSN of the first record still in the log file
+      - durable_lsn : log bytes known to be on stable storage
+      - end_lsn     : LSN of the last appended record
+      - redo_lsn    : where recovery starts (from the last checkpoint)
+      - appends, flush_requests, fsyncs : counters (see stats())
+    """
+
+    def __init__(self, path, commit_delay: float = 0.0):
+        self.path = path
+        self.master_path = f"{os.fspath(path)}.master"
+        self.commit_delay = commit_delay
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        header = os.pread(self.fd, _BASE.size, 0)
+        if len(header) < _BASE.size:
+            os.pwrite(self.fd, _BASE.pack(0), 0)
+            os.fsync(self.fd)
+            header = _BASE.pack(0)
+        self.base_lsn, = _BASE.unpack(header)
+        self.checkpoint_lsn, self.redo_lsn = self._read_master()
+        end = self.base_lsn
+        if self.checkpoint_lsn is not None:
+            # Everything before the checkpoint record was durable before it.
+            for _, kind, _, _, end in self.records(self.checkpoint_lsn):
+                break
+            else:
+                kind = None
+            if kind != CHECKPOINT:
+                # the log was truncated behind it
+                self.checkpoint_lsn, self.redo_lsn = None, self.base_lsn
+                end = self.base_lsn
+        for _, _, _, _, end in self.records(end):
+            pass
+        os.ftruncate(self.fd, self._offset(end))
+        self.durable_lsn = end
+        self.end_lsn = end
+        self.buffer = bytearray()      # records in (durable_lsn, end_lsn]
+        self.appends = 0
+        self.flush_requests = 0
+        self.fsyncs = 0
+        self.truncations = 0
+        self._flushing = False
+        self._cond = threading.Condition(threading.Lock())
+
+    def _offset(self, lsn):
+        # File offset of lsn.
+        return lsn - self.base_lsn + _BASE.size
+
+    def append(self, kind: int, page_id, payload=b"") -> int:
+        """Buffer a record and return its LSN."""
+        return self._append(kind, page_id, payload)[1]
+
+    def _append(self, kind, page_id, payload):
+        # Returns (start, end) of the record in the log.
+        body = _HEADER.pack(0, kind, -1 if page_id is None else page_id, len(payload))[4:]
+        record = struct.pack("<I", zlib.crc32(payload, zlib.crc32(body))) + body + payload
+        with self._cond:
+            start = self.end_lsn
+            self.buffer += record
+            self.end_lsn += len(record)
+            self.appends += 1
+            return start, self.end_lsn
+
+    def appendPage(self, page_id: int, data) -> int:
+        return self.append(PAGE_IMAGE, page_id, data)
+
+    def appendDealloc(self, page_id: int) -> int:
+        return self.append(DEALLOC, page_id)
+
+    def flush(self, lsn: int = None) -> int:
+        """
+        Make the log durable up to lsn (everything appended so far if
+        None); returns durable_lsn. Concurrent callers share fsyncs.
+        """
+        with self._cond:
+            if lsn is None:
+                lsn = self.end_lsn
+            self.flush_requests += 1
+            while self.durable_lsn < lsn:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                self._flushing = True
+                if self.commit_delay:
+                    self._cond.wait(self.commit_delay)
+                data = bytes(self.buffer)
+                self.buffer.clear()
+                target = self.end_lsn
+                self._cond.release()
+                try:
+                    os.pwrite(self.fd, data, self._offset(target - len(data)))
+                    os.fsync(self.fd)
+                except BaseException:
+                    self._cond.acquire()
+                    self.buffer[:0] = data
+                    self._flushing = False
+                    self._cond.notify_all()
+                    raise
+                self._cond.acquire()
+                self._flushing = False
+                self.durable_lsn = target
+                self.fsyncs += 1
+                self._cond.notify_all()
+            return self.durable_lsn
+
+    def commit(self) -> int:
+        """Make every record appended so far durable (group commit)."""
+        return self.flush()
+
+    # -----------------------------
+    # Checkpoints
+    # -----------------------------
+    def logCheckpoint(self, dirty_page_table, begin_lsn: int) -> int:
+        """
+        Log a checkpoint of dirty_page_table (page_id -> recLSN), taken when
+        the log ended at begin_lsn, and make it the starting point of
+        recovery. The pages it lists must have been dirty since their
+        recLSN; every other page must be on stable storage up to begin_lsn.
+        Returns the new redo LSN.
+        """
+        payload = b"".join(_DPT_ENTRY.pack(page_id, rec_lsn)
+                           for page_id, rec_lsn in sorted(dirty_page_table.items()))
+        start, end = self._append(CHECKPOINT, None, payload)
+        redo_lsn = min(min(dirty_page_table.values(), default=begin_lsn), begin_lsn)
+        self.flush(end)
+        tmp = f"{self.master_path}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, _MASTER.pack(start, redo_lsn))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, self.master_path)
+        with self._cond:
+            self.checkpoint_lsn, self.redo_lsn = start, redo_lsn
+        return redo_lsn
+
+    def _read_master(self):
+        try:
+            with open(self.master_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None, self.base_lsn
+        checkpoint_lsn, redo_lsn = _MASTER.unpack(data)
+        if checkpoint_lsn < self.base_lsn:
+            return None, self.base_lsn
+        return checkpoint_lsn, max(redo_lsn, self.base_lsn)
+
+    def truncate(self, lsn: int = None) -> int:
+        """
+        Drop the durable records before lsn (the redo LSN by default; never
+        past it) from the log file. The records from there on are copied
+        to a new file that replaces the log, while appends go on; flushes
+        wait for the copy. Not safe while a records() iteration is running.
+        Returns the new base_lsn.
+        """
+        with self._cond:
+            lsn = self.redo_lsn if lsn is None else min(lsn, self.redo_lsn)
+            while self._flushing:
+                self._cond.wait()
+            if lsn <= self.base_lsn:
+                return self.base_lsn
+            self._flushing = True       # holds off flushes while we copy
+            durable = self.durable_lsn
+        tmp = f"{os.fspath(self.path)}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, _BASE.pack(lsn))
+            offset, stop = self._offset(lsn), self._offset(durable)
+            while offset < stop:
+                chunk = os.pread(self.fd, min(1 << 20, stop - offset), offset)
+                os.write(fd, chunk)
+                offset += len(chunk)
+            os.fsync(fd)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.close(fd)
+            with self._cond:
+                self._flushing = False
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            os.close(self.fd)
+            self.fd, self.base_lsn = fd, lsn
+            self.truncations += 1
+            self._flushing = False
+            self._cond.notify_all()
+        return lsn
+
+    def lastCheckpoint(self):
+        """Return the dirty page table logged by the last checkpoint, or None."""
+        if self.checkpoint_lsn is None:
+            return None
+        for _, kind, _, payload, _ in self.records(self.checkpoint_lsn):
+            if kind != CHECKPOINT:
+                break
+            return dict(_DPT_ENTRY.iter_unpack(payload))
+        return None
+
+    def records(self, start_lsn: int = 0):
+        """
+        Yield (lsn, kind, page_id, payload, end_lsn) for the durable records
+        starting at start_lsn (a record boundary; base_lsn if it was
+        truncated away). Stops at a torn or corrupt record.
+        """
+        lsn = max(start_lsn, self.base_lsn)
+        while True:
+            offset = self._offset(lsn)
+            header = os.pread(self.fd, _HEADER.size, offset)
+            if len(header) < _HEADER.size:
+                return
+            crc, kind, page_id, length = _HEADER.unpack(header)
+            payload = os.pread(self.fd, length, offset + _HEADER.size)
+            if (len(payload) < length or
+                    zlib.crc32(payload, zlib.crc32(header[4:])) != crc):
+                return
+            end = lsn + _HEADER.size + length
+            yield lsn, kind, None if page_id == -1 else page_id, payload, end
+            lsn = end
+
+    def recover(self, disk_manager, start_lsn: int = None) -> int:
+        """
+        Redo the page images and deletes logged from start_lsn on (the redo
+        LSN of the last checkpoint by default) into disk_manager and sync
+        it. Images logged before the last delete of their page are skipped.
+        Images are whole pages, so redoing one twice is harmless. Returns
+        the number of pages written.
+        """
+        if start_lsn is None:
+            start_lsn = self.redo_lsn
+        deleted = {}                   # page_id -> LSN of its last DEALLOC
+        for lsn, kind, page_id, _, _ in self.records(start_lsn):
+            if kind == DEALLOC:
+                deleted[page_id] = lsn
+        redone = 0
+        changed = False
+        for lsn, kind, page_id, payload, _ in self.records(start_lsn):
+            if lsn < deleted.get(page_id, -1):
+                continue
+            if kind == PAGE_IMAGE:
+                disk_manager.writePage(Page(page_id, bytearray(payload)))
+                redone += 1
+            elif kind == DEALLOC:
+                disk_manager.deletePage(page_id)
+                changed = True
+        if redone or changed:
+            disk_manager.sync()
+        return redone
+
+    def stats(self):
+        with self._cond:
+            return {"appends": self.appends, "flush_requests": self.flush_requests,
+                    "fsyncs": self.fsyncs, "truncations": self.truncations,
+                    "base_lsn": self.base_lsn, "durable_lsn": self.durable_lsn,
+                    "end_lsn": self.end_lsn, "redo_lsn": self.redo_lsn}
+
+    def close(self):
+        if self.fd is not None:
+            self.flush()
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
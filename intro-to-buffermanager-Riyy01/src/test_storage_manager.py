@@ -1,6 +1,10 @@
 # test_buffer_manager.py
 import pytest
-from storage_manager import BufferManager, Page
+from storage_manager import BufferManager, Page, LRUReplacer, ClockReplacer, LRUKReplacer, ARCReplacer
+from storage_manager import FileDiskManager, MmapDiskManager, CompressedDiskManager, BackgroundWriter
+from storage_manager import WriteAheadLog, Checkpointer, ShardedBufferManager, RingBuffer
+from storage_manager import SharedBufferManager, AsyncBufferManager
+from storage_manager import DiskManager, PageAllocator, Tracer, RingBufferSink, JsonLinesSink, DEBUG, INFO
 
 @pytest.fixture
 def bpm():
@@ -107,3 +111,1423 @@ def test_lru_order(bpm):
     assert page3.page_id == 3
     assert 1 not in bpm.getPageTable()
     assert 2 in bpm.getPageTable()
+
+def test_lru_replacer_victim_order():
+    replacer = LRUReplacer()
+    for page_id in (1, 2, 3):
+        replacer.unpin(page_id)
+    replacer.unpin(1)                 # already free: keeps its position
+    assert replacer.getFreeFrames() == [3, 2, 1]
+    replacer.pin(2)
+    assert replacer.replacerSize() == 2
+    assert replacer.victim() == 1
+    assert replacer.victim() == 3
+    assert replacer.victim() is None
+
+def test_clock_replacer_second_chance():
+    replacer = ClockReplacer()
+    for page_id in (1, 2, 3):
+        replacer.pin(page_id)
+        replacer.unpin(page_id)
+    assert replacer.replacerSize() == 3
+    # first sweep clears every reference bit, then 1 is the victim
+    assert replacer.victim() == 1
+    replacer.pin(2)                   # hit: sets the bit, pinned
+    replacer.unpin(2)
+    assert replacer.victim() == 3     # 2 gets a second chance
+    assert replacer.victim() == 2
+    assert replacer.victim() is None
+
+def test_clock_replacer_skips_pinned():
+    replacer = ClockReplacer()
+    replacer.pin(1)
+    replacer.unpin(2)
+    assert replacer.victim() == 2
+    assert replacer.victim() is None
+
+def test_buffer_manager_with_clock_replacer():
+    bpm = BufferManager(no_of_frames=2, replacer=ClockReplacer())
+    for i in range(1, 4):
+        bpm.disk_manager.writePage(Page(i))
+    bpm.fetchPage(1)
+    bpm.fetchPage(2)
+    bpm.unpinPage(1, is_dirty=False)
+    bpm.unpinPage(2, is_dirty=False)
+    bpm.fetchPage(3)
+    assert sorted(bpm.getPageTable()) == [2, 3]
+    assert bpm.getReplacer().replacerSize() == 1
+
+def test_delete_page_leaves_replacer():
+    bpm = BufferManager(no_of_frames=2)
+    for i in range(1, 4):
+        bpm.disk_manager.writePage(Page(i))
+    bpm.fetchPage(1)
+    bpm.unpinPage(1, is_dirty=False)
+    bpm.deletePage(1)
+    assert bpm.getReplacer().replacerSize() == 0
+
+def test_lru_k_evicts_pages_with_fewer_than_k_accesses_first():
+    replacer = LRUKReplacer(k=2)
+    for page_id in (1, 2, 3):
+        replacer.pin(page_id)
+    replacer.pin(1)                   # 1 now has two accesses
+    for page_id in (1, 2, 3):
+        replacer.unpin(page_id)
+    assert replacer.replacerSize() == 3
+    assert replacer.victim() == 2     # infinite distance, oldest first access
+    assert replacer.victim() == 3
+    assert replacer.victim() == 1
+    assert replacer.victim() is None
+
+def test_lru_k_largest_backward_k_distance():
+    replacer = LRUKReplacer(k=2)
+    for page_id in (1, 2, 1, 2, 2):   # 2nd most recent access: page 1 at t1, page 2 at t4
+        replacer.pin(page_id)
+    replacer.unpin(1)
+    replacer.unpin(2)
+    assert replacer.victim() == 1
+
+def test_lru_k_keeps_hot_set_through_scan():
+    bpm = BufferManager(no_of_frames=3, replacer=LRUKReplacer(k=2))
+    for i in range(1, 10):
+        bpm.disk_manager.writePage(Page(i))
+    for page_id in (1, 2, 1, 2):
+        bpm.fetchPage(page_id)
+        bpm.unpinPage(page_id, is_dirty=False)
+    for page_id in range(3, 10):      # sequential scan
+        bpm.fetchPage(page_id)
+        bpm.unpinPage(page_id, is_dirty=False)
+    assert 1 in bpm.getPageTable() and 2 in bpm.getPageTable()
+
+def test_arc_promotes_repeated_pages_to_t2():
+    replacer = ARCReplacer(capacity=2)
+    replacer.pin(1)
+    replacer.pin(2)
+    replacer.pin(1)                   # second access: T1 -> T2
+    assert replacer.getListSizes()["T1"] == 1
+    assert replacer.getListSizes()["T2"] == 1
+    replacer.unpin(1)
+    replacer.unpin(2)
+    assert replacer.victim() == 2     # |T1| > p = 0: evict from T1
+    assert 2 in replacer.b1
+
+def test_arc_ghost_hit_adapts_target_size():
+    replacer = ARCReplacer(capacity=2)
+    for page_id in (1, 2):
+        replacer.pin(page_id)
+        replacer.unpin(page_id)
+    assert replacer.victim() == 1
+    assert replacer.getTargetSize() == 0
+    replacer.pin(1)                   # ghost hit in B1: T1 was too small
+    assert replacer.getTargetSize() == 1
+    assert 1 in replacer.t2
+
+def test_arc_never_evicts_pinned_pages():
+    bpm = BufferManager(no_of_frames=2, replacer=ARCReplacer(2))
+    for i in range(1, 4):
+        bpm.disk_manager.writePage(Page(i))
+    bpm.fetchPage(1)
+    bpm.fetchPage(2)
+    with pytest.raises(Exception):
+        bpm.fetchPage(3)
+    bpm.unpinPage(2, is_dirty=False)
+    bpm.fetchPage(3)
+    assert sorted(bpm.getPageTable()) == [1, 3]
+
+# -----------------------------
+# File-backed disk manager
+# -----------------------------
+@pytest.fixture
+def file_disk(tmp_path):
+    disk = FileDiskManager(tmp_path / "test.db", page_size=4096)
+    for i in range(1, 4):
+        disk.writePage(Page(i, bytearray(bytes([i]) * 4096)))
+    yield disk
+    disk.close()
+
+def test_file_disk_round_trip_and_offsets(file_disk):
+    page = file_disk.readPage(2)
+    assert page.page_id == 2 and page.data == bytes([2]) * 4096
+    assert file_disk.num_pages == 4
+    with open(file_disk.path, "rb") as f:
+        f.seek(3 * 4096)
+        assert f.read(4096) == bytes([3]) * 4096
+    assert file_disk.readPage(99) is None
+
+def test_file_disk_persists_across_reopen(file_disk):
+    file_disk.sync()
+    file_disk.close()
+    with FileDiskManager(file_disk.path) as disk:
+        assert disk.readPage(1).data == bytes([1]) * 4096
+
+def test_file_disk_rejects_bad_page_size(tmp_path):
+    with pytest.raises(ValueError):
+        FileDiskManager(tmp_path / "bad.db", page_size=1000)
+
+def test_buffer_manager_on_file_disk_writes_back_dirty_victims(file_disk):
+    bpm = BufferManager(no_of_frames=1, disk_manager=file_disk)
+    page = bpm.fetchPage(1)
+    page.data[:5] = b"hello"
+    bpm.unpinPage(1, is_dirty=True)
+    bpm.fetchPage(2)                  # evicts dirty page 1
+    bpm.unpinPage(2, is_dirty=False)
+    assert bytes(bpm.fetchPage(1).data[:5]) == b"hello"
+
+def test_mmap_disk_reads_are_zero_copy(tmp_path):
+    disk = MmapDiskManager(tmp_path / "mmap.db")
+    disk.writePage(Page(0, bytearray(b"a" * 4096)))
+    page = disk.readPage(0)
+    assert isinstance(page.data, memoryview)
+    disk.map[0:1] = b"z"
+    assert page.data[0:1] == b"z"
+    del page
+    disk.close()
+
+def test_mmap_disk_grows_and_persists(tmp_path):
+    disk = MmapDiskManager(tmp_path / "mmap.db", page_size=8192)
+    first = disk.readPage(0)
+    assert first is None
+    for page_id in range(5):
+        disk.writePage(Page(page_id, bytearray(bytes([page_id]) * 8192)))
+    assert disk.num_pages == 5 and disk.capacity >= 5
+    disk.sync(3)
+    disk.close()
+    with FileDiskManager(tmp_path / "mmap.db", page_size=8192) as reopened:
+        assert reopened.num_pages == 5
+        assert reopened.readPage(4).data == bytes([4]) * 8192
+
+def test_mmap_disk_reopens_after_crash_without_padding(tmp_path):
+    disk = MmapDiskManager(tmp_path / "mmap.db")
+    for _ in range(5):
+        page_id = disk.allocatePage()
+        disk.writePage(Page(page_id, bytearray(bytes([page_id]) * 4096)))
+    disk.sync()
+    assert (tmp_path / "mmap.db").stat().st_size > 5 * 4096   # padded, no close()
+    with MmapDiskManager(tmp_path / "mmap.db") as reopened:
+        assert reopened.num_pages == 5 and not reopened.hasPage(7)
+        assert reopened.readPage(4).data[0] == 4
+        assert reopened.allocatePage() == 5
+    del disk
+
+# -----------------------------
+# Preallocated frames
+# -----------------------------
+def test_page_table_maps_to_frame_indexes(bpm):
+    page1 = bpm.fetchPage(1)
+    page2 = bpm.fetchPage(2)
+    assert sorted(bpm.page_table.values()) == [0, 1]
+    assert bpm.buffer_pool[bpm.page_table[1]] is page1
+    assert page1.data.obj is bpm.frame_data
+    assert page2.data.obj is bpm.frame_data
+    assert len(bpm.frame_data) == 2 * bpm.page_size
+
+def test_evicted_frame_is_reused_for_new_page(bpm):
+    bpm.disk_manager.writePage(Page(3, bytearray(b"3" * bpm.page_size)))
+    bpm.fetchPage(1)
+    bpm.fetchPage(2)
+    frame_id = bpm.page_table[1]
+    bpm.unpinPage(1, is_dirty=False)
+    page3 = bpm.fetchPage(3)
+    assert bpm.page_table[3] == frame_id
+    assert bytes(page3.data) == b"3" * bpm.page_size
+
+def test_deleted_page_returns_frame_to_free_list(bpm):
+    bpm.fetchPage(1)
+    bpm.unpinPage(1, is_dirty=False)
+    bpm.deletePage(1)
+    assert len(bpm.free_frames) == 2
+
+def test_buffer_manager_on_mmap_disk_is_zero_copy(tmp_path):
+    disk = MmapDiskManager(tmp_path / "mmap.db")
+    disk.writePage(Page(0, bytearray(b"m" * 4096)))
+    bpm = BufferManager(no_of_frames=1, disk_manager=disk)
+    page = bpm.fetchPage(0)
+    assert page.data.obj is disk.map
+    bpm.unpinPage(0, is_dirty=False)
+    del page
+
+def test_mmap_buffer_manager_has_no_arena_and_syncs_flushed_pages(tmp_path):
+    disk = MmapDiskManager(tmp_path / "mmap.db")
+    for page_id in range(3):
+        disk.writePage(Page(page_id))
+    bpm = BufferManager(no_of_frames=2, disk_manager=disk)
+    assert bpm.frame_data is None and bpm.frame_arenas == []
+    synced = []
+    sync = disk.sync
+    disk.sync = lambda page_id=None, count=1: (synced.append(page_id), sync(page_id, count))
+    page = bpm.fetchPage(2)
+    page.data[:1] = b"z"
+    bpm.unpinPage(2, is_dirty=True)
+    bpm.flushPage(2)
+    assert synced == [2] and not page.dirty
+    bpm.resize(3)
+    assert bpm.frame_arenas == []
+    del page
+    disk.close()
+
+# -----------------------------
+# Concurrency
+# -----------------------------
+def test_concurrent_fetch_unpin_flush_stress(tmp_path):
+    import random
+    import sys
+    import threading
+
+    n_threads, n_pages, iterations = 8, 32, 300
+    disk = FileDiskManager(tmp_path / "stress.db")
+    for page_id in range(n_pages):
+        disk.writePage(Page(page_id))
+    bpm = BufferManager(no_of_frames=n_threads + 2, replacer=ClockReplacer(),
+                        disk_manager=disk)
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(iterations):
+                page_id = rng.randrange(n_pages)
+                page = bpm.fetchPage(page_id)
+                assert page.page_id == page_id
+                page.wLatch()
+                counter = int.from_bytes(page.data[:8], "little")
+                page.data[:8] = (counter + 1).to_bytes(8, "little")
+                page.wUnlatch()
+                if rng.random() < 0.1:
+                    bpm.flushPage(page_id)
+                bpm.unpinPage(page_id, is_dirty=True)
+        except Exception as e:        # surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    writer = BackgroundWriter(bpm, interval=0.001, dirty_ratio=0.3)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)       # force frequent thread switches
+    writer.start()
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        writer.stop()
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    bpm.flushAllPages()
+    total = sum(int.from_bytes(disk.readPage(p).data[:8], "little")
+                for p in range(n_pages))
+    assert total == n_threads * iterations
+    assert all(page.getPinCount() == 0 for page in bpm.getBufferPool())
+    assert bpm.dirty_pages == 0
+    disk.close()
+
+# -----------------------------
+# Background writer
+# -----------------------------
+def test_background_writer_cleans_unpinned_dirty_frames(bpm):
+    writer = BackgroundWriter(bpm)
+    bpm.fetchPage(1)
+    bpm.fetchPage(2)
+    bpm.unpinPage(1, is_dirty=True)   # unpinned and dirty
+    bpm.unpinPage(2, is_dirty=True)
+    bpm.fetchPage(2)                  # pinned again: skipped
+    assert writer.runOnce() == 1
+    assert bpm.dirty_pages == 1
+    bpm.fetchPage(3)                  # evicts the now clean page 1
+    assert bpm.getWriteCounters() == {"foreground": 0, "background": 1}
+
+def test_background_writer_wakes_on_dirty_ratio(bpm):
+    import time
+    writer = BackgroundWriter(bpm, interval=60, dirty_ratio=0.5)
+    writer.start()
+    try:
+        bpm.fetchPage(1)
+        bpm.unpinPage(1, is_dirty=True)   # 1 of 2 frames dirty: wake up
+        deadline = time.monotonic() + 5
+        while bpm.background_writes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        writer.stop()
+    assert bpm.background_writes == 1
+    assert not bpm.fetchPage(1).isDirty()
+
+def test_foreground_write_counted_for_dirty_victim(bpm):
+    bpm.fetchPage(1)
+    bpm.unpinPage(1, is_dirty=True)
+    bpm.fetchPage(2)
+    bpm.fetchPage(3)                  # evicts dirty page 1
+    assert bpm.getWriteCounters()["foreground"] == 1
+    assert bpm.dirty_pages == 0
+
+# -----------------------------
+# Read-ahead
+# -----------------------------
+@pytest.fixture
+def scan_bpm(tmp_path):
+    disk = FileDiskManager(tmp_path / "scan.db")
+    for page_id in range(32):
+        disk.writePage(Page(page_id, bytearray(bytes([page_id]) * 4096)))
+    bpm = BufferManager(no_of_frames=16, disk_manager=disk)
+    yield bpm
+    bpm.close()
+    disk.close()
+
+def test_prefetch_hint_loads_unpinned_pages(scan_bpm):
+    from concurrent.futures import wait
+    wait(scan_bpm.prefetch(range(4, 8)))
+    assert sorted(scan_bpm.getPageTable()) == [4, 5, 6, 7]
+    assert all(p.getPinCount() == 0 for p in scan_bpm.getBufferPool())
+    assert scan_bpm.getReplacer().replacerSize() == 4
+    page = scan_bpm.fetchPage(5)
+    assert bytes(page.data[:1]) == bytes([5])
+    assert scan_bpm.prefetch_hits == 1
+
+def test_prefetch_is_capped(scan_bpm):
+    from concurrent.futures import wait
+    scan_bpm.setReadAhead(window=0, max_fraction=0.25)   # cap: 4 of 16 frames
+    wait(scan_bpm.prefetch(range(0, 32)))
+    assert len(scan_bpm.getPageTable()) == 4
+
+def test_sequential_scan_triggers_read_ahead(scan_bpm):
+    scan_bpm.setReadAhead(window=4, trigger=2)
+    for page_id in (0, 1):
+        scan_bpm.fetchPage(page_id)
+        scan_bpm.unpinPage(page_id, is_dirty=False)
+    scan_bpm.close()                  # wait for the read-ahead workers
+    assert {2, 3, 4, 5} <= set(scan_bpm.getPageTable())
+    for page_id in range(2, 6):
+        scan_bpm.fetchPage(page_id)
+        scan_bpm.unpinPage(page_id, is_dirty=False)
+    assert scan_bpm.prefetch_hits == 4
+
+# -----------------------------
+# Batched fetch
+# -----------------------------
+class CountingDiskManager(FileDiskManager):
+    def __init__(self, path):
+        super().__init__(path)
+        self.single_reads = 0
+        self.vectored_reads = 0
+        self.single_writes = 0
+        self.vectored_writes = 0
+        self.syncs = 0
+
+    def readPageInto(self, page_id, buf):
+        self.single_reads += 1
+        return super().readPageInto(page_id, buf)
+
+    def readPagesInto(self, page_id, bufs):
+        self.vectored_reads += 1
+        return super().readPagesInto(page_id, bufs)
+
+    def writePage(self, page):
+        self.single_writes += 1
+        return super().writePage(page)
+
+    def writePages(self, pages):
+        self.vectored_writes += 1
+        return super().writePages(pages)
+
+    def sync(self):
+        self.syncs += 1
+        return super().sync()
+
+@pytest.fixture
+def counting_bpm(tmp_path):
+    disk = CountingDiskManager(tmp_path / "batch.db")
+    for page_id in range(16):
+        disk.writePage(Page(page_id, bytearray(bytes([page_id]) * 4096)))
+    yield BufferManager(no_of_frames=8, disk_manager=disk)
+    disk.close()
+
+def test_fetch_pages_coalesces_adjacent_misses(counting_bpm):
+    disk = counting_bpm.getDiskManager()
+    counting_bpm.fetchPage(2)                          # a hit in the batch
+    pages = counting_bpm.fetchPages([5, 4, 3, 2, 9])
+    assert [p.page_id for p in pages] == [5, 4, 3, 2, 9]
+    assert all(bytes(p.data[:1]) == bytes([p.page_id]) for p in pages)
+    assert disk.vectored_reads == 1                    # run 3-5
+    assert disk.single_reads == 2                      # page 2 earlier, page 9
+    assert counting_bpm.fetchPage(2).getPinCount() == 3
+
+def test_clean_victims_are_not_written_back(counting_bpm):
+    disk = counting_bpm.getDiskManager()
+    writes = disk.single_writes
+    for page_id in range(16):
+        counting_bpm.fetchPage(page_id)
+        counting_bpm.unpinPage(page_id, is_dirty=False)
+    assert disk.single_writes == writes and counting_bpm.foreground_writes == 0
+
+def test_unpin_pages(counting_bpm):
+    counting_bpm.fetchPages(range(4))
+    counting_bpm.unpinPages(range(4), is_dirty=True)
+    assert counting_bpm.dirty_pages == 4
+    assert counting_bpm.getReplacer().replacerSize() == 4
+    with pytest.raises(Exception):
+        counting_bpm.unpinPages([0, 99])
+
+def test_fetch_pages_missing_page_unpins_the_rest(counting_bpm):
+    with pytest.raises(Exception):
+        counting_bpm.fetchPages([1, 2, 99])
+    assert all(p.getPinCount() == 0 for p in counting_bpm.getBufferPool())
+    assert 99 not in counting_bpm.getPageTable()
+
+def test_fetch_pages_without_enough_victims_raises(counting_bpm):
+    counting_bpm.fetchPages(range(6))
+    with pytest.raises(Exception):
+        counting_bpm.fetchPages(range(6, 9))
+    assert sorted(counting_bpm.getPageTable()) == list(range(6))
+
+# -----------------------------
+# Checkpoint flush
+# -----------------------------
+def test_flush_all_pages_writes_sorted_dirty_runs(counting_bpm):
+    disk = counting_bpm.getDiskManager()
+    pages = counting_bpm.fetchPages([7, 1, 2, 3, 5, 6])
+    for page in pages:
+        page.data[:1] = b"x"
+    counting_bpm.unpinPages([7, 1, 2, 5, 6], is_dirty=True)
+    counting_bpm.unpinPage(3, is_dirty=False)          # clean: skipped
+    stats = counting_bpm.flushAllPages()
+    assert stats == {"pages": 5, "bytes": 5 * 4096, "writes": 2}
+    assert disk.vectored_writes == 2                   # 1-2 and 5-7
+    assert disk.syncs == 1
+    assert counting_bpm.dirty_pages == 0
+    assert disk.readPage(6).data[:1] == b"x"
+    assert disk.readPage(3).data[:1] == bytes([3])
+
+def test_flush_all_pages_with_nothing_dirty(counting_bpm):
+    counting_bpm.fetchPage(1)
+    assert counting_bpm.flushAllPages() == {"pages": 0, "bytes": 0, "writes": 0}
+
+def test_flush_all_pages_does_not_hold_latches_across_frames(bpm):
+    import threading
+    import time
+    bpm.fetchPage(1)
+    bpm.unpinPage(1, is_dirty=True)
+    page2 = bpm.fetchPage(2)
+    bpm.unpinPage(2, is_dirty=True)
+    bpm.fetchPage(2)
+    page2.wLatch()
+    flusher = threading.Thread(target=bpm.flushAllPages, daemon=True)
+
+    def latch_holder():
+        bpm.fetchPage(3)                  # evicts page 1 while page 2 is latched
+        page2.wUnlatch()
+        bpm.unpinPage(2, is_dirty=False)
+
+    holder = threading.Thread(target=latch_holder, daemon=True)
+    flusher.start()
+    time.sleep(0.1)
+    holder.start()
+    flusher.join(2)
+    holder.join(2)
+    assert not flusher.is_alive() and not holder.is_alive()
+    assert bpm.disk_manager.readPage(2) is not None
+    assert not page2.isDirty()
+
+# -----------------------------
+# Metrics
+# -----------------------------
+def test_metrics_disabled_by_default(bpm):
+    bpm.fetchPage(1)
+    assert bpm.metrics is None
+    assert bpm.stats() == {}
+
+def test_metrics_counters(bpm):
+    bpm.enableMetrics()
+    bpm.fetchPage(1)                  # miss
+    bpm.fetchPage(1)                  # hit
+    bpm.fetchPage(2)                  # miss
+    with pytest.raises(Exception):
+        bpm.fetchPage(3)              # everything pinned
+    bpm.unpinPage(1, is_dirty=False)
+    bpm.unpinPage(1, is_dirty=True)
+    bpm.fetchPage(3)                  # evicts dirty page 1
+    bpm.flushPage(3)
+    stats = bpm.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["dirty_writebacks"] == 1
+    assert stats["pin_failures"] == 1
+    assert stats["peak_pinned_frames"] == 2
+    assert stats["latency"]["fetch_hit"]["count"] == 1
+    assert stats["latency"]["fetch_miss"]["count"] == 3
+    assert stats["latency"]["flush"]["count"] == 1
+
+def test_metrics_reset(bpm):
+    bpm.enableMetrics()
+    bpm.fetchPage(1)
+    bpm.resetStats()
+    stats = bpm.stats()
+    assert stats["misses"] == 0
+    assert stats["peak_pinned_frames"] == 1     # page 1 is still pinned
+    assert stats["latency"]["fetch_miss"]["count"] == 0
+
+def test_metrics_count_evictions_by_cause(scan_bpm):
+    scan_bpm.enableMetrics()
+    scan(scan_bpm, range(16), None)                # fills the pool
+    scan(scan_bpm, range(16, 20), None)            # 4 replacer victims
+    ring = RingBuffer(size=2)
+    scan(scan_bpm, range(20, 26), ring)            # 2 more to fill the ring, then 4 reuses
+    scan_bpm.resize(8)
+    stats = scan_bpm.stats()
+    assert (stats["evictions"], stats["ring_evictions"], stats["resize_evictions"]) == (6, 4, 8)
+
+def test_metrics_skipped_prefetch_is_not_a_pin_failure(scan_bpm):
+    scan_bpm.enableMetrics()
+    for page_id in range(16):
+        scan_bpm.fetchPage(page_id)
+    assert not scan_bpm._prefetch_page(20)         # no frame: skipped
+    assert scan_bpm.stats()["pin_failures"] == 0
+    with pytest.raises(Exception, match="No victim"):
+        scan_bpm.fetchPage(20)
+    with pytest.raises(Exception, match="No victim"):
+        scan_bpm.newPage()
+    assert scan_bpm.stats()["pin_failures"] == 2
+
+def test_latency_histogram_percentiles():
+    from storage_manager.metrics import LatencyHistogram
+    histogram = LatencyHistogram()
+    for ns in [100] * 99 + [10_000]:
+        histogram.record(ns)
+    snapshot = histogram.snapshot()
+    assert snapshot["p50_ns"] == 128
+    assert snapshot["p99_ns"] == 128
+    assert snapshot["max_ns"] == 10_000
+    assert snapshot["buckets"] == {128: 99, 16384: 1}
+
+# -----------------------------
+# Tracing
+# -----------------------------
+@pytest.fixture
+def traced_bpm():
+    tracer = Tracer()
+    bpm = BufferManager(no_of_frames=2, disk_manager=DiskManager(tracer=tracer), tracer=tracer)
+    for i in range(1, 4):
+        bpm.disk_manager.writePage(Page(i))
+    return bpm
+
+def test_tracer_inactive_without_subscribers(traced_bpm):
+    assert not traced_bpm.tracer.active
+    ring = traced_bpm.tracer.subscribe(RingBufferSink())
+    assert traced_bpm.tracer.active
+    traced_bpm.tracer.unsubscribe(ring)
+    assert not traced_bpm.tracer.active
+
+def test_disk_manager_does_not_print(traced_bpm, capsys):
+    traced_bpm.fetchPage(1)
+    traced_bpm.disk_manager.deletePage(3)
+    assert capsys.readouterr().out == ""
+
+def test_trace_events_from_disk_and_buffer(traced_bpm):
+    ring = traced_bpm.tracer.subscribe(RingBufferSink())
+    traced_bpm.fetchPage(1)                     # miss: disk read
+    traced_bpm.fetchPage(1)                     # hit
+    traced_bpm.fetchPage(2)
+    traced_bpm.unpinPage(1, is_dirty=True)
+    traced_bpm.unpinPage(1, is_dirty=False)
+    traced_bpm.fetchPage(3)                     # evicts dirty page 1
+    traced_bpm.flushPage(3)
+    ops = [(e.source, e.op, e.page_id) for e in ring.events()]
+    assert ops[:3] == [("disk", "read", 1), ("buffer", "fetch_miss", 1), ("buffer", "fetch_hit", 1)]
+    assert ("buffer", "evict", 1) in ops
+    assert ("disk", "write", 1) in ops
+    assert ops[-2:] == [("disk", "write", 3), ("buffer", "flush", 3)]
+    evict = next(e for e in ring.events() if e.op == "evict")
+    assert evict.level == INFO and evict.bytes == 4096
+
+def test_trace_records_batches_and_unpins(traced_bpm):
+    ring = traced_bpm.tracer.subscribe(RingBufferSink())
+    traced_bpm.fetchPage(1)
+    traced_bpm.fetchPages([1, 2])
+    traced_bpm.unpinPages([1, 2])
+    traced_bpm.unpinPage(1, is_dirty=True)
+    ops = [(e.op, e.page_id) for e in ring.events() if e.source == "buffer"]
+    assert ops == [("fetch_miss", 1), ("fetch_hit", 1), ("fetch_miss", 2),
+                   ("unpin", 1), ("unpin", 2), ("unpin", 1)]
+
+def test_trace_level_gating(traced_bpm):
+    info = traced_bpm.tracer.subscribe(RingBufferSink(), level=INFO)
+    debug = traced_bpm.tracer.subscribe(RingBufferSink(), level=DEBUG)
+    traced_bpm.fetchPage(1)
+    traced_bpm.flushPage(1)
+    assert [e.op for e in info.events()] == ["flush"]
+    assert len(debug.events()) > len(info.events())
+
+def test_json_lines_sink(tmp_path):
+    import json
+    tracer = Tracer()
+    sink = tracer.subscribe(JsonLinesSink(tmp_path / "trace.jsonl"))
+    with FileDiskManager(tmp_path / "db", tracer=tracer) as disk:
+        disk.writePage(Page(0))
+        bpm = BufferManager(no_of_frames=2, disk_manager=disk, tracer=tracer)
+        page = bpm.fetchPage(0)
+        page.data[:2] = b"hi"
+        bpm.unpinPage(0, is_dirty=True)
+        bpm.flushAllPages()
+    sink.close()
+    events = [json.loads(line) for line in open(tmp_path / "trace.jsonl")]
+    assert {"source": "buffer", "op": "flush_all"}.items() <= events[-1].items()
+    assert any(e["op"] == "sync" and e["source"] == "disk" for e in events)
+
+# -----------------------------
+# Page allocation
+# -----------------------------
+def test_allocator_reuses_lowest_freed_id():
+    allocator = PageAllocator()
+    assert [allocator.allocatePage() for _ in range(4)] == [0, 1, 2, 3]
+    assert allocator.deallocatePage(2) and allocator.deallocatePage(1)
+    assert not allocator.deallocatePage(1)
+    assert not allocator.isAllocated(1)
+    assert [allocator.allocatePage() for _ in range(3)] == [1, 2, 4]
+    allocator.markAllocated(10)                     # leaves 5..9 free
+    assert allocator.allocatePage() == 5
+    assert allocator.allocated == 7
+
+def test_allocator_keeps_gaps_as_ranges():
+    allocator = PageAllocator()
+    allocator.markAllocated(10**7)
+    assert allocator._free == [(0, 10**7)]
+    allocator.markAllocated(0)
+    allocator.markAllocated(2)
+    assert [allocator.allocatePage() for _ in range(3)] == [1, 3, 4]
+    assert allocator._free == [(5, 10**7)]
+
+def test_allocator_bytes_roundtrip():
+    allocator = PageAllocator(20)
+    allocator.deallocatePage(3)
+    allocator.deallocatePage(4)
+    copy = PageAllocator.fromBytes(allocator.toBytes())
+    assert copy.end == 20 and copy.allocated == 18
+    assert copy._free == [(3, 5)]
+    assert [copy.allocatePage() for _ in range(3)] == [3, 4, 20]
+
+def test_disk_manager_delete_frees_page_id(bpm):
+    bpm.disk_manager.deletePage(2)
+    assert not bpm.disk_manager.hasPage(2)
+    assert bpm.disk_manager.allocatePage() == 0      # 0 was never written
+    assert bpm.disk_manager.allocatePage() == 2
+    assert bytes(bpm.disk_manager.readPage(2).data) == bytes(4096)
+
+def test_new_page_allocates_zeroed_dirty_page(tmp_path):
+    with FileDiskManager(tmp_path / "db") as disk:
+        bpm = BufferManager(no_of_frames=2, disk_manager=disk)
+        pages = [bpm.newPage() for _ in range(2)]
+        assert [p.page_id for p in pages] == [0, 1]
+        assert pages[0].isDirty() and bytes(pages[0].data) == bytes(4096)
+        pages[0].data[:3] = b"old"
+        bpm.unpinPage(0, is_dirty=True)
+        bpm.flushAllPages()
+        bpm.deletePage(0)
+        page = bpm.newPage()                         # recycles slot 0
+        assert page.page_id == 0 and bytes(page.data) == bytes(4096)
+        assert disk.num_pages == 2
+
+def test_new_page_without_free_frame_releases_id(bpm):
+    bpm.fetchPage(1)
+    bpm.fetchPage(2)
+    with pytest.raises(Exception):
+        bpm.newPage()
+    assert not bpm.disk_manager.hasPage(0)
+
+def test_free_space_bitmap_persists(tmp_path):
+    with FileDiskManager(tmp_path / "db") as disk:
+        for i in range(4):
+            disk.writePage(Page(i))
+        disk.deletePage(1)
+    with FileDiskManager(tmp_path / "db") as disk:
+        assert not disk.hasPage(1) and disk.hasPage(3)
+        assert disk.allocatePage() == 1
+        assert disk.allocatePage() == 4
+
+# -----------------------------
+# Write-ahead log
+# -----------------------------
+def test_wal_group_commit_shares_fsyncs(tmp_path):
+    import threading
+    wal = WriteAheadLog(tmp_path / "wal", commit_delay=0.002)
+    barrier = threading.Barrier(8)
+
+    def worker(i):
+        barrier.wait()
+        for j in range(10):
+            lsn = wal.append(1, i, bytes([j]) * 16)
+            assert wal.commit() >= lsn
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = wal.stats()
+    assert stats["appends"] == stats["flush_requests"] == 80
+    assert stats["fsyncs"] < 80
+    assert len(list(wal.records())) == 80
+    wal.close()
+
+def test_wal_rule_forces_log_before_eviction(tmp_path):
+    wal = WriteAheadLog(tmp_path / "wal")
+    bpm = BufferManager(no_of_frames=1, wal=wal)
+    for i in range(2):
+        bpm.disk_manager.writePage(Page(i))
+    page = bpm.fetchPage(0)
+    page.data[:1] = b"x"
+    bpm.unpinPage(0, is_dirty=True)
+    lsn = page.lsn
+    assert lsn > wal.durable_lsn == 0              # logged, not yet durable
+    bpm.fetchPage(1)                               # evicts dirty page 0
+    assert wal.durable_lsn >= lsn
+    assert bytes(bpm.disk_manager.readPage(0).data[:1]) == b"x"
+
+def test_wal_rejects_zero_copy_disk_manager(tmp_path):
+    with MmapDiskManager(tmp_path / "db") as disk, WriteAheadLog(tmp_path / "wal") as wal:
+        with pytest.raises(ValueError):
+            BufferManager(no_of_frames=4, disk_manager=disk, wal=wal)
+
+def test_wal_recovery_redoes_committed_pages(tmp_path):
+    disk = FileDiskManager(tmp_path / "db")
+    wal = WriteAheadLog(tmp_path / "wal")
+    bpm = BufferManager(no_of_frames=4, disk_manager=disk, wal=wal)
+    for i in range(3):
+        page = bpm.newPage()
+        page.data[:5] = b"page%d" % i
+        bpm.unpinPage(page.page_id, is_dirty=True)
+    bpm.commit()
+    disk.close()                                   # crash: nothing flushed
+    wal.close()
+
+    with FileDiskManager(tmp_path / "db") as disk, WriteAheadLog(tmp_path / "wal") as wal:
+        assert wal.recover(disk) == 3
+        assert [bytes(disk.readPage(i).data[:5]) for i in range(3)] == [b"page0", b"page1", b"page2"]
+
+def test_wal_recovery_keeps_deleted_pages_deleted(tmp_path):
+    disk = FileDiskManager(tmp_path / "db")
+    wal = WriteAheadLog(tmp_path / "wal")
+    bpm = BufferManager(no_of_frames=4, disk_manager=disk, wal=wal)
+    for value in (7, 8):
+        page = bpm.newPage()
+        page.data[0] = value
+        bpm.unpinPage(page.page_id, is_dirty=True)
+    bpm.commit()
+    bpm.deletePage(0)
+    bpm.flushAllPages()
+    assert not disk.hasPage(0)
+    disk.close()                                   # crash
+    wal.close()
+
+    with FileDiskManager(tmp_path / "db") as disk, WriteAheadLog(tmp_path / "wal") as wal:
+        assert wal.recover(disk) == 1              # only page 1's image
+        assert not disk.hasPage(0) and disk.readPage(1).data[0] == 8
+        assert disk.allocatePage() == 0
+
+def test_wal_truncates_torn_tail(tmp_path):
+    with WriteAheadLog(tmp_path / "wal") as wal:
+        wal.appendPage(0, bytes(64))
+        end = wal.commit()
+    with open(tmp_path / "wal", "ab") as f:
+        f.write(b"\x01\x02\x03 torn record")
+    with WriteAheadLog(tmp_path / "wal") as wal:
+        assert wal.end_lsn == wal.durable_lsn == end
+        assert len(list(wal.records())) == 1
+
+# -----------------------------
+# Checkpoints
+# -----------------------------
+@pytest.fixture
+def wal_bpm(tmp_path):
+    disk = FileDiskManager(tmp_path / "db")
+    wal = WriteAheadLog(tmp_path / "wal")
+    bpm = BufferManager(no_of_frames=8, disk_manager=disk, wal=wal)
+    for _ in range(6):
+        page = bpm.newPage()
+        bpm.unpinPage(page.page_id, is_dirty=False)
+    bpm.flushAllPages()
+    yield bpm
+    disk.close()
+    wal.close()
+
+def write_page(bpm, page_id, payload):
+    page = bpm.fetchPage(page_id)
+    page.data[:len(payload)] = payload
+    bpm.unpinPage(page_id, is_dirty=True)
+    return page
+
+def test_dirty_page_table_keeps_first_rec_lsn(wal_bpm):
+    page = write_page(wal_bpm, 1, b"a")
+    first = wal_bpm.getDirtyPageTable()[1]
+    write_page(wal_bpm, 1, b"b")
+    write_page(wal_bpm, 2, b"c")
+    table = wal_bpm.getDirtyPageTable()
+    assert table[1] == first < page.lsn == table[2]
+    wal_bpm.flushPage(1)
+    assert 1 not in wal_bpm.getDirtyPageTable()
+
+def test_checkpoint_flushes_dirty_pages_and_moves_redo_lsn(wal_bpm):
+    for page_id in range(4):
+        write_page(wal_bpm, page_id, b"v1")
+    wal_bpm.commit()
+    checkpointer = Checkpointer(wal_bpm, batch_pages=2, batch_delay=0)
+    redo_lsn = checkpointer.checkpoint()
+    assert checkpointer.pages_written == 4
+    assert wal_bpm.getDirtyPageTable() == {} and wal_bpm.dirty_pages == 0
+    assert wal_bpm.wal.lastCheckpoint() == {}
+    assert redo_lsn == wal_bpm.wal.redo_lsn > 0
+
+    write_page(wal_bpm, 3, b"v2")
+    wal_bpm.commit()
+    assert wal_bpm.wal.recover(wal_bpm.disk_manager) == 1     # only the newer record
+    assert bytes(wal_bpm.disk_manager.readPage(3).data[:2]) == b"v2"
+
+def test_checkpoint_record_lists_pages_dirtied_before_it(wal_bpm):
+    write_page(wal_bpm, 0, b"x")
+    checkpointer = Checkpointer(wal_bpm)
+    table = checkpointer.logCheckpoint()
+    assert wal_bpm.wal.lastCheckpoint() == table == wal_bpm.getDirtyPageTable()
+    assert wal_bpm.wal.redo_lsn == table[0]
+
+def test_checkpoint_truncates_log_behind_redo_lsn(tmp_path, wal_bpm):
+    wal = wal_bpm.wal
+    for i in range(20):
+        write_page(wal_bpm, i % 6, b"v%d" % i)
+    wal_bpm.commit()
+    size = (tmp_path / "wal").stat().st_size
+    redo_lsn = Checkpointer(wal_bpm, truncate_bytes=0).checkpoint()
+    assert wal.base_lsn == redo_lsn and wal.stats()["truncations"] == 1
+    assert (tmp_path / "wal").stat().st_size < size // 10
+    write_page(wal_bpm, 2, b"new")
+    end = wal_bpm.commit()
+    assert [page_id for _, _, page_id, _, _ in wal.records()] == [None, 2]
+    wal.close()
+
+    with WriteAheadLog(tmp_path / "wal") as wal:
+        assert wal.end_lsn == end and wal.redo_lsn == redo_lsn
+        assert wal.lastCheckpoint() == {}
+        assert wal.recover(wal_bpm.disk_manager) == 1
+
+def test_wal_tail_scan_starts_at_checkpoint(tmp_path, wal_bpm):
+    write_page(wal_bpm, 0, b"x")
+    Checkpointer(wal_bpm, truncate_bytes=None).checkpoint()
+    write_page(wal_bpm, 1, b"y")
+    end = wal_bpm.commit()
+    wal_bpm.wal.close()
+    with open(tmp_path / "wal", "r+b") as f:       # damage a record before it
+        f.seek(8 + 20)
+        f.write(b"garbage")
+    with WriteAheadLog(tmp_path / "wal") as wal:
+        assert wal.end_lsn == end and wal.lastCheckpoint() == {}
+
+def test_wal_ignores_master_past_the_log(tmp_path, wal_bpm):
+    write_page(wal_bpm, 0, b"x")
+    Checkpointer(wal_bpm, truncate_bytes=None).checkpoint()
+    wal_bpm.wal.close()
+    (tmp_path / "wal").unlink()                    # the log was lost
+    with WriteAheadLog(tmp_path / "wal") as wal:
+        assert wal.checkpoint_lsn is None and wal.redo_lsn == wal.end_lsn == 0
+        assert wal.lastCheckpoint() is None
+
+def test_background_checkpoints_while_fetching(wal_bpm):
+    import threading
+    import time
+    checkpointer = Checkpointer(wal_bpm, interval=0.001, batch_pages=1, batch_delay=0.001)
+    stop = threading.Event()
+
+    def worker():
+        i = 0
+        while not stop.is_set():
+            write_page(wal_bpm, i % 6, i.to_bytes(4, "little"))
+            i += 1
+
+    thread = threading.Thread(target=worker)
+    checkpointer.start()
+    thread.start()
+    deadline = time.monotonic() + 10
+    while checkpointer.checkpoints < 2 and time.monotonic() < deadline:
+        stop.wait(0.001)
+    stop.set()
+    thread.join()
+    checkpointer.stop()
+    assert checkpointer.checkpoints >= 2
+    wal_bpm.commit()
+    checkpointer.checkpoint()
+    assert wal_bpm.getDirtyPageTable() == {}
+
+# -----------------------------
+# Sharded buffer pool
+# -----------------------------
+@pytest.fixture
+def sharded_bpm():
+    bpm = ShardedBufferManager(no_of_frames=10, shards=4)
+    for i in range(16):
+        bpm.disk_manager.writePage(Page(i))
+    return bpm
+
+def test_sharded_pool_splits_frames(sharded_bpm):
+    assert [shard.buffer_total_no_of_frames for shard in sharded_bpm.shards] == [3, 3, 2, 2]
+    assert all(shard.disk_manager is sharded_bpm.disk_manager for shard in sharded_bpm.shards)
+    with pytest.raises(ValueError):
+        ShardedBufferManager(no_of_frames=2, shards=4)
+
+def test_sharded_pool_routes_pages(sharded_bpm):
+    page = sharded_bpm.fetchPage(5)
+    assert page.page_id == 5
+    assert 5 in sharded_bpm.getShard(5).getPageTable()
+    assert sharded_bpm.getPageTable() == [5]
+    assert sharded_bpm.getShard(5) is sharded_bpm.shards[1]
+    page.data[:1] = b"z"
+    sharded_bpm.unpinPage(5, is_dirty=True)
+    assert sharded_bpm.flushPage(5)
+    assert bytes(sharded_bpm.disk_manager.readPage(5).data[:1]) == b"z"
+
+def test_sharded_pool_evicts_within_shard(sharded_bpm):
+    for page_id in (0, 4, 8):                      # all in shard 0 (3 frames)
+        sharded_bpm.fetchPage(page_id)
+    with pytest.raises(Exception):
+        sharded_bpm.fetchPage(12)                  # shard 0 is full of pinned pages
+    sharded_bpm.fetchPage(1)                       # other shards still have room
+
+def test_sharded_pool_batch_and_new_page(sharded_bpm):
+    pages = sharded_bpm.fetchPages([3, 0, 1, 2])
+    assert [p.page_id for p in pages] == [3, 0, 1, 2]
+    sharded_bpm.unpinPages([0, 1, 2, 3], is_dirty=True)
+    assert sharded_bpm.flushAllPages()["pages"] == 4
+    page = sharded_bpm.newPage()
+    assert page.page_id == 16 and page.isDirty()
+    assert 16 in sharded_bpm.getShard(16).getPageTable()
+
+# -----------------------------
+# Ring buffer access strategy
+# -----------------------------
+def scan(bpm, page_ids, strategy):
+    for page_id in page_ids:
+        page = bpm.fetchPage(page_id, strategy=strategy)
+        assert page.page_id == page_id
+        bpm.unpinPage(page_id, is_dirty=False)
+
+def test_ring_scan_keeps_hot_set(scan_bpm):
+    scan(scan_bpm, range(8), None)                 # hot set
+    ring = RingBuffer(size=4)
+    scan(scan_bpm, range(8, 32), ring)
+    resident = set(scan_bpm.getPageTable())
+    assert set(range(8)) <= resident
+    assert resident - set(range(8)) == set(range(28, 32))
+    assert scan_bpm.replacer.replacerSize() == 8
+    assert len(scan_bpm.ring_frames) == 4
+
+def test_ring_page_fetched_normally_leaves_ring(scan_bpm):
+    ring = RingBuffer(size=2)
+    scan(scan_bpm, [20, 21], ring)
+    scan(scan_bpm, [21], None)
+    assert len(scan_bpm.ring_frames) == 1
+    scan(scan_bpm, [22, 23], ring)                 # refills the lost slot
+    assert 21 in scan_bpm.getPageTable()
+    assert len(scan_bpm.ring_frames) == 2
+
+def test_ring_release_returns_frames(scan_bpm):
+    with RingBuffer(size=4) as ring:
+        scan(scan_bpm, range(10), ring)
+        assert scan_bpm.replacer.replacerSize() == 0
+    assert scan_bpm.ring_frames == {}
+    assert scan_bpm.replacer.replacerSize() == 4
+
+def test_ring_hands_over_pinned_frames(scan_bpm):
+    ring = RingBuffer(size=2)
+    pages = [scan_bpm.fetchPage(page_id, strategy=ring) for page_id in range(3)]
+    assert len(scan_bpm.ring_frames) == 2
+    scan_bpm.unpinPages(range(3))
+    assert scan_bpm.replacer.replacerSize() == 1   # the frame that left the ring
+    assert [p.page_id for p in pages] == [0, 1, 2]
+
+def test_fetch_pages_with_ring(scan_bpm):
+    ring = RingBuffer(size=4)
+    for start in range(0, 32, 4):
+        pages = scan_bpm.fetchPages(range(start, start + 4), strategy=ring)
+        assert [p.data[0] for p in pages] == list(range(start, start + 4))
+        scan_bpm.unpinPages(range(start, start + 4))
+    assert len(scan_bpm.getPageTable()) == 4
+
+def test_pool_steals_unpinned_ring_frames(bpm):
+    ring = RingBuffer(size=2)
+    scan(bpm, [1, 2], ring)                        # ring holds both frames
+    bpm.fetchPage(3)                               # nothing in the replacer
+    assert 3 in bpm.getPageTable()
+
+# -----------------------------
+# Resizing
+# -----------------------------
+def test_resize_grow_adds_frames(bpm):
+    bpm.fetchPage(1)
+    bpm.fetchPage(2)
+    assert bpm.resize(3) == 3
+    page3 = bpm.fetchPage(3)                       # no victim needed
+    assert page3.page_id == 3
+    assert sorted(bpm.getPageTable()) == [1, 2, 3]
+
+def test_resize_shrink_writes_back_dirty_victims(scan_bpm):
+    for page_id in range(16):
+        page = scan_bpm.fetchPage(page_id)
+        page.data[1] = 0xAB
+        scan_bpm.unpinPage(page_id, is_dirty=True)
+    assert scan_bpm.resize(4) == 4
+    assert sorted(scan_bpm.getPageTable()) == [12, 13, 14, 15]   # LRU kept the newest
+    assert scan_bpm.dirty_pages == 4
+    assert len(scan_bpm.frame_arenas) == 1
+    for page_id in range(12):
+        assert scan_bpm.disk_manager.readPage(page_id).data[:2] == bytes([page_id, 0xAB])
+
+def test_resize_never_waits_for_pinned_pages(bpm):
+    bpm.fetchPage(1)
+    bpm.fetchPage(2)
+    assert bpm.resize(1) == 2                      # both pinned: nothing to evict
+    bpm.unpinPage(2, is_dirty=False)
+    assert bpm.resize(1) == 1
+    assert bpm.getPageTable() == [1]
+    with pytest.raises(ValueError):
+        bpm.resize(0)
+
+def test_resize_reuses_retired_frames(scan_bpm):
+    scan(scan_bpm, range(16), None)
+    scan_bpm.resize(8)
+    assert len(scan_bpm.retired_frames) == 8
+    scan_bpm.resize(12)
+    assert len(scan_bpm.retired_frames) == 4
+    assert len(scan_bpm.buffer_pool) == 16
+    scan(scan_bpm, range(12), None)
+    assert len(scan_bpm.getPageTable()) == 12
+    assert all(scan_bpm.fetchPage(page_id).data[0] == page_id for page_id in range(12))
+
+def test_resize_updates_arc_capacity():
+    bpm = BufferManager(no_of_frames=4, replacer=ARCReplacer(4))
+    bpm.resize(8)
+    assert bpm.replacer.capacity == 8
+
+def test_sharded_replacer_factory_gets_shard_frames():
+    bpm = ShardedBufferManager(no_of_frames=10, shards=4, replacer_factory=ARCReplacer)
+    assert [shard.replacer.capacity for shard in bpm.shards] == [3, 3, 2, 2]
+    bpm = ShardedBufferManager(no_of_frames=10, shards=4, replacer_factory=LRUKReplacer)
+    assert all(shard.replacer.k == 2 for shard in bpm.shards)
+
+def test_sharded_resize_splits_frames(sharded_bpm):
+    assert sharded_bpm.resize(14) == 14
+    assert [shard.buffer_total_no_of_frames for shard in sharded_bpm.shards] == [4, 4, 3, 3]
+
+# -----------------------------
+# Shared-memory buffer pool
+# -----------------------------
+@pytest.fixture
+def shared_bpm(tmp_path):
+    import multiprocessing
+    path = tmp_path / "shared.db"
+    with FileDiskManager(path) as disk:
+        for page_id in range(32):
+            disk.writePage(Page(page_id, bytearray(bytes([page_id]) * 4096)))
+    bpm = SharedBufferManager(8, path, shards=2, mp_context=multiprocessing.get_context("spawn"))
+    yield bpm
+    bpm.close()
+
+def test_shared_pool_fetch_and_evict(shared_bpm):
+    page = shared_bpm.fetchPage(5)
+    assert (page.page_id, page.pin_count, page.data[0]) == (5, 1, 5)
+    assert shared_bpm.fetchPage(5) is page
+    assert page.pin_count == 2
+    shared_bpm.unpinPage(5, is_dirty=False)
+    shared_bpm.unpinPage(5, is_dirty=False)
+    for page_id in range(0, 32, 2):                 # shard 0 has 4 frames
+        shared_bpm.fetchPage(page_id)
+        shared_bpm.unpinPage(page_id, is_dirty=False)
+    assert shared_bpm.stats()["evictions"] == 12
+    assert len(shared_bpm.getPageTable()) == 5
+    del page
+
+def test_shared_pool_needs_an_unpinned_frame(shared_bpm):
+    for page_id in (0, 2, 4, 6):
+        shared_bpm.fetchPage(page_id)
+    with pytest.raises(Exception, match="No victim"):
+        shared_bpm.fetchPage(8)
+    with pytest.raises(Exception, match="not found"):
+        shared_bpm.fetchPage(33)
+    with pytest.raises(Exception, match="Page not found in buffer"):
+        shared_bpm.unpinPage(8, is_dirty=False)
+
+def test_shared_pool_writes_back_dirty_pages(shared_bpm):
+    page = shared_bpm.fetchPage(1)
+    page.data[1] = 0xAB
+    shared_bpm.unpinPage(1, is_dirty=True)
+    assert page.dirty
+    del page
+    for page_id in (3, 5, 7, 9):                    # evicts page 1 from shard 1
+        shared_bpm.fetchPage(page_id)
+        shared_bpm.unpinPage(page_id, is_dirty=False)
+    assert 1 not in shared_bpm.getPageTable()
+    assert shared_bpm.disk_manager.readPage(1).data[:2] == bytes([1, 0xAB])
+    page = shared_bpm.fetchPage(3)
+    page.data[1] = 0xCD
+    shared_bpm.unpinPage(3, is_dirty=True)
+    assert shared_bpm.flushAllPages()["pages"] == 1
+    assert not page.dirty
+    del page
+
+def test_shared_pool_page_table_survives_churn(shared_bpm):
+    import random
+    rng = random.Random(3)
+    for _ in range(500):
+        page_id = rng.randrange(32)
+        shared_bpm.fetchPage(page_id)
+        shared_bpm.unpinPage(page_id, is_dirty=rng.random() < 0.3)
+        for frame_id, pid in enumerate(shared_bpm.page_ids):
+            if pid != -1:
+                assert shared_bpm._lookup(shared_bpm.getShard(pid), pid) == frame_id
+    assert len(shared_bpm.getPageTable()) == 8
+
+def _shared_pool_worker(bpm, page_id):
+    page = bpm.fetchPage(page_id)
+    page.data[1] = 0xEE
+    bpm.unpinPage(page_id, is_dirty=True)
+    del page
+    bpm.close()
+
+def test_shared_pool_is_shared_between_processes(shared_bpm):
+    shared_bpm.fetchPage(4)
+    shared_bpm.unpinPage(4, is_dirty=False)
+    import multiprocessing
+    workers = [multiprocessing.get_context("spawn").Process(
+                   target=_shared_pool_worker, args=(shared_bpm, page_id))
+               for page_id in (4, 6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0, 0]
+    stats = shared_bpm.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)    # page 4 was cached once
+    page = shared_bpm.fetchPage(6)                       # loaded by a worker
+    assert (page.data[0], page.data[1], page.dirty) == (6, 0xEE, True)
+    del page
+
+@pytest.mark.skipif("fork" not in __import__("multiprocessing").get_all_start_methods(),
+                    reason="needs the fork start method")
+def test_shared_pool_forked_workers_do_not_unlink_it(tmp_path):
+    import multiprocessing
+    ctx = multiprocessing.get_context("fork")
+    path = tmp_path / "shared.db"
+    with FileDiskManager(path) as disk:
+        for page_id in range(8):
+            disk.writePage(Page(page_id, bytearray(bytes([page_id]) * 4096)))
+    bpm = SharedBufferManager(8, path, shards=2, mp_context=ctx)
+    workers = [ctx.Process(target=_shared_pool_worker, args=(bpm, page_id))
+               for page_id in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0, 0, 0, 0]
+    page = bpm.fetchPage(3)
+    assert page.data[:2] == bytes([3, 0xEE])
+    bpm.unpinPage(3, is_dirty=False)
+    del page
+    bpm.close()
+
+# -----------------------------
+# asyncio front end
+# -----------------------------
+def test_try_fetch_page_only_pins_loaded_pages(counting_bpm):
+    assert counting_bpm.tryFetchPage(3) is None
+    assert counting_bpm.getDiskManager().single_reads == 0
+    counting_bpm.fetchPage(3)
+    assert counting_bpm.tryFetchPage(3).getPinCount() == 2
+
+def test_async_fetch_shares_inflight_reads(counting_bpm):
+    import asyncio
+    abpm = AsyncBufferManager(counting_bpm)
+
+    async def main():
+        return await asyncio.gather(*[abpm.fetchPage(3) for _ in range(5)])
+
+    pages = asyncio.run(main())
+    assert all(page is pages[0] for page in pages)
+    assert pages[0].getPinCount() == 5
+    assert counting_bpm.getDiskManager().single_reads == 1
+    assert abpm.reads == {}
+
+def test_async_pinned_unpins_and_flushes(counting_bpm):
+    import asyncio
+    abpm = AsyncBufferManager(counting_bpm)
+
+    async def main():
+        async with abpm.pinned(4, write=True) as page:
+            page.data[1] = 0xAB
+            assert page.getPinCount() == 1
+        assert page.getPinCount() == 0 and page.isDirty()
+        await abpm.flushPage(4)
+        with pytest.raises(Exception, match="not found"):
+            await abpm.fetchPage(99)
+
+    asyncio.run(main())
+    assert counting_bpm.getDiskManager().readPage(4).data[:2] == bytes([4, 0xAB])
+
+def test_async_cancelled_fetch_releases_its_pin(counting_bpm):
+    import asyncio
+    import threading
+    disk = counting_bpm.getDiskManager()
+    gate = threading.Event()
+    read = disk.readPageInto
+    disk.readPageInto = lambda page_id, buf: gate.wait() and read(page_id, buf)
+    abpm = AsyncBufferManager(counting_bpm)
+
+    async def main():
+        leader = asyncio.create_task(abpm.fetchPage(3))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(abpm.fetchPage(3))
+        await asyncio.sleep(0)
+        leader.cancel()
+        gate.set()
+        page = await follower
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return page
+
+    page = asyncio.run(main())
+    assert page.getPinCount() == 1
+    assert abpm.shared_reads == 1
+
+# -----------------------------
+# Pin guards and pin tracking
+# -----------------------------
+def test_pinned_guard_unpins_and_marks_dirty(bpm):
+    with bpm.pinned(1, write=True) as page:
+        assert page.getPinCount() == 1
+    assert page.getPinCount() == 0 and page.isDirty()
+    with bpm.pinned(2) as page:
+        pass
+    assert page.getPinCount() == 0 and not page.isDirty()
+
+def test_pinned_guard_unpins_when_body_raises(bpm):
+    with pytest.raises(ValueError):
+        with bpm.pinned(1, write=True) as page:
+            raise ValueError
+    assert page.getPinCount() == 0 and page.isDirty()
+    assert bpm.getReplacer().replacerSize() == 1
+
+def test_pin_tracking_reports_held_pins(bpm):
+    bpm.enablePinTracking()
+    bpm.fetchPage(1)
+    bpm.fetchPage(1)
+    with bpm.pinned(2):
+        held = bpm.getHeldPins()
+        assert [record.page_id for record in held] == [1, 1, 2]
+        assert "test_pin_tracking_reports_held_pins" in "".join(held[0].stack)
+    bpm.unpinPage(1, is_dirty=False)
+    assert [record.page_id for record in bpm.getHeldPins()] == [1]
+    assert bpm.getHeldPins(min_age=60) == []
+    with pytest.raises(Exception, match="(?s)No victim aval.*page 1 pinned by MainThread"):
+        with bpm.pinned(2):
+            bpm.fetchPage(3)
+    bpm.unpinPage(1, is_dirty=False)
+    assert bpm.getHeldPins() == []
+
+def test_pin_tracking_follows_batches(counting_bpm):
+    counting_bpm.enablePinTracking()
+    counting_bpm.fetchPages([1, 2, 3])
+    assert sorted(r.page_id for r in counting_bpm.getHeldPins()) == [1, 2, 3]
+    counting_bpm.unpinPages([1, 2, 3])
+    assert counting_bpm.getHeldPins() == []
+    counting_bpm.disablePinTracking()
+    counting_bpm.fetchPage(1)
+    assert counting_bpm.getHeldPins() == []
+
+def test_sharded_pinned_guard(sharded_bpm):
+    sharded_bpm.enablePinTracking()
+    with sharded_bpm.pinned(5, write=True) as page:
+        assert [r.page_id for r in sharded_bpm.getHeldPins()] == [5]
+    assert page.isDirty() and sharded_bpm.getHeldPins() == []
+
+# -----------------------------
+# Compressed disk
+# -----------------------------
+def text_page(page_id):
+    line = f"row {page_id}: the quick brown fox jumps over the lazy dog\n".encode()
+    return Page(page_id, bytearray((line * 100)[:4096]))
+
+def test_compressed_disk_round_trip(tmp_path):
+    with CompressedDiskManager(tmp_path / "c.db") as disk:
+        bpm = BufferManager(no_of_frames=4, disk_manager=disk)
+        for page_id in range(8):
+            disk.writePage(text_page(page_id))
+        page = bpm.fetchPage(5)
+        assert bytes(page.data) == bytes(text_page(5).data)
+        page.data[:3] = b"new"
+        bpm.unpinPage(5, is_dirty=True)
+        bpm.flushAllPages()
+        stats = disk.compressionStats()
+        assert stats["pages"] == 8 and stats["ratio"] > 3
+        assert stats["compressions"] == 9 and stats["decompressions"] == 1
+    with CompressedDiskManager(tmp_path / "c.db") as disk:
+        assert disk.readPage(5).data[:7] == b"new 5: "
+        assert bytes(disk.readPage(6).data) == bytes(text_page(6).data)
+        assert not disk.hasPage(8)
+
+def test_compressed_disk_stores_incompressible_pages_raw(tmp_path):
+    import random
+    data = bytearray(random.Random(1).randbytes(4096))
+    with CompressedDiskManager(tmp_path / "c.db") as disk:
+        disk.writePage(Page(0, data))
+        assert disk.extents[0][2] == 4096
+        assert disk.readPage(0).data == data
+        assert disk.compressionStats()["decompressions"] == 0
+
+def test_compressed_disk_reuses_extents_after_sync(tmp_path):
+    with CompressedDiskManager(tmp_path / "c.db") as disk:
+        disk.writePage(text_page(0))
+        first = disk.extents[0]
+        disk.writePage(text_page(0))               # copy-on-write
+        assert disk.extents[0][0] != first[0]
+        assert disk.pending_free == [first[:2]]
+        disk.sync()
+        assert disk.free_extents == [first[:2]]
+        size = disk.file_size
+        disk.writePage(text_page(0))
+        assert disk.extents[0][0] == first[0] and disk.file_size == size
+
+def test_compressed_disk_file_stays_bounded_under_rewrites(tmp_path):
+    with CompressedDiskManager(tmp_path / "c.db", recycle_extents=16) as disk:
+        for page_id in range(8):
+            disk.writePage(text_page(page_id))
+        bpm = BufferManager(no_of_frames=4, disk_manager=disk)
+        for i in range(2000):
+            page_id = i % 8
+            page = bpm.fetchPage(page_id)
+            page.data[:4] = i.to_bytes(4, "little")
+            bpm.unpinPage(page_id, is_dirty=True)
+            assert len(disk.pending_free) < 16
+        bpm.flushAllPages()
+        # 8 live extents plus at most 16 waiting to be recycled
+        assert disk.file_size <= 24 * 512
+        assert (tmp_path / "c.db").stat().st_size <= disk.file_size
+    with CompressedDiskManager(tmp_path / "c.db") as disk:
+        assert disk.readPage(3).data[:4] == (1995).to_bytes(4, "little")
+
+def test_delete_page_recycles_extents_outside_the_pool_latch(tmp_path):
+    with CompressedDiskManager(tmp_path / "c.db", recycle_extents=1) as disk:
+        for page_id in range(3):
+            disk.writePage(text_page(page_id))
+        bpm = BufferManager(no_of_frames=2, disk_manager=disk)
+        latched = []
+        sync = disk.sync
+        disk.sync = lambda: (latched.append(bpm.latch.locked()), sync())
+        bpm.fetchPage(1)
+        bpm.unpinPage(1, is_dirty=False)
+        bpm.deletePage(1)                          # resident
+        bpm.deletePage(2)                          # on disk only
+        assert latched == [False, False]
+        assert bpm.pending_io == {} and not disk.hasPage(1)
+        with pytest.raises(Exception, match="not found"):
+            bpm.fetchPage(1)
+
+def test_compressed_disk_allocates_zeroed_pages(tmp_path):
+    with CompressedDiskManager(tmp_path / "c.db") as disk:
+        bpm = BufferManager(no_of_frames=2, disk_manager=disk)
+        page = bpm.newPage()
+        assert page.page_id == 0 and disk.readPage(0).data == bytearray(4096)
+        bpm.unpinPage(0, is_dirty=False)
+        bpm.deletePage(0)
+        assert disk.allocatePage() == 0